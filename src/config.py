@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict
 
 
 class Settings(BaseSettings):
@@ -13,6 +14,152 @@ class Settings(BaseSettings):
     digikey_api_url: str = "https://api.digikey.com"
     digikey_sandbox_url: str = "https://sandbox-api.digikey.com"
     digikey_use_sandbox: bool = False
+    # Conexiones simultáneas del pool HTTP compartido con DigiKey
+    digikey_max_connections: int = 20
+    # Rate limit de la API de DigiKey y ráfaga permitida
+    digikey_rate_limit_per_minute: int = 120
+    digikey_rate_burst: int = 10
+    
+    # Reparto de la cuota de DigiKey: fracción del ritmo reservada al tráfico
+    # interactivo y pesos de weighted fair queuing por clase de prioridad
+    scheduler_interactive_reserve: float = 0.3
+    scheduler_weight_interactive: float = 8.0
+    scheduler_weight_bulk: float = 2.0
+    scheduler_weight_background: float = 1.0
+    
+    # Grabación/reproducción del tráfico DigiKey: "live", "record" o "replay"
+    digikey_transport_mode: str = "live"
+    digikey_transport_file: str = "digikey_traffic.jsonl"
+    # Factor aplicado a la latencia grabada al reproducir (0 = sin espera)
+    digikey_replay_latency_scale: float = 0.0
+    
+    # Almacén del token OAuth compartido entre workers: "memory", "file" o "redis"
+    digikey_token_store: str = "memory"
+    # Ruta del fichero para el almacén "file" (por defecto en el directorio temporal)
+    digikey_token_store_path: str = ""
+    
+    # Redis compartido ("memory://" usa un sustituto en proceso)
+    redis_url: str = "memory://"
+    
+    # Cache de búsquedas y detalles: "memory", "redis" o "tiered" (L1 local + L2 Redis)
+    cache_backend: str = "memory"
+    # Límite de entradas de la cache "memory" (0 = sin límite, manda la memoria)
+    cache_max_entries: int = 0
+    # Memoria de la cache "memory": total y por espacio (búsquedas, detalles, catálogos)
+    cache_max_bytes: int = 256_000_000
+    cache_search_max_bytes: int = 96_000_000
+    cache_details_max_bytes: int = 160_000_000
+    cache_catalog_max_bytes: int = 32_000_000
+    cache_search_ttl_seconds: int = 300
+    cache_details_ttl_seconds: int = 900
+    # Detalles separados en núcleo común y capa por locale (descripción, precios, stock)
+    cache_locale_split: bool = True
+    cache_core_ttl_seconds: int = 86400
+    # Cache negativa de partes no encontradas y búsquedas vacías
+    negative_cache_max_entries: int = 10000
+    negative_cache_ttl_seconds: int = 120
+    # Índice paramétrico local sobre los componentes vistos
+    parametric_index_enabled: bool = True
+    # Partes como máximo en el índice paramétrico (se retiran las actualizadas hace más tiempo)
+    parametric_index_max_parts: int = 50000
+    # Índice de texto completo local ("" en text_index_path = sin persistencia)
+    text_index_enabled: bool = True
+    text_index_path: str = "data/text_index.bin"
+    text_index_save_interval_seconds: int = 300
+    # Instantánea columnar del catálogo (python -m tools.snapshot), mapeada al arrancar si existe
+    snapshot_path: str = "data/catalog.snapshot"
+    # Antigüedad máxima de los datos servidos cuando el distribuidor falla
+    cache_max_stale_seconds: int = 86400
+    # Tiempo sin llamar a un distribuidor tras un 5xx/429 (si no envía Retry-After)
+    upstream_backoff_seconds: int = 30
+    # Timeouts/errores de red seguidos que abren también ese backoff
+    upstream_backoff_transport_failures: int = 3
+    # Vigencia de los catálogos de fabricantes y categorías de DigiKey
+    catalog_ttl_seconds: int = 86400
+    # L1 del modo "tiered"
+    cache_l1_max_entries: int = 256
+    cache_l1_max_bytes: int = 32_000_000
+    cache_l1_ttl_seconds: int = 30
+    
+    # Registro de consultas (JSONL rotado por tamaño) para analizar el tráfico
+    query_log_enabled: bool = True
+    query_log_path: str = "data/query_log.jsonl"
+    query_log_max_bytes: int = 10_000_000
+    query_log_backup_count: int = 5
+    
+    # Precarga al arrancar: lista de búsquedas (texto) o JSONL de consultas
+    warmup_enabled: bool = True
+    warmup_file: str = ""
+    warmup_rate_per_second: float = 2.0
+    warmup_max_queries: int = 500
+    warmup_load_catalogs: bool = True
+    # Tras este tiempo /ready responde 200 aunque la precarga no haya terminado
+    warmup_max_seconds: int = 120
+    
+    # Lista de seguimiento: partes refrescadas en segundo plano para que su
+    # detalle esté siempre fresco en cache (refresh < cache_details_ttl_seconds)
+    watchlist_enabled: bool = True
+    watchlist_path: str = "data/watchlist.json"
+    watchlist_max_entries: int = 5000
+    watchlist_refresh_seconds: int = 600
+    # Intervalo de las partes cuyo stock o precio cambia en cada refresco
+    watchlist_min_refresh_seconds: int = 120
+    watchlist_rate_per_second: float = 2.0
+    watchlist_concurrency: int = 4
+    watchlist_tick_seconds: float = 5.0
+    
+    # Histórico de precio y stock: solo los cambios, en un log append-only
+    # ("" en history_path = solo en memoria)
+    history_enabled: bool = True
+    history_path: str = "data/history.log"
+    history_max_parts: int = 20000
+    history_max_points_per_part: int = 500
+    # Cambios recientes servidos por /history/changes
+    history_feed_size: int = 10000
+    history_save_interval_seconds: int = 30
+    
+    # Control de admisión: límite de concurrencia adaptativo y cola acotada
+    admission_enabled: bool = True
+    admission_initial_limit: int = 32
+    admission_min_limit: int = 4
+    admission_max_limit: int = 128
+    admission_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 2.0
+    # Latencia media del distribuidor a partir de la cual se reduce el límite
+    admission_target_latency_ms: int = 1500
+    
+    # Cuotas por consumidor (X-API-Key o X-Consumer-Id) en ventana deslizante;
+    # 0 = sin límite (el uso se contabiliza igualmente). Las keys no
+    # configuradas comparten la cuenta "unknown"
+    quota_enabled: bool = True
+    quota_window_seconds: int = 86400
+    quota_requests_per_window: int = 0
+    quota_upstream_calls_per_window: int = 0
+    # API key -> nombre del consumidor, p. ej. {"k3y": "compras"}
+    consumer_api_keys: Dict[str, str] = {}
+    # Límites por consumidor, p. ej. {"compras": {"requests": 5000, "upstream_calls": 300}}
+    consumer_quotas: Dict[str, Dict[str, int]] = {}
+    # Usar X-Consumer-Id sin API key (solo detrás de un proxy que la fije)
+    quota_trust_consumer_header: bool = False
+    
+    # Logging: nivel, formato ("json" o "text") y límite de mensajes repetidos
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    log_rate_limit_burst: int = 10
+    log_rate_limit_interval_seconds: int = 60
+    
+    # Conversión local de moneda: los precios se piden al distribuidor en
+    # fx_canonical_currency y se convierten con los tipos de fx_rates_path
+    # (JSON {"base": "USD", "rates": {"EUR": 0.92, ...}}, releído cada fx_refresh_seconds)
+    fx_enabled: bool = False
+    fx_canonical_currency: str = "USD"
+    fx_rates_path: str = "data/fx_rates.json"
+    fx_refresh_seconds: int = 3600
+    
+    # Optimizador de BOM: líneas por petición y consultas de ofertas en paralelo
+    bom_max_lines: int = 5000
+    bom_fetch_concurrency: int = 8
     
     # Mouser (para implementación futura)
     mouser_api_key: str = ""
@@ -0,0 +1,155 @@
+import json
+import logging
+import queue
+import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from time import monotonic
+from typing import Optional, Dict, Tuple
+
+from config import Settings
+
+
+# Identificador de la petición HTTP en curso (ver middleware.correlation)
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+# Atributos estándar de LogRecord; el resto son campos estructurados (extra=)
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Copia el correlation id del contexto al registro antes de encolarlo"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = correlation_id.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita los mensajes repetidos: como mucho `burst` registros por plantilla
+    (logger, nivel y mensaje sin formatear) cada `interval` segundos.
+
+    Los descartados no llegan a la cola; el primer registro que pasa tras
+    una ventana con descartes lleva el recuento en el campo `suppressed`.
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, str(record.msg))
+        now = monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = window[2] if window is not None else 0
+            self._windows[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            if len(self._windows) > 10000:
+                self._windows = {key: self._windows[key]}
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (y cuenta) registros si la cola está llena"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro con los campos estructurados de extra="""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RESERVED and value is not None:
+                entry[name] = value if isinstance(value, (str, int, float, bool)) else str(value)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible para desarrollo: mensaje seguido de los campos extra"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [
+            f"{name}={value}" for name, value in vars(record).items()
+            if name not in _RESERVED and value is not None
+        ]
+        return f"{line} [{' '.join(fields)}]" if fields else line
+
+
+def setup_logging(settings: Settings):
+    """
+    Configura el logging de la aplicación sin E/S en el event loop
+
+    Los registros se filtran (correlation id, límite de repetidos) y se
+    encolan en el hilo que los emite; un QueueListener los formatea y
+    escribe en stderr desde su propio hilo. Llamarla de nuevo no duplica
+    handlers.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationIdFilter())
+    queue_handler.addFilter(RateLimitFilter(
+        burst=settings.log_rate_limit_burst,
+        interval=settings.log_rate_limit_interval_seconds
+    ))
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    root.setLevel(settings.log_level.upper())
+    root.addHandler(queue_handler)
+    _queue_handler = queue_handler
+    # httpx anota cada petición a DigiKey en INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Vacía la cola de logging y detiene el hilo escritor"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
@@ -1,13 +1,105 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import Response, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from routers import components, digikey_advanced
+from routers import components, digikey_advanced, watchlist, history
+from services.text_index import get_text_index
+from services.metrics import get_metrics
+from services.query_log import close_query_loggers
+from services.fx import refresh_fx_rates
+from services.transport import close_http_clients
+from services.warmup import get_warmup_state, run_warmup, mark_ready_after
+from services.watchlist import get_watchlist, run_watchlist_refresher
+from services.history import get_history_store
+from services.admission import get_admission_controller
+from services.quota import get_quota_manager, QuotaExceededError
+from middleware import AdmissionControlMiddleware, QuotaMiddleware, CorrelationIdMiddleware
+from middleware.quota import quota_exceeded_body
 from config import get_settings
+from logging_config import setup_logging, shutdown_logging
 
 settings = get_settings()
+setup_logging(settings)
+logger = logging.getLogger(__name__)
+
+
+async def persist_text_index():
+    """Guarda periódicamente el índice de texto local si ha cambiado"""
+    index = get_text_index(settings)
+    if index is None or index.path is None:
+        return
+    while True:
+        await asyncio.sleep(settings.text_index_save_interval_seconds)
+        if index.dirty:
+            try:
+                await index.save_async()
+            except OSError as e:
+                logger.error("Error saving full-text index: %s", e)
+
+
+async def persist_history():
+    """Añade periódicamente al log los cambios de precio y stock pendientes"""
+    store = get_history_store(settings)
+    if store is None or store.path is None:
+        return
+    while True:
+        await asyncio.sleep(settings.history_save_interval_seconds)
+        if store.dirty:
+            try:
+                await asyncio.to_thread(store.save)
+            except OSError as e:
+                logger.error("Error saving price history: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque y parada de las tareas en segundo plano"""
+    background_tasks = [
+        asyncio.create_task(persist_text_index()),
+        asyncio.create_task(persist_history()),
+        asyncio.create_task(refresh_fx_rates(settings))
+    ]
+    
+    warmup_state = get_warmup_state()
+    if settings.warmup_enabled:
+        background_tasks.append(asyncio.create_task(run_warmup(settings, warmup_state)))
+        background_tasks.append(asyncio.create_task(
+            mark_ready_after(warmup_state, settings.warmup_max_seconds)
+        ))
+    else:
+        warmup_state.status = "disabled"
+        warmup_state.ready = True
+    
+    if settings.watchlist_enabled:
+        background_tasks.append(asyncio.create_task(run_watchlist_refresher(settings)))
+    
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # Se espera a que terminen antes de los guardados finales; una escritura
+    # que ya estuviera en un hilo la ordena write() por versión
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    
+    index = get_text_index(settings)
+    if index is not None and index.dirty:
+        index.save()
+    watched = get_watchlist(settings)
+    if watched is not None and watched.dirty:
+        watched.save()
+    store = get_history_store(settings)
+    if store is not None and store.dirty:
+        store.save()
+    await close_http_clients()
+    close_query_loggers()
+    shutdown_logging()
+
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
+    lifespan=lifespan,
     description="""
     API para búsqueda y comparación de componentes electrónicos en múltiples distribuidores.
     
@@ -52,6 +144,19 @@ app = FastAPI(
     """
 )
 
+# Control de admisión (CORS queda por fuera para que los 503/429 lleven sus cabeceras)
+admission_controller = get_admission_controller(settings)
+if admission_controller is not None:
+    app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
+# Cuotas por consumidor, antes de ocupar un hueco de admisión
+quota_manager = get_quota_manager(settings)
+if quota_manager is not None:
+    app.add_middleware(QuotaMiddleware, manager=quota_manager)
+
+# Correlation id de cada petición para los logs (por fuera de cuotas y admisión)
+app.add_middleware(CorrelationIdMiddleware)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -61,9 +166,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(QuotaExceededError)
+async def quota_exceeded_handler(request: Request, exc: QuotaExceededError):
+    """El consumidor agotó su presupuesto de llamadas al distribuidor"""
+    return Response(
+        content=quota_exceeded_body(exc),
+        status_code=429,
+        media_type="application/json",
+        headers={"Retry-After": str(max(int(exc.retry_after), 1))}
+    )
+
 # Incluir routers
 app.include_router(components.router)
 app.include_router(digikey_advanced.router)
+app.include_router(watchlist.router)
+app.include_router(history.router)
 
 
 @app.get("/")
@@ -77,6 +194,12 @@ async def root():
             "compare": "/components/compare/{manufacturer_part_number}",
             "details": "/components/{distributor}/{part_number}",
             "distributors": "/components/distributors",
+            "watchlist": "/watchlist",
+            "history": "/history/{distributor}/{part_number}",
+            "changes": "/history/changes",
+            "metrics": "/metrics",
+            "ready": "/ready",
+            "usage": "/usage",
             "docs": "/docs"
         }
     }
@@ -88,6 +211,29 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 cuando la precarga de caches ha terminado, 503 mientras tanto"""
+    state = get_warmup_state()
+    return JSONResponse(state.as_dict(), status_code=200 if state.ready else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Contadores y resúmenes de métricas del proceso"""
+    return get_metrics().snapshot()
+
+
+@app.get("/usage")
+async def usage(request: Request):
+    """Uso de peticiones y llamadas al distribuidor por consumidor (requiere una API key configurada)"""
+    if quota_manager is None:
+        return {}
+    if not quota_manager.is_configured_key(request.headers):
+        raise HTTPException(status_code=401, detail="A configured X-API-Key is required")
+    return quota_manager.usage()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
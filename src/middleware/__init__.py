@@ -0,0 +1,8 @@
+"""
+Middleware package for Electronics Parts API
+"""
+from .admission import AdmissionControlMiddleware
+from .quota import QuotaMiddleware
+from .correlation import CorrelationIdMiddleware
+
+__all__ = ['AdmissionControlMiddleware', 'QuotaMiddleware', 'CorrelationIdMiddleware']
@@ -0,0 +1,63 @@
+import json
+from typing import Iterable
+
+from services.admission import AdmissionController
+
+
+# Rutas que nunca se encolan: sondas, métricas, documentación y consultas locales
+DEFAULT_EXEMPT_PATHS = (
+    "/",
+    "/health",
+    "/ready",
+    "/metrics",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/components/suggest",
+    "/components/parametric",
+)
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI que aplica un AdmissionController a cada petición HTTP
+
+    Las peticiones rechazadas reciben 503 con Retry-After sin llegar a los
+    routers.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        exempt_paths: Iterable[str] = DEFAULT_EXEMPT_PATHS
+    ):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server overloaded, retry later"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(self.controller.retry_after_seconds()).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,46 @@
+import re
+import uuid
+
+from starlette.datastructures import Headers
+
+from logging_config import correlation_id
+
+
+REQUEST_ID_HEADER = "x-request-id"
+# Se acepta el id del cliente o del balanceador solo si tiene una forma razonable
+_VALID_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+class CorrelationIdMiddleware:
+    """
+    Middleware ASGI que asigna un correlation id a cada petición
+
+    Reutiliza X-Request-ID si llega en la petición o genera uno nuevo, lo
+    deja en el contexto para que todos los logs de la petición lo incluyan
+    y lo devuelve en la cabecera X-Request-ID de la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if not request_id or not _VALID_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER.encode("ascii"), request_id.encode("ascii"))
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+
+        token = correlation_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            correlation_id.reset(token)
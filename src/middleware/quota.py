@@ -0,0 +1,70 @@
+import json
+
+from starlette.datastructures import Headers
+
+from services.quota import QuotaManager, QuotaExceededError, current_consumer
+
+
+# Rutas que no consumen cuota
+DEFAULT_EXEMPT_PATHS = (
+    "/",
+    "/health",
+    "/ready",
+    "/metrics",
+    "/usage",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+)
+
+
+def quota_exceeded_body(error: QuotaExceededError) -> bytes:
+    return json.dumps({
+        "detail": str(error),
+        "consumer": error.consumer,
+        "budget": error.budget
+    }).encode("utf-8")
+
+
+class QuotaMiddleware:
+    """
+    Middleware ASGI que identifica al consumidor de cada petición, le carga
+    la petición y deja su nombre en current_consumer para que las llamadas
+    al distribuidor se carguen a su presupuesto.
+
+    Si el consumidor ha agotado su presupuesto de peticiones responde 429
+    con Retry-After.
+    """
+
+    def __init__(self, app, manager: QuotaManager, exempt_paths=DEFAULT_EXEMPT_PATHS):
+        self.app = app
+        self.manager = manager
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        consumer = self.manager.identify(Headers(scope=scope))
+        try:
+            self.manager.charge_request(consumer)
+        except QuotaExceededError as e:
+            body = quota_exceeded_body(e)
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", str(max(int(e.retry_after), 1)).encode("ascii")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        token = current_consumer.set(consumer)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_consumer.reset(token)
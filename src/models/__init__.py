@@ -3,20 +3,66 @@ Models package for Electronics Parts API
 """
 from .base import (
     DistributorEnum,
+    SearchSourceEnum,
     PriceBreak,
+    QuantityPrice,
     ComponentParameter,
     GenericComponent,
     ComponentSearchRequest,
     ComponentSearchResponse,
+    ParametricFilter,
+    ParametricSearchRequest,
+    ParametricSearchResponse,
+    Suggestion,
+    SuggestResponse,
+    BomLine,
+    BomOptimizeRequest,
+    BomOffer,
+    BomLineResult,
+    BomOptimizeResponse,
+    SiteCell,
+    SiteMatrixRow,
+    SiteMatrixResponse,
+    WatchlistItem,
+    WatchlistAddRequest,
+    WatchlistEntry,
+    WatchlistResponse,
+    HistoryPoint,
+    PartHistoryResponse,
+    PartChange,
+    ChangeFeedResponse,
     DistributorAvailability
 )
 
 __all__ = [
     'DistributorEnum',
+    'SearchSourceEnum',
     'PriceBreak',
+    'QuantityPrice',
     'ComponentParameter',
     'GenericComponent',
     'ComponentSearchRequest',
     'ComponentSearchResponse',
+    'ParametricFilter',
+    'ParametricSearchRequest',
+    'ParametricSearchResponse',
+    'Suggestion',
+    'SuggestResponse',
+    'BomLine',
+    'BomOptimizeRequest',
+    'BomOffer',
+    'BomLineResult',
+    'BomOptimizeResponse',
+    'SiteCell',
+    'SiteMatrixRow',
+    'SiteMatrixResponse',
+    'WatchlistItem',
+    'WatchlistAddRequest',
+    'WatchlistEntry',
+    'WatchlistResponse',
+    'HistoryPoint',
+    'PartHistoryResponse',
+    'PartChange',
+    'ChangeFeedResponse',
     'DistributorAvailability'
 ]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from enum import Enum
 
 
@@ -9,6 +9,11 @@ class DistributorEnum(str, Enum):
     FARNELL = "farnell"
 
 
+class SearchSourceEnum(str, Enum):
+    UPSTREAM = "upstream"
+    LOCAL = "local"
+
+
 class PriceBreak(BaseModel):
     quantity: int
     unit_price: float
@@ -19,6 +24,18 @@ class ComponentParameter(BaseModel):
     name: str
     value: str
     unit: Optional[str] = None
+    numeric_value: Optional[float] = Field(
+        default=None,
+        description="Valor normalizado a unidades SI (10 kOhms -> 10000.0)"
+    )
+
+
+class QuantityPrice(BaseModel):
+    """Precio de un componente para una cantidad concreta"""
+    requested_quantity: int
+    order_quantity: int = Field(..., description="Cantidad a pedir tras aplicar MOQ y múltiplo de pedido")
+    unit_price: Optional[float] = None
+    extended_price: Optional[float] = None
 
 
 class GenericComponent(BaseModel):
@@ -31,7 +48,8 @@ class GenericComponent(BaseModel):
     detailed_description: Optional[str] = None
     quantity_available: int
     minimum_order_quantity: int = 1
-    unit_price: Optional[float] = None
+    order_multiple: int = Field(default=1, description="Múltiplo de pedido (bobina completa en Tape & Reel)")
+    unit_price: Optional[float] = Field(default=None, description="Precio unitario al pedir el MOQ")
     price_breaks: List[PriceBreak] = Field(default_factory=list)
     datasheet_url: Optional[str] = None
     product_url: Optional[str] = None
@@ -43,6 +61,22 @@ class GenericComponent(BaseModel):
     rohs_status: Optional[str] = None
     lifecycle_status: Optional[str] = None
     raw_data: Dict[str, Any] = Field(default_factory=dict)
+    stale: bool = Field(
+        default=False,
+        description="True si los datos provienen de cache porque el distribuidor no respondió"
+    )
+    data_age_seconds: Optional[float] = Field(
+        default=None,
+        description="Antigüedad de los datos servidos en modo degradado"
+    )
+    price_at_qty: Optional[QuantityPrice] = Field(
+        default=None,
+        description="Precio para la cantidad pedida en la búsqueda (parámetro quantity)"
+    )
+    converted_from_currency: Optional[str] = Field(
+        default=None,
+        description="Moneda en la que el distribuidor dio los precios si se convirtieron localmente"
+    )
 
 
 class ComponentSearchRequest(BaseModel):
@@ -61,6 +95,15 @@ class ComponentSearchRequest(BaseModel):
     locale_language: str = Field(default="en")
     locale_currency: str = Field(default="USD")
     locale_site: str = Field(default="US")
+    quantity: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Si se indica, cada componente incluye price_at_qty para esta cantidad"
+    )
+    source: SearchSourceEnum = Field(
+        default=SearchSourceEnum.UPSTREAM,
+        description="'upstream' consulta los distribuidores; 'local' usa el índice de componentes ya vistos"
+    )
 
 
 class ComponentSearchResponse(BaseModel):
@@ -69,6 +112,252 @@ class ComponentSearchResponse(BaseModel):
     total_count: int
     distributors_searched: List[str]
     search_time_ms: Optional[float] = None
+    source: SearchSourceEnum = SearchSourceEnum.UPSTREAM
+    distributors_failed: List[str] = Field(
+        default_factory=list,
+        description="Distribuidores que fallaron sin datos en cache que servir"
+    )
+    stale: bool = False
+    stale_distributors: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Distribuidores servidos desde cache desactualizada y antigüedad en segundos"
+    )
+
+
+class ParametricFilter(BaseModel):
+    """Condición sobre un parámetro técnico"""
+    name: str = Field(..., description="Nombre del parámetro (ej: 'Capacitance', 'Voltage')")
+    min: Optional[Union[float, str]] = Field(
+        None,
+        description="Mínimo en unidades SI o con unidad (ej: 9e-8, '90nF')"
+    )
+    max: Optional[Union[float, str]] = Field(
+        None,
+        description="Máximo en unidades SI o con unidad (ej: 1.1e-7, '110nF')"
+    )
+    value: Optional[str] = Field(
+        None,
+        description="Texto que debe contener el valor (ej: '0603')"
+    )
+
+
+class ParametricSearchRequest(BaseModel):
+    """Request para búsqueda paramétrica sobre los componentes indexados"""
+    filters: List[ParametricFilter] = Field(..., min_length=1)
+    max_results: int = Field(default=50, ge=1, le=1000)
+    offset: int = Field(default=0, ge=0)
+
+
+class ParametricSearchResponse(BaseModel):
+    """Respuesta de búsqueda paramétrica local"""
+    components: List[GenericComponent]
+    total_count: int
+    indexed_count: int
+    search_time_ms: Optional[float] = None
+
+
+class Suggestion(BaseModel):
+    """Sugerencia de autocompletado"""
+    text: str
+    kind: str = Field(..., description="'mpn' o 'manufacturer'")
+    weight: float = Field(..., description="Popularidad observada")
+
+
+class SuggestResponse(BaseModel):
+    """Respuesta de autocompletado"""
+    prefix: str
+    suggestions: List[Suggestion]
+    suggest_time_ms: Optional[float] = None
+
+
+class BomLine(BaseModel):
+    """Línea de una lista de materiales"""
+    part_number: str = Field(..., description="MPN o número de parte del distribuidor")
+    quantity: int = Field(..., ge=1)
+    reference: Optional[str] = Field(None, description="Designadores o referencia interna de la línea")
+
+
+class BomOptimizeRequest(BaseModel):
+    """Request para optimizar el coste de una BOM"""
+    lines: List[BomLine] = Field(..., min_length=1)
+    distributors: Optional[List[DistributorEnum]] = Field(
+        None,
+        description="Distribuidores a considerar. Si es None, todos"
+    )
+    distributor_penalty: float = Field(
+        default=0.0,
+        ge=0,
+        description="Coste fijo por distribuidor utilizado (envío, gestión); 0 = ignorar"
+    )
+    allow_backorder: bool = Field(
+        default=False,
+        description="Aceptar ofertas sin stock suficiente para la cantidad"
+    )
+    packaging_options: bool = Field(
+        default=True,
+        description="Consultar opciones por cantidad y embalaje (cut tape, bobina, Digi-Reel); "
+                    "si es False solo se usan los tramos del detalle del componente"
+    )
+    locale_language: str = Field(default="en")
+    locale_currency: str = Field(default="USD")
+    locale_site: str = Field(default="US")
+
+
+class BomOffer(BaseModel):
+    """Oferta elegida para una línea de la BOM"""
+    distributor: str
+    distributor_part_number: str
+    manufacturer_part_number: str
+    packaging: Optional[str] = None
+    order_quantity: int
+    unit_price: float
+    extended_price: float
+    quantity_available: int
+
+
+class BomLineResult(BaseModel):
+    """Resultado de una línea de la BOM"""
+    part_number: str
+    quantity: int
+    reference: Optional[str] = None
+    status: str = Field(..., description="'ok', 'no_offers', 'insufficient_stock' o 'error'")
+    selected: Optional[BomOffer] = None
+    offers_considered: int = 0
+
+
+class BomOptimizeResponse(BaseModel):
+    """Respuesta del optimizador de BOM"""
+    lines: List[BomLineResult]
+    parts_cost: float
+    penalty_cost: float
+    total_cost: float
+    currency: str
+    distributors_used: List[str]
+    unresolved_lines: int
+    optimize_time_ms: Optional[float] = None
+
+
+class SiteCell(BaseModel):
+    """Stock y precio de un componente en un sitio"""
+    quantity_available: int
+    minimum_order_quantity: int = 1
+    unit_price: Optional[float] = None
+    price_breaks: List[List[float]] = Field(
+        default_factory=list,
+        description="Tramos como pares [cantidad, precio unitario]"
+    )
+    stale: bool = False
+
+
+class SiteMatrixRow(BaseModel):
+    """Un número de parte de un distribuidor y sus datos en cada sitio"""
+    distributor: str
+    distributor_part_number: str
+    manufacturer: str
+    manufacturer_part_number: str
+    sites: Dict[str, SiteCell] = Field(
+        default_factory=dict,
+        description="Sitio -> stock y precio; ausente si la parte no está en ese sitio"
+    )
+
+
+class SiteMatrixResponse(BaseModel):
+    """Matriz de stock y precio por sitio (parámetro locale_sites)"""
+    query: str
+    sites: List[str]
+    currencies: Dict[str, str] = Field(..., description="Moneda de los precios de cada sitio")
+    rows: List[SiteMatrixRow]
+    sites_failed: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Sitios cuya consulta falló y motivo"
+    )
+    fetch_time_ms: Optional[float] = None
+
+
+class WatchlistItem(BaseModel):
+    """Parte cuyo detalle se mantiene fresco en cache"""
+    distributor: DistributorEnum
+    part_number: str = Field(..., min_length=1, description="Número de parte del distribuidor")
+    locale_language: str = Field(default="en")
+    locale_currency: str = Field(default="USD")
+    locale_site: str = Field(default="US")
+
+
+class WatchlistAddRequest(BaseModel):
+    """Request para añadir partes a la lista de seguimiento"""
+    items: List[WatchlistItem] = Field(..., min_length=1)
+
+
+class WatchlistEntry(WatchlistItem):
+    """Parte seguida con el estado de sus refrescos"""
+    added_at: float
+    last_refreshed_at: Optional[float] = None
+    last_attempt_at: Optional[float] = None
+    last_changed_at: Optional[float] = None
+    volatility: float = Field(
+        default=0.0,
+        description="Media móvil (0-1) de los refrescos en los que cambió el stock o el precio"
+    )
+    refresh_count: int = 0
+    error_count: int = Field(default=0, description="Fallos consecutivos")
+    last_error: Optional[str] = None
+    quantity_available: Optional[int] = None
+    unit_price: Optional[float] = None
+
+
+class WatchlistResponse(BaseModel):
+    """Contenido de la lista de seguimiento"""
+    entries: List[WatchlistEntry]
+    total_count: int
+    max_entries: int
+
+
+class HistoryPoint(BaseModel):
+    """Precio y stock de una parte desde ts (o en un intervalo si se reduce la serie)"""
+    ts: int = Field(..., description="Instante del cambio (epoch en segundos)")
+    quantity_available: int
+    unit_price: Optional[float] = None
+    changes: int = Field(default=1, description="Cambios agrupados en este punto")
+    min_quantity: int
+    max_quantity: int
+    min_unit_price: Optional[float] = None
+    max_unit_price: Optional[float] = None
+
+
+class PartHistoryResponse(BaseModel):
+    """Evolución del precio y el stock de una parte"""
+    distributor: str
+    part_number: str
+    currency: str
+    first_seen_at: int
+    last_seen_at: int = Field(..., description="Última vez que el distribuidor devolvió la parte")
+    total_points: int = Field(..., description="Cambios guardados de la parte")
+    downsampled: bool = False
+    points: List[HistoryPoint]
+
+
+class PartChange(BaseModel):
+    """Cambio de precio o stock de una parte (o su primera aparición)"""
+    seq: int
+    ts: int
+    distributor: str
+    part_number: str
+    currency: str
+    quantity_available: int
+    unit_price: Optional[float] = None
+    previous_quantity: Optional[int] = None
+    previous_unit_price: Optional[float] = None
+    first_seen: bool = False
+
+
+class ChangeFeedResponse(BaseModel):
+    """Cambios posteriores a un cursor"""
+    changes: List[PartChange]
+    next_cursor: int = Field(..., description="Cursor (since) para la siguiente petición")
+    reset_required: bool = Field(
+        default=False,
+        description="True si se perdieron cambios anteriores al cursor: hay que volver a consultar todo"
+    )
 
 
 class DistributorAvailability(BaseModel):
@@ -43,6 +43,7 @@ class DigiKeyProduct(BaseModel):
     detailed_description: Optional[str] = Field(None, alias="DetailedDescription")
     quantity_available: int = Field(default=0, alias="QuantityAvailable")
     minimum_order_quantity: int = Field(default=1, alias="MinimumOrderQuantity")
+    standard_package: Optional[int] = Field(None, alias="StandardPackage")
     packaging: Optional[str] = Field(None, alias="Packaging")
     series: Optional[str] = Field(None, alias="Series")
     product_status: Optional[str] = Field(None, alias="ProductStatus")
@@ -99,3 +100,96 @@ class DigiKeyCategoriesResponse(BaseModel):
 
     class Config:
         populate_by_name = True
+
+
+class DigiKeyPackageType(BaseModel):
+    id: Optional[int] = Field(None, alias="Id")
+    name: Optional[str] = Field(None, alias="Name")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyPricingOptionProduct(BaseModel):
+    digi_key_product_number: str = Field(alias="DigiKeyProductNumber")
+    quantity_priced: int = Field(default=0, alias="QuantityPriced")
+    minimum_order_quantity: int = Field(default=1, alias="MinimumOrderQuantity")
+    extended_price: float = Field(default=0.0, alias="ExtendedPrice")
+    unit_price: float = Field(default=0.0, alias="UnitPrice")
+    package_type: Optional[DigiKeyPackageType] = Field(None, alias="PackageType")
+    marketplace: bool = Field(default=False, alias="Marketplace")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyPricingOption(BaseModel):
+    pricing_option: Optional[str] = Field(None, alias="PricingOption")
+    total_quantity_priced: int = Field(default=0, alias="TotalQuantityPriced")
+    total_price: float = Field(default=0.0, alias="TotalPrice")
+    quantity_available: int = Field(default=0, alias="QuantityAvailable")
+    products: List[DigiKeyPricingOptionProduct] = Field(default_factory=list, alias="Products")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyPricingByQuantityResponse(BaseModel):
+    requested_product: Optional[str] = Field(None, alias="RequestedProduct")
+    requested_quantity: int = Field(default=0, alias="RequestedQuantity")
+    manufacturer_part_number: Optional[str] = Field(None, alias="ManufacturerPartNumber")
+    manufacturer: Optional[DigiKeyManufacturerInfo] = Field(None, alias="Manufacturer")
+    my_pricing_options: List[DigiKeyPricingOption] = Field(default_factory=list, alias="MyPricingOptions")
+    standard_pricing_options: List[DigiKeyPricingOption] = Field(default_factory=list, alias="StandardPricingOptions")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyDigiReelPricing(BaseModel):
+    reeling_fee: float = Field(default=0.0, alias="ReelingFee")
+    unit_price: float = Field(default=0.0, alias="UnitPrice")
+    extended_price: float = Field(default=0.0, alias="ExtendedPrice")
+    requested_quantity: int = Field(default=0, alias="RequestedQuantity")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyDescription(BaseModel):
+    product_description: Optional[str] = Field(None, alias="ProductDescription")
+    detailed_description: Optional[str] = Field(None, alias="DetailedDescription")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyProductPricingVariation(BaseModel):
+    digi_key_product_number: str = Field(alias="DigiKeyProductNumber")
+    quantity_available_for_package_type: int = Field(default=0, alias="QuantityAvailableforPackageType")
+    minimum_order_quantity: int = Field(default=1, alias="MinimumOrderQuantity")
+    package_type: Optional[DigiKeyPackageType] = Field(None, alias="PackageType")
+    standard_pricing: List[DigiKeyPriceBreak] = Field(default_factory=list, alias="StandardPricing")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyProductPricing(BaseModel):
+    manufacturer_product_number: Optional[str] = Field(None, alias="ManufacturerProductNumber")
+    description: Optional[DigiKeyDescription] = Field(None, alias="Description")
+    quantity_available: int = Field(default=0, alias="QuantityAvailable")
+    product_url: Optional[str] = Field(None, alias="ProductUrl")
+    standard_package: Optional[int] = Field(None, alias="StandardPackage")
+    product_variations: List[DigiKeyProductPricingVariation] = Field(default_factory=list, alias="ProductVariations")
+
+    class Config:
+        populate_by_name = True
+
+
+class DigiKeyProductPricingResponse(BaseModel):
+    product_pricings: List[DigiKeyProductPricing] = Field(default_factory=list, alias="ProductPricings")
+    products_count: int = Field(default=0, alias="ProductsCount")
+
+    class Config:
+        populate_by_name = True
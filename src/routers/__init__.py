@@ -3,5 +3,7 @@ Routers package for Electronics Parts API
 """
 from . import components
 from . import digikey_advanced
+from . import watchlist
+from . import history
 
-__all__ = ['components', 'digikey_advanced']
+__all__ = ['components', 'digikey_advanced', 'watchlist', 'history']
@@ -1,16 +1,71 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import Optional, List
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
+from typing import Optional, List, Awaitable, TypeVar, Union
 from models.base import (
     ComponentSearchRequest,
     ComponentSearchResponse,
     GenericComponent,
-    DistributorEnum
+    DistributorEnum,
+    SearchSourceEnum,
+    ParametricSearchRequest,
+    ParametricSearchResponse,
+    SuggestResponse,
+    BomOptimizeRequest,
+    BomOptimizeResponse,
+    SiteMatrixResponse
 )
 from services.aggregator_service import ComponentAggregatorService
+from services.upstream_health import UpstreamUnavailableError
+from services.metrics import get_metrics
+from services.quota import QuotaExceededError, current_consumer
+from services.locales import parse_locale_sites
+from services.scheduler import priority_scope, PRIORITY_BACKGROUND
 from config import get_settings, Settings
 
 
 router = APIRouter(prefix="/components", tags=["Components"])
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Código no estándar (nginx) para peticiones abandonadas por el cliente
+CLIENT_CLOSED_REQUEST = 499
+# Cada cuánto se comprueba si el cliente sigue conectado
+DISCONNECT_POLL_SECONDS = 0.1
+
+
+class ClientDisconnected(Exception):
+    """El cliente cerró la conexión antes de recibir la respuesta"""
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """
+    Ejecuta work vigilando la conexión del cliente
+    
+    Si el cliente se desconecta, la tarea se cancela; las consultas al
+    distribuidor que otros llamantes comparten (ver RequestCoalescer) siguen
+    en curso para ellos y para poblar la cache.
+    
+    Raises:
+        ClientDisconnected: Si el cliente se fue antes de terminar
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                get_metrics().increment("client_disconnects_total", route=request.scope["route"].path)
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
 
 
 def get_aggregator_service(settings: Settings = Depends(get_settings)) -> ComponentAggregatorService:
@@ -34,6 +89,7 @@ async def get_available_distributors(
 @router.post("/search", response_model=ComponentSearchResponse)
 async def search_components(
     request: ComponentSearchRequest,
+    http_request: Request,
     service: ComponentAggregatorService = Depends(get_aggregator_service)
 ):
     """
@@ -49,6 +105,8 @@ async def search_components(
         - locale_language: Código de idioma (default: "en")
         - locale_currency: Código de moneda (default: "USD")
         - locale_site: Código de sitio (default: "US")
+        - quantity: Cantidad para la que calcular price_at_qty (opcional)
+        - source: "upstream" (default) o "local" para buscar en el índice local
     
     Returns:
         Respuesta con componentes encontrados y metadata
@@ -71,7 +129,15 @@ async def search_components(
         ```
     """
     try:
-        return await service.search_components(
+        if request.source == SearchSourceEnum.LOCAL:
+            return service.search_local(
+                keywords=request.keywords,
+                max_results=request.max_results,
+                offset=request.offset,
+                quantity=request.quantity
+            )
+        
+        return await cancel_on_disconnect(http_request, service.search_components(
             keywords=request.keywords,
             distributors=request.distributors,
             max_results=request.max_results,
@@ -79,8 +145,13 @@ async def search_components(
             filters=request.filters,
             locale_language=request.locale_language,
             locale_currency=request.locale_currency,
-            locale_site=request.locale_site
-        )
+            locale_site=request.locale_site,
+            quantity=request.quantity
+        ))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -90,6 +161,7 @@ async def search_components(
 
 @router.get("/search", response_model=ComponentSearchResponse)
 async def search_components_get(
+    http_request: Request,
     keywords: str = Query(..., description="Palabras clave para buscar"),
     distributors: Optional[str] = Query(
         None,
@@ -100,6 +172,15 @@ async def search_components_get(
     locale_language: str = Query("en", description="Código de idioma"),
     locale_currency: str = Query("USD", description="Código de moneda"),
     locale_site: str = Query("US", description="Código de sitio"),
+    quantity: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Cantidad para la que calcular price_at_qty (aplica MOQ y múltiplo de pedido)"
+    ),
+    source: SearchSourceEnum = Query(
+        SearchSourceEnum.UPSTREAM,
+        description="'upstream' consulta los distribuidores; 'local' usa el índice local"
+    ),
     service: ComponentAggregatorService = Depends(get_aggregator_service)
 ):
     """
@@ -113,6 +194,8 @@ async def search_components_get(
         locale_language: Código de idioma
         locale_currency: Código de moneda
         locale_site: Código de sitio
+        quantity: Cantidad para la que calcular el precio de cada componente
+        source: Origen de los resultados (upstream o local)
     
     Returns:
         Respuesta con componentes encontrados
@@ -120,8 +203,18 @@ async def search_components_get(
     Example:
         GET /components/search?keywords=STM32F103&distributors=digikey,mouser&max_results=20
         GET /components/search?keywords=resistor+10k  (busca en todos los distribuidores)
+        GET /components/search?keywords=STM32F103&source=local  (sin llamadas a distribuidores)
+        GET /components/search?keywords=STM32F103&quantity=250  (incluye price_at_qty)
     """
     try:
+        if source == SearchSourceEnum.LOCAL:
+            return service.search_local(
+                keywords=keywords,
+                max_results=max_results,
+                offset=offset,
+                quantity=quantity
+            )
+        
         # Parsear distribuidores
         distributor_list = None
         if distributors:
@@ -131,20 +224,25 @@ async def search_components_get(
                 if d.strip()
             ]
         
-        return await service.search_components(
+        return await cancel_on_disconnect(http_request, service.search_components(
             keywords=keywords,
             distributors=distributor_list,
             max_results=max_results,
             offset=offset,
             locale_language=locale_language,
             locale_currency=locale_currency,
-            locale_site=locale_site
-        )
+            locale_site=locale_site,
+            quantity=quantity
+        ))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except ValueError as e:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid distributor name: {str(e)}"
+            detail=f"Invalid query parameter: {str(e)}"
         )
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -152,58 +250,177 @@ async def search_components_get(
         )
 
 
-@router.get("/{distributor}/{part_number}", response_model=GenericComponent)
-async def get_component_details(
-    distributor: DistributorEnum,
-    part_number: str,
-    locale_language: str = Query("en", description="Código de idioma"),
-    locale_currency: str = Query("USD", description="Código de moneda"),
-    locale_site: str = Query("US", description="Código de sitio"),
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(
+    prefix: str = Query(..., min_length=1, description="Texto tecleado por el usuario"),
+    limit: int = Query(10, ge=1, le=50, description="Número máximo de sugerencias"),
+    kind: Optional[str] = Query(
+        None,
+        pattern="^(mpn|manufacturer)$",
+        description="Limitar a 'mpn' o 'manufacturer'"
+    ),
     service: ComponentAggregatorService = Depends(get_aggregator_service)
 ):
     """
-    Obtiene detalles de un componente específico de un distribuidor
+    Autocompletado de números de parte y fabricantes
+    
+    Se resuelve en memoria a partir del catálogo de fabricantes y de los MPN
+    vistos en resultados anteriores, ordenado por popularidad. Pensado para
+    llamarse en cada pulsación de tecla en lugar de /components/search.
     
     Args:
-        distributor: Nombre del distribuidor (digikey, mouser, farnell)
-        part_number: Número de parte del distribuidor
-        locale_language: Código de idioma
-        locale_currency: Código de moneda
-        locale_site: Código de sitio
+        prefix: Prefijo tecleado (se ignoran mayúsculas y separadores)
+        limit: Número máximo de sugerencias
+        kind: Tipo de sugerencia o vacío para ambos
     
     Returns:
-        Detalles del componente en formato genérico
+        Sugerencias ordenadas por popularidad
         
     Example:
-        GET /components/digikey/296-6501-1-ND
+        GET /components/suggest?prefix=stm32f1&limit=5
+    """
+    if service.get_available_distributors() and service.suggester.should_request_catalog():
+        # La primera consulta dispara la carga del catálogo sin esperarla
+        asyncio.create_task(_load_catalog_quietly(service))
+    
+    return service.suggest(prefix=prefix, limit=limit, kind=kind)
+
+
+async def _load_catalog_quietly(service: ComponentAggregatorService):
+    # Trabajo interno: no se carga al consumidor que lo disparó
+    current_consumer.set(None)
+    try:
+        with priority_scope(PRIORITY_BACKGROUND):
+            await service.load_manufacturer_catalog()
+    except Exception as e:
+        logger.warning("Error loading manufacturer catalog: %s", e)
+
+
+@router.post("/parametric", response_model=ParametricSearchResponse)
+async def parametric_search(
+    request: ParametricSearchRequest,
+    service: ComponentAggregatorService = Depends(get_aggregator_service)
+):
+    """
+    Búsqueda paramétrica local sobre los componentes ya obtenidos de los distribuidores
+    
+    Los valores de los parámetros se normalizan a unidades SI, por lo que los
+    límites se pueden expresar como número (SI) o como texto con unidad.
+    Las condiciones se combinan con AND; un nombre que no existe exactamente
+    se compara como prefijo ("voltage" incluye "Voltage - Rated").
+    
+    Args:
+        request: Filtros paramétricos
+        - filters: Lista de condiciones {name, min, max, value}
+        - max_results: Número máximo de resultados (default: 50)
+        - offset: Offset para paginación (default: 0)
+    
+    Returns:
+        Componentes que cumplen todas las condiciones
+        
+    Example:
+        ```json
+        {
+            "filters": [
+                {"name": "Capacitance", "min": "90nF", "max": "110nF"},
+                {"name": "Voltage", "min": "25V"},
+                {"name": "Package", "value": "0603"}
+            ]
+        }
+        ```
     """
     try:
-        component = await service.get_component_details(
-            distributor=distributor,
-            part_number=part_number,
-            locale_language=locale_language,
-            locale_currency=locale_currency,
-            locale_site=locale_site
+        return service.parametric_search(
+            filters=request.filters,
+            max_results=request.max_results,
+            offset=request.offset
         )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid parametric filter: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error in parametric search: {str(e)}"
+        )
+
+
+@router.post("/bom/optimize", response_model=BomOptimizeResponse)
+async def optimize_bom(
+    request: BomOptimizeRequest,
+    http_request: Request,
+    settings: Settings = Depends(get_settings),
+    service: ComponentAggregatorService = Depends(get_aggregator_service)
+):
+    """
+    Elige la oferta de menor coste para cada línea de una BOM
+    
+    Para cada línea se consideran todos los distribuidores y, con
+    packaging_options, las opciones por cantidad y embalaje (cut tape,
+    bobina completa, Digi-Reel con su tarifa). Solo se eligen ofertas con
+    stock suficiente salvo allow_backorder; distributor_penalty añade un
+    coste fijo por distribuidor usado, de modo que compensa concentrar el
+    pedido cuando el ahorro es menor. Las opciones se cachean por parte,
+    cantidad y locale.
+    
+    Args:
+        request: BOM y opciones de optimización
+        - lines: Lista de {part_number, quantity, reference}
+        - distributors: Distribuidores a considerar o null para todos
+        - distributor_penalty: Coste fijo por distribuidor (default: 0)
+        - allow_backorder: Aceptar ofertas sin stock (default: false)
+        - packaging_options: Consultar opciones por cantidad y embalaje (default: true)
+        - locale_language, locale_currency, locale_site
+    
+    Returns:
+        Oferta elegida y estado de cada línea, coste total y distribuidores usados
         
-        if not component:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Component not found in {distributor}"
-            )
-        
-        return component
-    except HTTPException:
+    Example:
+        ```json
+        {
+            "lines": [
+                {"part_number": "STM32F103C8T6", "quantity": 250, "reference": "U1"},
+                {"part_number": "GRM188R71H104KA93D", "quantity": 5000}
+            ],
+            "distributor_penalty": 15
+        }
+        ```
+    """
+    if len(request.lines) > settings.bom_max_lines:
+        raise HTTPException(
+            status_code=400,
+            detail=f"BOM has {len(request.lines)} lines; the maximum is {settings.bom_max_lines}"
+        )
+    try:
+        return await cancel_on_disconnect(http_request, service.optimize_bom(
+            lines=request.lines,
+            distributors=request.distributors,
+            distributor_penalty=request.distributor_penalty,
+            allow_backorder=request.allow_backorder,
+            packaging_options=request.packaging_options,
+            locale_language=request.locale_language,
+            locale_currency=request.locale_currency,
+            locale_site=request.locale_site
+        ))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except QuotaExceededError:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error fetching component details: {str(e)}"
+            detail=f"Error optimizing BOM: {str(e)}"
         )
 
 
-@router.get("/compare/{manufacturer_part_number}", response_model=List[GenericComponent])
+@router.get(
+    "/compare/{manufacturer_part_number}",
+    response_model=Union[List[GenericComponent], SiteMatrixResponse]
+)
 async def compare_component_across_distributors(
+    http_request: Request,
     manufacturer_part_number: str,
     distributors: Optional[str] = Query(
         None,
@@ -212,6 +429,11 @@ async def compare_component_across_distributors(
     locale_language: str = Query("en", description="Código de idioma"),
     locale_currency: str = Query("USD", description="Código de moneda"),
     locale_site: str = Query("US", description="Código de sitio"),
+    locale_sites: Optional[str] = Query(
+        None,
+        description="Sitios a consultar a la vez, separados por coma (devuelve una matriz por sitio)"
+    ),
+    site_currency: bool = Query(True, description="Con locale_sites, precios en la moneda de cada sitio"),
     service: ComponentAggregatorService = Depends(get_aggregator_service)
 ):
     """
@@ -223,13 +445,17 @@ async def compare_component_across_distributors(
         locale_language: Código de idioma
         locale_currency: Código de moneda
         locale_site: Código de sitio
+        locale_sites: Sitios a consultar en paralelo (sustituye a locale_site)
+        site_currency: Usar la moneda local de cada sitio en vez de locale_currency
     
     Returns:
-        Lista de componentes del mismo fabricante en diferentes distribuidores
+        Lista de componentes del mismo fabricante en diferentes distribuidores,
+        o SiteMatrixResponse (distribuidor × sitio) si se indica locale_sites
         
     Example:
         GET /components/compare/STM32F103C8T6
         GET /components/compare/STM32F103C8T6?distributors=digikey,mouser
+        GET /components/compare/STM32F103C8T6?locale_sites=US,DE
     """
     try:
         # Parsear distribuidores
@@ -241,13 +467,30 @@ async def compare_component_across_distributors(
                 if d.strip()
             ]
         
-        components = await service.compare_component_across_distributors(
+        if locale_sites:
+            sites = parse_locale_sites(locale_sites)
+            matrix = await cancel_on_disconnect(http_request, service.compare_component_by_site(
+                manufacturer_part_number=manufacturer_part_number,
+                locale_sites=sites,
+                distributors=distributor_list,
+                locale_language=locale_language,
+                locale_currency=locale_currency,
+                use_site_currency=site_currency
+            ))
+            if not matrix.rows and not matrix.sites_failed:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Component {manufacturer_part_number} not found in any distributor"
+                )
+            return matrix
+        
+        components = await cancel_on_disconnect(http_request, service.compare_component_across_distributors(
             manufacturer_part_number=manufacturer_part_number,
             distributors=distributor_list,
             locale_language=locale_language,
             locale_currency=locale_currency,
             locale_site=locale_site
-        )
+        ))
         
         if not components:
             raise HTTPException(
@@ -258,13 +501,109 @@ async def compare_component_across_distributors(
         return components
     except HTTPException:
         raise
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except ValueError as e:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid distributor name: {str(e)}"
+            detail=f"Invalid query parameter: {str(e)}"
         )
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error comparing components: {str(e)}"
         )
+
+
+# Ruta comodín: debe declararse después de las de prefijo fijo (/compare/...),
+# o FastAPI las tomaría como distributor="compare"
+@router.get("/{distributor}/{part_number}", response_model=Union[GenericComponent, SiteMatrixResponse])
+async def get_component_details(
+    http_request: Request,
+    distributor: DistributorEnum,
+    part_number: str,
+    locale_language: str = Query("en", description="Código de idioma"),
+    locale_currency: str = Query("USD", description="Código de moneda"),
+    locale_site: str = Query("US", description="Código de sitio"),
+    locale_sites: Optional[str] = Query(
+        None,
+        description="Sitios a consultar a la vez, separados por coma (devuelve una matriz por sitio)"
+    ),
+    site_currency: bool = Query(True, description="Con locale_sites, precios en la moneda de cada sitio"),
+    service: ComponentAggregatorService = Depends(get_aggregator_service)
+):
+    """
+    Obtiene detalles de un componente específico de un distribuidor
+    
+    Args:
+        distributor: Nombre del distribuidor (digikey, mouser, farnell)
+        part_number: Número de parte del distribuidor
+        locale_language: Código de idioma
+        locale_currency: Código de moneda
+        locale_site: Código de sitio
+        locale_sites: Sitios a consultar en paralelo (sustituye a locale_site)
+        site_currency: Usar la moneda local de cada sitio en vez de locale_currency
+    
+    Returns:
+        Detalles del componente en formato genérico, o SiteMatrixResponse
+        con stock y precios por sitio si se indica locale_sites
+        
+    Example:
+        GET /components/digikey/296-6501-1-ND
+        GET /components/digikey/296-6501-1-ND?locale_sites=US,UK,DE,JP
+    """
+    try:
+        if locale_sites:
+            try:
+                sites = parse_locale_sites(locale_sites)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            matrix = await cancel_on_disconnect(http_request, service.get_component_details_by_site(
+                distributor=distributor,
+                part_number=part_number,
+                locale_sites=sites,
+                locale_language=locale_language,
+                locale_currency=locale_currency,
+                use_site_currency=site_currency
+            ))
+            if not matrix.rows and not matrix.sites_failed:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Component not found in {distributor.value}"
+                )
+            return matrix
+        
+        component = await cancel_on_disconnect(http_request, service.get_component_details(
+            distributor=distributor,
+            part_number=part_number,
+            locale_language=locale_language,
+            locale_currency=locale_currency,
+            locale_site=locale_site
+        ))
+        
+        if not component:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Component not found in {distributor.value}"
+            )
+        
+        return component
+    except HTTPException:
+        raise
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except UpstreamUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{distributor.value} is temporarily unavailable and no cached data exists",
+            headers={"Retry-After": str(max(int(e.retry_after), 1))}
+        )
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching component details: {str(e)}"
+        )
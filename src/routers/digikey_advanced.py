@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import Dict, Any
 from services.digikey_service import DigiKeyService
+from services.quota import QuotaExceededError
 from models.digikey import (
     DigiKeyManufacturersResponse,
     DigiKeyCategoriesResponse
@@ -45,6 +46,8 @@ async def get_manufacturers(
         )
     except HTTPException:
         raise
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -81,6 +84,8 @@ async def get_categories(
         )
     except HTTPException:
         raise
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -120,6 +125,8 @@ async def get_category_by_id(
         )
     except HTTPException:
         raise
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
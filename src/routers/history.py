@@ -0,0 +1,62 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends
+from models.base import DistributorEnum, PartHistoryResponse, ChangeFeedResponse
+from services.history import PriceHistoryStore, get_history_store, history_key
+from config import get_settings, Settings
+
+
+router = APIRouter(prefix="/history", tags=["History"])
+
+
+def get_history_dependency(settings: Settings = Depends(get_settings)) -> PriceHistoryStore:
+    """Dependencia para obtener el histórico de precio y stock del proceso"""
+    history = get_history_store(settings)
+    if history is None:
+        raise HTTPException(status_code=503, detail="Price history is disabled")
+    return history
+
+
+@router.get("/changes", response_model=ChangeFeedResponse)
+async def get_changes(
+    since: int = Query(0, ge=0, description="Cursor (next_cursor de la respuesta anterior)"),
+    limit: int = Query(500, ge=1, le=5000, description="Máximo de cambios"),
+    distributor: Optional[DistributorEnum] = Query(None, description="Solo cambios de este distribuidor"),
+    history: PriceHistoryStore = Depends(get_history_dependency)
+):
+    """
+    Cambios de precio y stock posteriores a un cursor
+
+    Solo incluye cambios reales (y la primera aparición de cada parte), para
+    sincronizarse de forma incremental sin volver a consultar todo. Si
+    reset_required es true se perdieron cambios desde el cursor y hay que
+    resincronizar por completo.
+
+    Example:
+        GET /history/changes?since=1200&limit=100
+    """
+    return history.changes(since, limit, distributor)
+
+
+@router.get("/{distributor}/{part_number}", response_model=PartHistoryResponse)
+async def get_part_history(
+    distributor: DistributorEnum,
+    part_number: str,
+    locale_currency: str = Query("USD", description="Moneda en la que el distribuidor dio los precios"),
+    since: Optional[int] = Query(None, ge=0, description="Desde (epoch en segundos)"),
+    until: Optional[int] = Query(None, ge=0, description="Hasta (epoch en segundos)"),
+    max_points: int = Query(200, ge=1, le=2000, description="Máximo de puntos (se reduce la serie si hay más)"),
+    history: PriceHistoryStore = Depends(get_history_dependency)
+):
+    """
+    Evolución del precio y el stock de una parte
+
+    Cada punto es un cambio; si hay más de max_points se agrupan por
+    intervalos de tiempo con el último valor, el mínimo y el máximo.
+
+    Example:
+        GET /history/digikey/296-6501-1-ND?since=1760000000&max_points=50
+    """
+    result = history.history(history_key(distributor, part_number, locale_currency), since, until, max_points)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No history for {part_number}")
+    return result
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from models.base import (
+    DistributorEnum,
+    WatchlistItem,
+    WatchlistAddRequest,
+    WatchlistResponse
+)
+from services.watchlist import Watchlist, WatchlistFullError, get_watchlist
+from config import get_settings, Settings
+
+
+router = APIRouter(prefix="/watchlist", tags=["Watchlist"])
+
+
+def get_watchlist_dependency(settings: Settings = Depends(get_settings)) -> Watchlist:
+    """Dependencia para obtener la lista de seguimiento del proceso"""
+    watchlist = get_watchlist(settings)
+    if watchlist is None:
+        raise HTTPException(status_code=503, detail="Watchlist is disabled")
+    return watchlist
+
+
+def _response(watchlist: Watchlist) -> WatchlistResponse:
+    entries = watchlist.entries()
+    return WatchlistResponse(entries=entries, total_count=len(entries), max_entries=watchlist.max_entries)
+
+
+@router.get("", response_model=WatchlistResponse)
+async def list_watchlist(watchlist: Watchlist = Depends(get_watchlist_dependency)):
+    """
+    Partes seguidas con el estado de su último refresco
+
+    Returns:
+        Entradas con antigüedad, volatilidad, último stock y precio, y errores
+    """
+    return _response(watchlist)
+
+
+@router.post("", response_model=WatchlistResponse)
+async def add_to_watchlist(
+    request: WatchlistAddRequest,
+    watchlist: Watchlist = Depends(get_watchlist_dependency)
+):
+    """
+    Añade partes a la lista de seguimiento
+
+    Sus detalles se refrescan en segundo plano antes de que caduquen en
+    cache, de modo que las lecturas de esas partes no esperan al
+    distribuidor. Las partes ya seguidas se ignoran.
+
+    Example:
+        POST /watchlist
+        {"items": [{"distributor": "digikey", "part_number": "296-6501-1-ND"}]}
+    """
+    try:
+        watchlist.add(request.items)
+    except WatchlistFullError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await watchlist.save_async()
+    return _response(watchlist)
+
+
+@router.delete("/{distributor}/{part_number}", status_code=204)
+async def remove_from_watchlist(
+    distributor: DistributorEnum,
+    part_number: str,
+    locale_language: str = Query("en", description="Código de idioma"),
+    locale_currency: str = Query("USD", description="Código de moneda"),
+    locale_site: str = Query("US", description="Código de sitio"),
+    watchlist: Watchlist = Depends(get_watchlist_dependency)
+):
+    """Deja de seguir una parte (en el locale indicado)"""
+    removed = watchlist.remove(WatchlistItem(
+        distributor=distributor,
+        part_number=part_number,
+        locale_language=locale_language,
+        locale_currency=locale_currency,
+        locale_site=locale_site
+    ))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"{part_number} is not in the watchlist")
+    await watchlist.save_async()
+    return Response(status_code=204)
@@ -0,0 +1,170 @@
+import asyncio
+import math
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Optional
+
+from services.metrics import get_metrics
+from config import Settings
+
+
+# Peso de cada nueva muestra en la media móvil de latencia
+_EWMA_ALPHA = 0.2
+# Factor de reducción del límite cuando el distribuidor se degrada
+_DECREASE_FACTOR = 0.75
+# Intervalo mínimo entre reducciones, para reaccionar una vez por episodio
+_DECREASE_COOLDOWN_SECONDS = 1.0
+
+
+class AdmissionController:
+    """
+    Control de admisión con límite de concurrencia adaptativo (AIMD).
+
+    Admite hasta `limit` peticiones simultáneas; las siguientes esperan en
+    una cola acotada como mucho queue_timeout segundos y, si la cola está
+    llena o vence la espera, se rechazan para responder 503 de inmediato en
+    lugar de acumular peticiones detrás del rate limit del distribuidor.
+
+    El límite crece en 1 por cada ventana de llamadas al distribuidor con
+    latencia por debajo del objetivo y se reduce multiplicativamente cuando
+    la latencia media lo supera o el distribuidor responde 429/5xx.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 32,
+        min_limit: int = 4,
+        max_limit: int = 128,
+        max_queue: int = 64,
+        queue_timeout: float = 2.0,
+        target_latency: float = 1.5
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = float("-inf")
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _capacity(self) -> int:
+        return int(self.limit) - self.in_flight
+
+    async def acquire(self) -> bool:
+        """
+        Reserva un hueco de ejecución, esperando en cola si hace falta
+
+        Returns:
+            True si la petición puede continuar (hay que llamar a release()),
+            False si debe rechazarse
+        """
+        if self._capacity() > 0 and not self._waiters:
+            self.in_flight += 1
+            self._report()
+            return True
+
+        metrics = get_metrics()
+        if self.queue_depth >= self.max_queue:
+            metrics.increment("admission_rejected_total", reason="queue_full")
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._report()
+        try:
+            # El hueco se transfiere en release(); in_flight ya lo cuenta
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            # El hueco pudo transferirse justo al vencer la espera: se devuelve
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            metrics.increment("admission_rejected_total", reason="timeout")
+            return False
+        except asyncio.CancelledError:
+            # Si ya se le había transferido un hueco, se devuelve
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            # Un waiter abandonado en la cola bloquearía la vía rápida de acquire()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._report()
+
+    def release(self):
+        """Libera el hueco de una petición admitida"""
+        self.in_flight -= 1
+        self._wake()
+        self._report()
+
+    def _wake(self):
+        while self._waiters and self._capacity() > 0:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def retry_after_seconds(self) -> int:
+        """Estimación del tiempo hasta que haya capacidad, para Retry-After"""
+        latency = self.latency_ewma or self.target_latency
+        backlog = (self.queue_depth + self.in_flight) / max(self.limit, 1.0)
+        return max(1, math.ceil(backlog * latency))
+
+    def record_upstream(self, latency: float, overloaded: bool = False):
+        """
+        Ajusta el límite con una observación de una llamada al distribuidor
+
+        Args:
+            latency: Duración de la llamada en segundos
+            overloaded: True si el distribuidor respondió 429 o 5xx
+        """
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += _EWMA_ALPHA * (latency - self.latency_ewma)
+
+        now = monotonic()
+        if overloaded or self.latency_ewma > self.target_latency:
+            if now - self._last_decrease >= _DECREASE_COOLDOWN_SECONDS:
+                self._last_decrease = now
+                self.limit = max(float(self.min_limit), self.limit * _DECREASE_FACTOR)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._wake()
+        self._report()
+
+    def _report(self):
+        metrics = get_metrics()
+        metrics.set_gauge("admission_limit", int(self.limit))
+        metrics.set_gauge("admission_in_flight", self.in_flight)
+        metrics.set_gauge("admission_queue_depth", self.queue_depth)
+
+
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def get_admission_controller(settings: Settings) -> Optional[AdmissionController]:
+    """Obtiene el control de admisión del proceso o None si está desactivado"""
+    if not settings.admission_enabled:
+        return None
+    controller = _controllers.get("default")
+    if controller is None:
+        controller = _controllers["default"] = AdmissionController(
+            initial_limit=settings.admission_initial_limit,
+            min_limit=settings.admission_min_limit,
+            max_limit=settings.admission_max_limit,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            target_latency=settings.admission_target_latency_ms / 1000
+        )
+    return controller
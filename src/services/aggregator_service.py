@@ -1,28 +1,117 @@
 import asyncio
-from typing import List, Optional, Dict, Any
-from time import time
+import logging
+import math
+import httpx
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple
+from time import time, monotonic
 from services.base_service import BaseDistributorService
 from services.digikey_service import DigiKeyService
+from services.cache import (
+    ComponentCache,
+    get_component_cache,
+    search_cache_key,
+    details_cache_key,
+    core_cache_key,
+    compare_cache_key,
+    offers_cache_key,
+    apply_locale,
+    distributor_key,
+    get_negative_cache
+)
+from services.parametric_index import ParametricIndex, get_parametric_index
+from services.text_index import FullTextIndex, get_text_index
+from services.history import PriceHistoryStore, get_history_store
+from services.suggest import PrefixSuggester, get_suggester
+from services.coalescing import get_coalescer
+from services.metrics import get_metrics
+from services.pricing import PriceTable
+from services.bom import optimize_bom, BOM_LINE_ERROR
+from services.fx import get_fx_rates, convert_components
+from services.locales import site_currency
+from services.compact import interned_memory_bytes
+from services.quota import QuotaExceededError, current_consumer
+from services.scheduler import upstream_priority, priority_scope, PRIORITY_BULK
+from services.query_log import (
+    get_query_logger,
+    QUERY_KIND_SEARCH,
+    QUERY_KIND_DETAILS,
+    QUERY_KIND_COMPARE,
+    CACHE_HIT,
+    CACHE_STALE,
+    CACHE_NEGATIVE,
+    CACHE_MISS,
+    CACHE_ERROR
+)
+from services.upstream_health import (
+    UpstreamUnavailableError,
+    get_upstream_backoff,
+    is_degradable_error
+)
 from models.base import (
     GenericComponent,
+    QuantityPrice,
     ComponentSearchResponse,
-    DistributorEnum
+    DistributorEnum,
+    SearchSourceEnum,
+    ParametricFilter,
+    ParametricSearchResponse,
+    SuggestResponse,
+    BomLine,
+    BomOffer,
+    BomLineResult,
+    BomOptimizeResponse,
+    SiteCell,
+    SiteMatrixRow,
+    SiteMatrixResponse
 )
 from config import Settings
 
 
+logger = logging.getLogger(__name__)
+
+# Popularidad que suma al autocompletado una consulta de detalle
+SELECTION_WEIGHT = 5.0
+
+
+def _error_status(error: BaseException) -> str:
+    """Código HTTP del distribuidor o nombre del error, para los logs"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return str(error.response.status_code)
+    return type(error).__name__
+
+
 class ComponentAggregatorService:
     """Servicio que agrega búsquedas de múltiples distribuidores"""
     
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        cache: Optional[ComponentCache] = None,
+        parametric_index: Optional[ParametricIndex] = None,
+        text_index: Optional[FullTextIndex] = None,
+        suggester: Optional[PrefixSuggester] = None,
+        history: Optional[PriceHistoryStore] = None
+    ):
         self.settings = settings
+        self.cache = cache or get_component_cache(settings)
+        self.backoff = get_upstream_backoff(settings)
+        self.negative_cache = get_negative_cache(settings)
+        self.parametric_index = parametric_index or get_parametric_index(settings)
+        self.text_index = text_index or get_text_index(settings)
+        self.suggester = suggester or get_suggester(settings)
+        self.history = history if history is not None else get_history_store(settings)
+        self.search_coalescer = get_coalescer("search")
+        self.details_coalescer = get_coalescer("details")
+        self.offers_coalescer = get_coalescer("offers")
+        self.query_logger = get_query_logger(settings)
+        self.fx_rates = get_fx_rates(settings)
         self._services: Dict[str, BaseDistributorService] = {}
         self._initialize_services()
     
     def _initialize_services(self):
         """Inicializa los servicios de distribuidores disponibles"""
         # DigiKey
-        if self.settings.digikey_client_id and self.settings.digikey_client_secret:
+        if DigiKeyService.is_configured(self.settings):
             self._services[DistributorEnum.DIGIKEY] = DigiKeyService(self.settings)
         
         # Aquí se pueden agregar más distribuidores
@@ -44,11 +133,17 @@ class ComponentAggregatorService:
         filters: Optional[Dict[str, Any]] = None,
         locale_language: str = "en",
         locale_currency: str = "USD",
-        locale_site: str = "US"
+        locale_site: str = "US",
+        quantity: Optional[int] = None
     ) -> ComponentSearchResponse:
         """
         Busca componentes en uno o múltiples distribuidores
         
+        Con la conversión local de moneda (fx_enabled) los distribuidores se
+        consultan en la moneda canónica, de modo que todas las monedas
+        comparten llamada y entrada de cache, y los precios se convierten
+        al devolverlos.
+        
         Args:
             keywords: Palabras clave de búsqueda
             distributors: Lista de distribuidores específicos o None para todos
@@ -58,10 +153,36 @@ class ComponentAggregatorService:
             locale_language: Código de idioma
             locale_currency: Código de moneda
             locale_site: Código de sitio
+            quantity: Cantidad para la que calcular price_at_qty de cada componente
             
         Returns:
             ComponentSearchResponse con componentes agregados
+            
+        Raises:
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
         """
+        rate = self._fx_rate(locale_currency)
+        if rate is not None:
+            response = await self.search_components(
+                keywords,
+                distributors=distributors,
+                max_results=max_results,
+                offset=offset,
+                filters=filters,
+                locale_language=locale_language,
+                locale_currency=self.settings.fx_canonical_currency,
+                locale_site=locale_site
+            )
+            components = convert_components(
+                response.components,
+                rate,
+                self.settings.fx_canonical_currency,
+                locale_currency
+            )
+            if quantity:
+                components = self.price_at_quantity(components, quantity)
+            return response.model_copy(update={"components": components})
+        
         start_time = time()
         
         # Determinar qué servicios usar
@@ -86,6 +207,7 @@ class ComponentAggregatorService:
         tasks = []
         for distributor_name, service in services_to_use.items():
             task = self._safe_search(
+                distributor_name,
                 service,
                 keywords,
                 max_results,
@@ -103,16 +225,34 @@ class ComponentAggregatorService:
         # Consolidar resultados
         all_components = []
         distributors_searched = []
+        distributors_failed = []
+        stale_distributors: Dict[str, float] = {}
         
         for (distributor_name, _), result in zip(tasks, results):
+            if isinstance(result, QuotaExceededError):
+                raise result
             if isinstance(result, Exception):
                 # Log error pero continuar con otros distribuidores
-                print(f"Error searching {distributor_name}: {str(result)}")
+                logger.warning(
+                    "Error searching %s: %s", distributor_key(distributor_name), result,
+                    extra={
+                        "distributor": distributor_key(distributor_name),
+                        "key": keywords,
+                        "status": type(result).__name__
+                    }
+                )
+                distributors_failed.append(distributor_key(distributor_name))
                 continue
             
             if result:
                 all_components.extend(result)
                 distributors_searched.append(distributor_name)
+                ages = [c.data_age_seconds or 0.0 for c in result if c.stale]
+                if ages:
+                    stale_distributors[distributor_key(distributor_name)] = max(ages)
+        
+        if quantity:
+            all_components = self.price_at_quantity(all_components, quantity)
         
         end_time = time()
         search_time_ms = (end_time - start_time) * 1000
@@ -121,11 +261,51 @@ class ComponentAggregatorService:
             components=all_components,
             total_count=len(all_components),
             distributors_searched=distributors_searched,
-            search_time_ms=search_time_ms
+            search_time_ms=search_time_ms,
+            distributors_failed=distributors_failed,
+            stale=bool(stale_distributors),
+            stale_distributors=stale_distributors
+        )
+    
+    def search_local(
+        self,
+        keywords: str,
+        max_results: int = 50,
+        offset: int = 0,
+        quantity: Optional[int] = None
+    ) -> ComponentSearchResponse:
+        """
+        Busca en el índice de texto local, sin llamar a los distribuidores
+        
+        Args:
+            keywords: Palabras clave de búsqueda
+            max_results: Número máximo de resultados
+            offset: Offset para paginación
+            quantity: Cantidad para la que calcular price_at_qty de cada componente
+            
+        Returns:
+            ComponentSearchResponse ordenada por relevancia (BM25)
+        """
+        start_time = time()
+        
+        components: List[GenericComponent] = []
+        total_count = 0
+        if self.text_index is not None:
+            components, total_count = self.text_index.search(keywords, max_results, offset)
+        if quantity:
+            components = self.price_at_quantity(components, quantity)
+        
+        return ComponentSearchResponse(
+            components=components,
+            total_count=total_count,
+            distributors_searched=sorted({distributor_key(c.distributor) for c in components}),
+            search_time_ms=(time() - start_time) * 1000,
+            source=SearchSourceEnum.LOCAL
         )
     
     async def _safe_search(
         self,
+        distributor_name: str,
         service: BaseDistributorService,
         keywords: str,
         max_results: int,
@@ -135,12 +315,133 @@ class ComponentAggregatorService:
         locale_currency: str,
         locale_site: str
     ) -> List[GenericComponent]:
-        """Ejecuta búsqueda en un servicio con manejo de errores"""
+        """
+        Ejecuta búsqueda en un servicio con cache y manejo de errores
+
+        Si el distribuidor falla (5xx, 429, timeout) o está en backoff, se
+        devuelve el último resultado cacheado dentro de cache_max_stale_seconds,
+        marcado como stale; sin copia en cache se lanza UpstreamUnavailableError.
+        Las búsquedas concurrentes con la misma clave comparten una sola
+        consulta al distribuidor.
+        """
+        name = distributor_key(distributor_name)
+        started = monotonic()
+        outcome = None
         try:
             if not await service.is_available():
                 return []
             
-            return await service.search_components(
+            cache_key = search_cache_key(
+                distributor_name,
+                keywords,
+                max_results,
+                offset,
+                filters,
+                locale_language,
+                locale_currency,
+                locale_site
+            )
+            outcome = CACHE_NEGATIVE
+            if self.negative_cache.contains(cache_key):
+                return []
+            
+            cached = await self.cache.get_search(cache_key, allow_stale=True)
+            outcome = CACHE_HIT
+            if cached is not None and not cached.stale:
+                return cached.components
+            
+            outcome = CACHE_STALE
+            if self.backoff.is_backing_off(name):
+                if cached is None:
+                    outcome = CACHE_ERROR
+                    raise UpstreamUnavailableError(name, self.backoff.remaining_seconds(name))
+                return cached.flagged_components()
+            
+            outcome = CACHE_ERROR
+            try:
+                components = await self.search_coalescer.run(
+                    cache_key,
+                    lambda: self._fetch_search(
+                        distributor_name,
+                        service,
+                        cache_key,
+                        keywords,
+                        max_results,
+                        offset,
+                        filters,
+                        locale_language,
+                        locale_currency,
+                        locale_site
+                    )
+                )
+            except Exception as e:
+                if not is_degradable_error(e):
+                    raise
+                if cached is None:
+                    raise UpstreamUnavailableError(name, self.backoff.remaining_seconds(name)) from e
+                logger.warning(
+                    "Serving stale results from %s: %s", name, e,
+                    extra={
+                        "distributor": name,
+                        "key": cache_key,
+                        "status": _error_status(e),
+                        "data_age_seconds": round(cached.age_seconds, 1)
+                    }
+                )
+                outcome = CACHE_STALE
+                return cached.flagged_components()
+            
+            outcome = CACHE_MISS
+            return components
+        except (UpstreamUnavailableError, QuotaExceededError):
+            raise
+        except Exception as e:
+            logger.error(
+                "Error searching %s: %s", name, e,
+                extra={
+                    "distributor": name,
+                    "key": keywords,
+                    "status": _error_status(e),
+                    "latency_ms": round((monotonic() - started) * 1000, 1)
+                }
+            )
+            return []
+        finally:
+            if outcome is not None:
+                self._log_query(
+                    QUERY_KIND_SEARCH,
+                    keywords,
+                    started,
+                    outcome,
+                    distributor=name,
+                    max_results=max_results,
+                    offset=offset,
+                    locale_language=locale_language,
+                    locale_currency=locale_currency,
+                    locale_site=locale_site
+                )
+    
+    async def _fetch_search(
+        self,
+        distributor_name: str,
+        service: BaseDistributorService,
+        cache_key: str,
+        keywords: str,
+        max_results: int,
+        offset: int,
+        filters: Optional[Dict[str, Any]],
+        locale_language: str,
+        locale_currency: str,
+        locale_site: str
+    ) -> List[GenericComponent]:
+        """
+        Consulta al distribuidor y puebla cache e índices; se ejecuta una sola
+        vez por clave aunque haya varios llamantes esperando
+        """
+        name = distributor_key(distributor_name)
+        started = monotonic()
+        try:
+            components = await service.search_components(
                 keywords=keywords,
                 max_results=max_results,
                 offset=offset,
@@ -150,8 +451,26 @@ class ComponentAggregatorService:
                 locale_site=locale_site
             )
         except Exception as e:
-            print(f"Error in {service.distributor_name}: {str(e)}")
-            return []
+            if is_degradable_error(e):
+                self.backoff.record_failure(name, e)
+            raise
+        
+        self.backoff.record_success(name)
+        if components:
+            await self.cache.set_search(cache_key, components, fetch_ms=(monotonic() - started) * 1000)
+            self._index_components(components)
+            self._record_history(components, locale_currency)
+            self._clear_negative_entries(
+                cache_key,
+                distributor_name,
+                components,
+                locale_language,
+                locale_currency,
+                locale_site
+            )
+        else:
+            self.negative_cache.add(cache_key)
+        return components
     
     async def get_component_details(
         self,
@@ -173,21 +492,266 @@ class ComponentAggregatorService:
             
         Returns:
             Componente o None si no se encuentra
+            
+        Raises:
+            UpstreamUnavailableError: Si el distribuidor falla y no hay copia en cache
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
         """
         service = self._services.get(distributor)
         if not service:
             return None
         
+        rate = self._fx_rate(locale_currency)
+        if rate is not None:
+            component = await self.get_component_details(
+                distributor,
+                part_number,
+                locale_language=locale_language,
+                locale_currency=self.settings.fx_canonical_currency,
+                locale_site=locale_site
+            )
+            if component is None:
+                return None
+            return convert_components(
+                [component],
+                rate,
+                self.settings.fx_canonical_currency,
+                locale_currency
+            )[0]
+        
+        name = distributor_key(distributor)
+        cache_key = details_cache_key(
+            distributor,
+            part_number,
+            locale_language,
+            locale_currency,
+            locale_site
+        )
+        core_key = core_cache_key(distributor, part_number) if self.settings.cache_locale_split else None
+        started = monotonic()
+        outcome = CACHE_NEGATIVE
+        
         try:
-            return await service.get_component_details(
-                part_number=part_number,
+            if self.negative_cache.contains(cache_key):
+                return None
+            
+            cached = await self.cache.get_details(cache_key, allow_stale=True, core_key=core_key)
+            outcome = CACHE_HIT
+            if cached is not None and not cached.stale:
+                return cached.components[0]
+            
+            outcome = CACHE_STALE
+            if self.backoff.is_backing_off(name):
+                if cached is None:
+                    outcome = CACHE_ERROR
+                    raise UpstreamUnavailableError(name, self.backoff.remaining_seconds(name))
+                return cached.flagged_components()[0]
+            
+            outcome = CACHE_ERROR
+            try:
+                component = await self.details_coalescer.run(
+                    cache_key,
+                    lambda: self._fetch_details(
+                        distributor,
+                        service,
+                        cache_key,
+                        core_key,
+                        part_number,
+                        locale_language,
+                        locale_currency,
+                        locale_site
+                    )
+                )
+            except Exception as e:
+                if not is_degradable_error(e):
+                    raise
+                if cached is None:
+                    raise UpstreamUnavailableError(name, self.backoff.remaining_seconds(name)) from e
+                logger.warning(
+                    "Serving stale details from %s: %s", name, e,
+                    extra={
+                        "distributor": name,
+                        "key": cache_key,
+                        "status": _error_status(e),
+                        "data_age_seconds": round(cached.age_seconds, 1)
+                    }
+                )
+                outcome = CACHE_STALE
+                return cached.flagged_components()[0]
+            
+            outcome = CACHE_MISS
+            if component:
+                # Consultar el detalle cuenta como una selección explícita
+                self.suggester.add_components([component], weight=SELECTION_WEIGHT)
+            return component
+        except (UpstreamUnavailableError, QuotaExceededError):
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                outcome = CACHE_MISS
+                self.negative_cache.add(cache_key)
+                return None
+            self._log_details_error(name, cache_key, started, e)
+            return None
+        except Exception as e:
+            self._log_details_error(name, cache_key, started, e)
+            return None
+        finally:
+            self._log_query(
+                QUERY_KIND_DETAILS,
+                part_number,
+                started,
+                outcome,
+                distributor=name,
                 locale_language=locale_language,
                 locale_currency=locale_currency,
                 locale_site=locale_site
             )
+    
+    async def refresh_component_details(
+        self,
+        distributor: DistributorEnum,
+        part_number: str,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        locale_site: str = "US"
+    ) -> Optional[GenericComponent]:
+        """
+        Vuelve a pedir el detalle al distribuidor y reescribe la cache
+        
+        No lee la cache ni la cache negativa: lo usa el refresco en segundo
+        plano para que las lecturas de partes seguidas siempre acierten. Con
+        el núcleo en cache solo se piden los datos del locale.
+        
+        Returns:
+            Componente actualizado o None si el distribuidor no está disponible
+            
+        Raises:
+            UpstreamUnavailableError: Si el distribuidor está en backoff
+            httpx.HTTPStatusError: Si el distribuidor responde con error (404 incluido)
+        """
+        service = self._services.get(distributor)
+        if not service:
+            return None
+        if self._fx_rate(locale_currency) is not None:
+            # Los detalles se cachean en la moneda canónica
+            locale_currency = self.settings.fx_canonical_currency
+        
+        name = distributor_key(distributor)
+        if self.backoff.is_backing_off(name):
+            raise UpstreamUnavailableError(name, self.backoff.remaining_seconds(name))
+        cache_key = details_cache_key(
+            distributor,
+            part_number,
+            locale_language,
+            locale_currency,
+            locale_site
+        )
+        core_key = core_cache_key(distributor, part_number) if self.settings.cache_locale_split else None
+        return await self.details_coalescer.run(
+            cache_key,
+            lambda: self._fetch_details(
+                distributor,
+                service,
+                cache_key,
+                core_key,
+                part_number,
+                locale_language,
+                locale_currency,
+                locale_site
+            )
+        )
+    
+    async def _fetch_details(
+        self,
+        distributor: DistributorEnum,
+        service: BaseDistributorService,
+        cache_key: str,
+        core_key: Optional[str],
+        part_number: str,
+        locale_language: str,
+        locale_currency: str,
+        locale_site: str
+    ) -> Optional[GenericComponent]:
+        """
+        Consulta el detalle al distribuidor (una vez por clave) y lo cachea
+        
+        Si la cache ya tiene el núcleo del componente (de otro locale), solo
+        se piden los datos del locale y solo se guarda su capa.
+        """
+        name = distributor_key(distributor)
+        started = monotonic()
+        try:
+            component = await self._fetch_locale_overlay(
+                service,
+                core_key,
+                part_number,
+                locale_language,
+                locale_currency,
+                locale_site
+            )
+            store_core = component is None
+            if component is None:
+                component = await service.get_component_details(
+                    part_number=part_number,
+                    locale_language=locale_language,
+                    locale_currency=locale_currency,
+                    locale_site=locale_site
+                )
         except Exception as e:
-            print(f"Error getting component details from {distributor}: {str(e)}")
+            if is_degradable_error(e):
+                self.backoff.record_failure(name, e)
+            raise
+        
+        self.backoff.record_success(name)
+        get_metrics().increment(
+            "details_fetch_total",
+            distributor=name,
+            kind="full" if store_core else "overlay"
+        )
+        if component:
+            await self.cache.set_details(
+                cache_key,
+                component,
+                core_key=core_key,
+                store_core=store_core,
+                fetch_ms=(monotonic() - started) * 1000
+            )
+            self._index_components([component])
+            self._record_history([component], locale_currency)
+            self.negative_cache.discard(cache_key)
+        return component
+    
+    async def _fetch_locale_overlay(
+        self,
+        service: BaseDistributorService,
+        core_key: Optional[str],
+        part_number: str,
+        locale_language: str,
+        locale_currency: str,
+        locale_site: str
+    ) -> Optional[GenericComponent]:
+        """Detalle a partir del núcleo cacheado y de los datos del locale, o None"""
+        if core_key is None:
+            return None
+        core = await self.cache.get_core(core_key)
+        if core is None:
+            return None
+        try:
+            overlay = await service.get_locale_overlay(
+                part_number=part_number,
+                locale_language=locale_language,
+                locale_currency=locale_currency,
+                locale_site=locale_site
+            )
+        except httpx.HTTPStatusError as e:
+            # Sin consulta reducida para esta parte: se pide el detalle completo
+            if is_degradable_error(e):
+                raise
             return None
+        if overlay is None:
+            return None
+        return apply_locale(core, overlay)
     
     async def compare_component_across_distributors(
         self,
@@ -210,6 +774,26 @@ class ComponentAggregatorService:
         Returns:
             Lista de componentes del mismo fabricante en diferentes distribuidores
         """
+        negative_key = compare_cache_key(
+            distributors,
+            manufacturer_part_number,
+            locale_language,
+            locale_currency,
+            locale_site
+        )
+        started = monotonic()
+        if self.negative_cache.contains(negative_key):
+            self._log_query(
+                QUERY_KIND_COMPARE,
+                manufacturer_part_number,
+                started,
+                CACHE_NEGATIVE,
+                locale_language=locale_language,
+                locale_currency=locale_currency,
+                locale_site=locale_site
+            )
+            return []
+        
         search_response = await self.search_components(
             keywords=manufacturer_part_number,
             distributors=distributors,
@@ -225,4 +809,629 @@ class ComponentAggregatorService:
             if comp.manufacturer_part_number.lower() == manufacturer_part_number.lower()
         ]
         
+        # Solo es "no encontrado" si ningún distribuidor falló ni sirvió datos antiguos
+        if (
+            not matching_components
+            and not search_response.stale
+            and not search_response.distributors_failed
+        ):
+            self.negative_cache.add(negative_key)
+        
+        self._log_query(
+            QUERY_KIND_COMPARE,
+            manufacturer_part_number,
+            started,
+            CACHE_STALE if search_response.stale else CACHE_MISS,
+            locale_language=locale_language,
+            locale_currency=locale_currency,
+            locale_site=locale_site
+        )
         return matching_components
+    
+    async def get_component_details_by_site(
+        self,
+        distributor: DistributorEnum,
+        part_number: str,
+        locale_sites: List[str],
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        use_site_currency: bool = True
+    ) -> SiteMatrixResponse:
+        """
+        Stock y precio de un componente en varios sitios del distribuidor
+        
+        Las consultas de cada sitio van en paralelo sobre el pool de
+        conexiones, el token y la cache compartidos; con la cache separada
+        por locale, cada sitio nuevo solo pide sus precios y stock.
+        
+        Args:
+            distributor: Distribuidor a consultar
+            part_number: Número de parte del distribuidor
+            locale_sites: Códigos de sitio (US, UK, DE, JP...)
+            locale_language: Código de idioma para todos los sitios
+            locale_currency: Moneda si use_site_currency es False o el sitio no se conoce
+            use_site_currency: Precios en la moneda local de cada sitio
+            
+        Returns:
+            SiteMatrixResponse con una fila por número de parte
+            
+        Raises:
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
+        """
+        async def fetch(site: str, currency: str) -> List[GenericComponent]:
+            component = await self.get_component_details(
+                distributor,
+                part_number,
+                locale_language=locale_language,
+                locale_currency=currency,
+                locale_site=site
+            )
+            return [component] if component else []
+        
+        return await self._site_matrix(part_number, locale_sites, locale_currency, use_site_currency, fetch)
+    
+    async def compare_component_by_site(
+        self,
+        manufacturer_part_number: str,
+        locale_sites: List[str],
+        distributors: Optional[List[DistributorEnum]] = None,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        use_site_currency: bool = True
+    ) -> SiteMatrixResponse:
+        """
+        Compara un MPN entre distribuidores y sitios en una sola petición
+        
+        Args:
+            manufacturer_part_number: Número de parte del fabricante
+            locale_sites: Códigos de sitio (US, UK, DE, JP...)
+            distributors: Lista de distribuidores o None para todos
+            locale_language: Código de idioma para todos los sitios
+            locale_currency: Moneda si use_site_currency es False o el sitio no se conoce
+            use_site_currency: Precios en la moneda local de cada sitio
+            
+        Returns:
+            SiteMatrixResponse con una fila por distribuidor y número de parte
+            
+        Raises:
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
+        """
+        async def fetch(site: str, currency: str) -> List[GenericComponent]:
+            return await self.compare_component_across_distributors(
+                manufacturer_part_number,
+                distributors=distributors,
+                locale_language=locale_language,
+                locale_currency=currency,
+                locale_site=site
+            )
+        
+        return await self._site_matrix(
+            manufacturer_part_number,
+            locale_sites,
+            locale_currency,
+            use_site_currency,
+            fetch
+        )
+    
+    async def _site_matrix(
+        self,
+        query: str,
+        locale_sites: List[str],
+        locale_currency: str,
+        use_site_currency: bool,
+        fetch: Callable[[str, str], Awaitable[List[GenericComponent]]]
+    ) -> SiteMatrixResponse:
+        """Ejecuta fetch(sitio, moneda) para todos los sitios a la vez y agrupa por número de parte"""
+        start_time = time()
+        currencies = {
+            site: site_currency(site, locale_currency) if use_site_currency else locale_currency
+            for site in locale_sites
+        }
+        results = await asyncio.gather(
+            *[fetch(site, currencies[site]) for site in locale_sites],
+            return_exceptions=True
+        )
+        
+        rows: Dict[Tuple[str, str], SiteMatrixRow] = {}
+        sites_failed: Dict[str, str] = {}
+        for site, result in zip(locale_sites, results):
+            if isinstance(result, QuotaExceededError):
+                raise result
+            if isinstance(result, Exception):
+                sites_failed[site] = _error_status(result)
+                continue
+            for component in result:
+                key = (distributor_key(component.distributor), component.distributor_part_number)
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = SiteMatrixRow(
+                        distributor=component.distributor,
+                        distributor_part_number=component.distributor_part_number,
+                        manufacturer=component.manufacturer,
+                        manufacturer_part_number=component.manufacturer_part_number
+                    )
+                row.sites[site] = SiteCell(
+                    quantity_available=component.quantity_available,
+                    minimum_order_quantity=component.minimum_order_quantity,
+                    unit_price=component.unit_price,
+                    price_breaks=[[pb.quantity, pb.unit_price] for pb in component.price_breaks],
+                    stale=component.stale
+                )
+        
+        return SiteMatrixResponse(
+            query=query,
+            sites=locale_sites,
+            currencies=currencies,
+            rows=list(rows.values()),
+            sites_failed=sites_failed,
+            fetch_time_ms=(time() - start_time) * 1000
+        )
+    
+    def price_at_quantity(
+        self,
+        components: List[GenericComponent],
+        quantity: int
+    ) -> List[GenericComponent]:
+        """
+        Calcula el precio de cada componente para quantity en una pasada
+        
+        Devuelve copias con price_at_qty: los componentes recibidos pueden
+        estar compartidos con la cache, los índices u otras peticiones.
+        
+        Args:
+            components: Componentes a valorar
+            quantity: Cantidad pedida (se aplican MOQ y múltiplo de pedido)
+            
+        Returns:
+            Copias de los componentes, en el mismo orden
+        """
+        if not components:
+            return components
+        ordered, unit, extended = PriceTable.from_components(components).price(quantity)
+        priced = []
+        for component, order_qty, unit_price, extended_price in zip(
+            components, ordered.tolist(), unit.tolist(), extended.tolist()
+        ):
+            has_price = not math.isnan(unit_price)
+            priced.append(component.model_copy(update={"price_at_qty": QuantityPrice(
+                requested_quantity=quantity,
+                order_quantity=order_qty,
+                unit_price=unit_price if has_price else None,
+                extended_price=extended_price if has_price else None
+            )}))
+        return priced
+    
+    async def get_purchase_options(
+        self,
+        distributor: DistributorEnum,
+        part_number: str,
+        quantity: int,
+        packaging_options: bool = True,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        locale_site: str = "US"
+    ) -> List[GenericComponent]:
+        """
+        Obtiene las opciones de compra de un componente para una cantidad
+        
+        Con packaging_options=False la única opción es el detalle del
+        componente (misma cache que get_component_details, válida para
+        cualquier cantidad); si no, se consultan las opciones por cantidad y
+        embalaje del distribuidor, cacheadas por (parte, cantidad, locale).
+        
+        Args:
+            distributor: Distribuidor a consultar
+            part_number: MPN o número de parte del distribuidor
+            quantity: Cantidad que se quiere comprar
+            packaging_options: Consultar opciones por cantidad y embalaje
+            locale_language: Código de idioma
+            locale_currency: Código de moneda
+            locale_site: Código de sitio
+            
+        Returns:
+            Opciones de compra, vacía si el componente no existe
+            
+        Raises:
+            UpstreamUnavailableError: Si el distribuidor falla y no hay copia en cache
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
+        """
+        service = self._services.get(distributor)
+        if not service:
+            return []
+        rate = self._fx_rate(locale_currency)
+        if rate is not None:
+            offers = await self.get_purchase_options(
+                distributor,
+                part_number,
+                quantity,
+                packaging_options=packaging_options,
+                locale_language=locale_language,
+                locale_currency=self.settings.fx_canonical_currency,
+                locale_site=locale_site
+            )
+            return convert_components(offers, rate, self.settings.fx_canonical_currency, locale_currency)
+        if not packaging_options:
+            component = await self.get_component_details(
+                distributor,
+                part_number,
+                locale_language=locale_language,
+                locale_currency=locale_currency,
+                locale_site=locale_site
+            )
+            return [component] if component else []
+        
+        name = distributor_key(distributor)
+        cache_key = offers_cache_key(
+            distributor,
+            part_number,
+            quantity,
+            locale_language,
+            locale_currency,
+            locale_site
+        )
+        if self.negative_cache.contains(cache_key):
+            return []
+        cached = await self.cache.get_offers(cache_key, allow_stale=True)
+        if cached is not None and not cached.stale:
+            return cached.components
+        if self.backoff.is_backing_off(name):
+            if cached is None:
+                raise UpstreamUnavailableError(name, self.backoff.remaining_seconds(name))
+            return cached.flagged_components()
+        
+        try:
+            return await self.offers_coalescer.run(
+                cache_key,
+                lambda: self._fetch_offers(
+                    distributor,
+                    service,
+                    cache_key,
+                    part_number,
+                    quantity,
+                    locale_language,
+                    locale_currency,
+                    locale_site
+                )
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                self.negative_cache.add(cache_key)
+                return []
+            if cached is None or not is_degradable_error(e):
+                raise
+            return cached.flagged_components()
+        except Exception as e:
+            if cached is None or not is_degradable_error(e):
+                raise
+            return cached.flagged_components()
+    
+    async def _fetch_offers(
+        self,
+        distributor: DistributorEnum,
+        service: BaseDistributorService,
+        cache_key: str,
+        part_number: str,
+        quantity: int,
+        locale_language: str,
+        locale_currency: str,
+        locale_site: str
+    ) -> List[GenericComponent]:
+        """Consulta las opciones de compra al distribuidor (una vez por clave) y las cachea"""
+        name = distributor_key(distributor)
+        started = monotonic()
+        try:
+            offers = await service.get_purchase_options(
+                part_number=part_number,
+                quantity=quantity,
+                locale_language=locale_language,
+                locale_currency=locale_currency,
+                locale_site=locale_site
+            )
+        except Exception as e:
+            if is_degradable_error(e):
+                self.backoff.record_failure(name, e)
+            raise
+        
+        self.backoff.record_success(name)
+        if offers:
+            await self.cache.set_offers(cache_key, offers, fetch_ms=(monotonic() - started) * 1000)
+            self.negative_cache.discard(cache_key)
+        else:
+            self.negative_cache.add(cache_key)
+        return offers
+    
+    async def optimize_bom(
+        self,
+        lines: List[BomLine],
+        distributors: Optional[List[DistributorEnum]] = None,
+        distributor_penalty: float = 0.0,
+        allow_backorder: bool = False,
+        packaging_options: bool = True,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        locale_site: str = "US"
+    ) -> BomOptimizeResponse:
+        """
+        Elige la oferta de menor coste para cada línea de una BOM
+        
+        Las opciones de compra se consultan en paralelo (como mucho
+        bom_fetch_concurrency a la vez, con prioridad bulk en la cuota del
+        distribuidor y una sola vez por parte y cantidad repetidas) y la
+        elección se resuelve en una pasada vectorizada (ver services.bom).
+        
+        Args:
+            lines: Líneas de la BOM
+            distributors: Distribuidores a considerar o None para todos
+            distributor_penalty: Coste fijo por distribuidor utilizado
+            allow_backorder: Aceptar ofertas sin stock suficiente
+            packaging_options: Consultar opciones por cantidad y embalaje
+            locale_language: Código de idioma
+            locale_currency: Código de moneda
+            locale_site: Código de sitio
+            
+        Returns:
+            BomOptimizeResponse con la oferta elegida por línea
+            
+        Raises:
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
+        """
+        start_time = time()
+        services_to_use = [
+            dist for dist in self._services
+            if not distributors or dist in distributors
+        ]
+        semaphore = asyncio.Semaphore(max(self.settings.bom_fetch_concurrency, 1))
+        
+        async def fetch(distributor: DistributorEnum, part_number: str, quantity: int):
+            async with semaphore:
+                return await self.get_purchase_options(
+                    distributor,
+                    part_number,
+                    quantity,
+                    packaging_options=packaging_options,
+                    locale_language=locale_language,
+                    locale_currency=locale_currency,
+                    locale_site=locale_site
+                )
+        
+        requests = list(dict.fromkeys(
+            (dist, line.part_number.strip(), line.quantity)
+            for line in lines
+            for dist in services_to_use
+        ))
+        with priority_scope(PRIORITY_BULK):
+            results = await asyncio.gather(
+                *[fetch(*request) for request in requests],
+                return_exceptions=True
+            )
+        fetched = dict(zip(requests, results))
+        
+        offers: List[List[GenericComponent]] = []
+        failed = set()
+        for index, line in enumerate(lines):
+            line_offers: List[GenericComponent] = []
+            for dist in services_to_use:
+                result = fetched[(dist, line.part_number.strip(), line.quantity)]
+                if isinstance(result, QuotaExceededError):
+                    raise result
+                if isinstance(result, Exception):
+                    failed.add(index)
+                    logger.warning(
+                        "Error fetching purchase options from %s: %s", distributor_key(dist), result,
+                        extra={
+                            "distributor": distributor_key(dist),
+                            "key": line.part_number,
+                            "status": _error_status(result)
+                        }
+                    )
+                    continue
+                line_offers.extend(result)
+            offers.append(line_offers)
+        
+        solution = optimize_bom(
+            [line.quantity for line in lines],
+            offers,
+            distributor_penalty=distributor_penalty,
+            allow_backorder=allow_backorder
+        )
+        
+        results_by_line = []
+        for index, line in enumerate(lines):
+            status = solution.statuses[index]
+            selected = None
+            if solution.selected[index] >= 0:
+                offer = offers[index][solution.selected[index]]
+                selected = BomOffer(
+                    distributor=offer.distributor,
+                    distributor_part_number=offer.distributor_part_number,
+                    manufacturer_part_number=offer.manufacturer_part_number,
+                    packaging=offer.packaging,
+                    order_quantity=int(solution.order_quantities[index]),
+                    unit_price=float(solution.unit_prices[index]),
+                    extended_price=float(solution.extended_prices[index]),
+                    quantity_available=offer.quantity_available
+                )
+            elif index in failed:
+                status = BOM_LINE_ERROR
+            results_by_line.append(BomLineResult(
+                part_number=line.part_number,
+                quantity=line.quantity,
+                reference=line.reference,
+                status=status,
+                selected=selected,
+                offers_considered=int(solution.offers_considered[index])
+            ))
+        
+        return BomOptimizeResponse(
+            lines=results_by_line,
+            parts_cost=round(solution.parts_cost, 2),
+            penalty_cost=round(solution.penalty_cost, 2),
+            total_cost=round(solution.total_cost, 2),
+            currency=locale_currency,
+            distributors_used=solution.distributors_used,
+            unresolved_lines=sum(1 for result in results_by_line if result.selected is None),
+            optimize_time_ms=(time() - start_time) * 1000
+        )
+    
+    def parametric_search(
+        self,
+        filters: List[ParametricFilter],
+        max_results: int = 50,
+        offset: int = 0
+    ) -> ParametricSearchResponse:
+        """
+        Búsqueda paramétrica local sobre los componentes ya vistos, sin
+        llamadas a los distribuidores
+        
+        Args:
+            filters: Condiciones por parámetro (rangos SI o texto)
+            max_results: Número máximo de resultados
+            offset: Offset para paginación
+            
+        Returns:
+            ParametricSearchResponse con los componentes que cumplen todas las condiciones
+        """
+        start_time = time()
+        
+        if self.parametric_index is None:
+            return ParametricSearchResponse(components=[], total_count=0, indexed_count=0)
+        
+        components, total_count = self.parametric_index.search(filters, max_results, offset)
+        
+        return ParametricSearchResponse(
+            components=components,
+            total_count=total_count,
+            indexed_count=len(self.parametric_index),
+            search_time_ms=(time() - start_time) * 1000
+        )
+    
+    def suggest(
+        self,
+        prefix: str,
+        limit: int = 10,
+        kind: Optional[str] = None
+    ) -> SuggestResponse:
+        """
+        Autocompletado de MPN y fabricantes desde memoria
+        
+        Args:
+            prefix: Texto tecleado
+            limit: Número máximo de sugerencias
+            kind: "mpn", "manufacturer" o None para ambos
+            
+        Returns:
+            SuggestResponse con las terminaciones más populares
+        """
+        start_time = time()
+        suggestions = self.suggester.suggest(prefix, limit, kind)
+        return SuggestResponse(
+            prefix=prefix,
+            suggestions=suggestions,
+            suggest_time_ms=(time() - start_time) * 1000
+        )
+    
+    async def load_manufacturer_catalog(self):
+        """Carga el catálogo de fabricantes de DigiKey en el autocompletado"""
+        service = self._services.get(DistributorEnum.DIGIKEY)
+        if not service or self.suggester.catalog_loaded:
+            return
+        catalog = await service.get_manufacturers()
+        self.suggester.add_manufacturers([m.name for m in catalog.manufacturers])
+    
+    async def load_category_catalog(self):
+        """Precarga el catálogo de categorías de DigiKey (queda cacheado en el servicio)"""
+        service = self._services.get(DistributorEnum.DIGIKEY)
+        if service:
+            await service.get_categories()
+    
+    def _fx_rate(self, locale_currency: str) -> Optional[float]:
+        """
+        Tipo de cambio desde la moneda canónica si locale_currency se convierte localmente
+        
+        None si la conversión está desactivada, la moneda ya es la canónica
+        o no hay tipo para ella (entonces se pide al distribuidor en esa moneda).
+        """
+        canonical = self.settings.fx_canonical_currency
+        if self.fx_rates is None or locale_currency.upper() == canonical.upper():
+            return None
+        return self.fx_rates.rate(canonical, locale_currency)
+    
+    def _log_details_error(self, distributor: str, cache_key: str, started: float, error: Exception):
+        logger.error(
+            "Error getting component details from %s: %s", distributor, error,
+            extra={
+                "distributor": distributor,
+                "key": cache_key,
+                "status": _error_status(error),
+                "latency_ms": round((monotonic() - started) * 1000, 1)
+            }
+        )
+    
+    def _log_query(self, kind: str, key: str, started: float, outcome: str, **fields):
+        """Envía la consulta al registro de consultas si está activo"""
+        if self.query_logger is None:
+            return
+        self.query_logger.record(
+            kind,
+            key,
+            (monotonic() - started) * 1000,
+            outcome,
+            consumer=current_consumer.get(),
+            priority=upstream_priority.get(),
+            **fields
+        )
+    
+    def _index_components(self, components: List[GenericComponent]):
+        """Incorpora componentes recién obtenidos del distribuidor a los índices locales"""
+        if self.parametric_index is not None:
+            self.parametric_index.add_components(components)
+        if self.text_index is not None:
+            self.text_index.add_components(components)
+        self.suggester.add_components(components)
+        self._report_index_memory()
+    
+    def _record_history(self, components: List[GenericComponent], currency: str):
+        """Anota en el histórico los cambios de precio y stock recién obtenidos del distribuidor"""
+        if self.history is not None:
+            self.history.record_components(components, currency)
+    
+    def _report_index_memory(self):
+        """Publica en /metrics la memoria de los índices locales y por parte indexada"""
+        metrics = get_metrics()
+        for name, index in (("parametric", self.parametric_index), ("text", self.text_index)):
+            if index is None or not len(index):
+                continue
+            in_memory = index.live_count if isinstance(index, FullTextIndex) else len(index)
+            metrics.set_gauge("index_parts", len(index), index=name)
+            metrics.set_gauge("index_memory_bytes", index.memory_bytes, index=name)
+            if in_memory:
+                metrics.set_gauge("index_bytes_per_part", round(index.memory_bytes / in_memory), index=name)
+        metrics.set_gauge("interned_strings_bytes", interned_memory_bytes())
+    
+    def _clear_negative_entries(
+        self,
+        search_key: str,
+        distributor_name: str,
+        components: List[GenericComponent],
+        locale_language: str,
+        locale_currency: str,
+        locale_site: str
+    ):
+        """Descarta entradas negativas que un resultado positivo contradice"""
+        self.negative_cache.discard(search_key)
+        for component in components:
+            self.negative_cache.discard(details_cache_key(
+                distributor_name,
+                component.distributor_part_number,
+                locale_language,
+                locale_currency,
+                locale_site
+            ))
+            for scope in (None, [distributor_name]):
+                self.negative_cache.discard(compare_cache_key(
+                    scope,
+                    component.manufacturer_part_number,
+                    locale_language,
+                    locale_currency,
+                    locale_site
+                ))
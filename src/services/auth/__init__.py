@@ -2,5 +2,19 @@
 Authentication services package
 """
 from .digikey_auth import DigiKeyAuthService
+from .token_store import (
+    TokenStore,
+    MemoryTokenStore,
+    FileTokenStore,
+    RedisTokenStore,
+    get_token_store
+)
 
-__all__ = ['DigiKeyAuthService']
+__all__ = [
+    'DigiKeyAuthService',
+    'TokenStore',
+    'MemoryTokenStore',
+    'FileTokenStore',
+    'RedisTokenStore',
+    'get_token_store'
+]
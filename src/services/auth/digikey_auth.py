@@ -1,50 +1,131 @@
 import httpx
+import os
+import uuid
 from typing import Optional
 from datetime import datetime, timedelta
 import asyncio
 
+from services.auth.token_store import TokenStore, MemoryTokenStore, StoredToken
+
+
+# Margen antes de la expiración en el que se intenta renovar el token
+REFRESH_MARGIN = timedelta(minutes=5)
+# Margen por debajo del cual el token ya no se usa aunque nadie lo haya renovado
+USABLE_MARGIN = timedelta(seconds=30)
+# Duración del lease de refresco y espera máxima de los workers no líderes
+REFRESH_LEASE_SECONDS = 30.0
+FOLLOWER_WAIT_SECONDS = 10.0
+FOLLOWER_POLL_SECONDS = 0.2
+
 
 class DigiKeyAuthService:
-    def __init__(self, client_id: str, client_secret: str, api_url: str):
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        api_url: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        token_store: Optional[TokenStore] = None
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
         self.api_url = api_url
         self.token_url = f"{api_url}/v1/oauth2/token"
+        self.transport = transport
+        self.token_store = token_store or MemoryTokenStore()
+        self._owner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
         self._access_token: Optional[str] = None
         self._token_expires_at: Optional[datetime] = None
         self._lock = asyncio.Lock()
 
     async def get_access_token(self) -> str:
+        """
+        Devuelve un token válido compartido con el resto de workers
+
+        Solo el worker que obtiene el lease del almacén renueva el token; los
+        demás siguen usando el token vigente o esperan a que se publique uno
+        nuevo, de modo que N workers cuestan un único refresco.
+        """
         async with self._lock:
-            if self._access_token and self._token_expires_at:
-                if datetime.now() < self._token_expires_at - timedelta(minutes=5):
-                    return self._access_token
+            if self.is_token_valid():
+                return self._access_token
 
-            await self._refresh_token()
+            await self._adopt_stored_token()
+            if self.is_token_valid():
+                return self._access_token
+
+            if await self.token_store.try_acquire_refresh(self._owner_id, REFRESH_LEASE_SECONDS):
+                try:
+                    # Otro worker pudo publicar el token mientras se obtenía el lease
+                    await self._adopt_stored_token()
+                    if not self.is_token_valid():
+                        await self._refresh_token()
+                        await self._publish_token()
+                finally:
+                    await self.token_store.release_refresh(self._owner_id)
+                return self._access_token
+
+            # Otro worker está renovando: seguir con el token actual si aún sirve
+            if self._is_token_usable():
+                return self._access_token
+
+            await self._wait_for_leader()
+            if not self._is_token_usable():
+                # El líder no ha publicado a tiempo; renovar por cuenta propia
+                await self._refresh_token()
+                await self._publish_token()
             return self._access_token
 
+    async def _adopt_stored_token(self):
+        stored = await self.token_store.read()
+        if stored is None:
+            return
+        expires_at = datetime.fromtimestamp(stored.expires_at)
+        if self._token_expires_at is None or expires_at > self._token_expires_at:
+            self._access_token = stored.access_token
+            self._token_expires_at = expires_at
+
+    async def _publish_token(self):
+        await self.token_store.write(StoredToken(
+            access_token=self._access_token,
+            expires_at=self._token_expires_at.timestamp()
+        ))
+
+    async def _wait_for_leader(self):
+        deadline = datetime.now() + timedelta(seconds=FOLLOWER_WAIT_SECONDS)
+        while datetime.now() < deadline:
+            await asyncio.sleep(FOLLOWER_POLL_SECONDS)
+            await self._adopt_stored_token()
+            if self._is_token_usable():
+                return
+
     async def _refresh_token(self):
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(transport=self.transport) as client:
             data = {
                 "client_id": self.client_id,
                 "client_secret": self.client_secret,
                 "grant_type": "client_credentials"
             }
-            
+
             response = await client.post(
                 self.token_url,
                 data=data,
                 headers={"Content-Type": "application/x-www-form-urlencoded"}
             )
-            
+
             response.raise_for_status()
             token_data = response.json()
-            
+
             self._access_token = token_data["access_token"]
             expires_in = token_data.get("expires_in", 3600)
             self._token_expires_at = datetime.now() + timedelta(seconds=expires_in)
 
+    def _is_token_usable(self) -> bool:
+        if not self._access_token or not self._token_expires_at:
+            return False
+        return datetime.now() < self._token_expires_at - USABLE_MARGIN
+
     def is_token_valid(self) -> bool:
         if not self._access_token or not self._token_expires_at:
             return False
-        return datetime.now() < self._token_expires_at - timedelta(minutes=5)
+        return datetime.now() < self._token_expires_at - REFRESH_MARGIN
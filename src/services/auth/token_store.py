@@ -0,0 +1,233 @@
+import asyncio
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from time import time
+from typing import Optional, Dict, Any
+
+from pydantic import BaseModel
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from config import Settings
+from services.redis_client import get_redis_client
+
+
+class StoredToken(BaseModel):
+    """Token OAuth publicado en el almacén compartido"""
+    access_token: str
+    expires_at: float  # epoch en segundos
+
+
+class TokenStore(ABC):
+    """
+    Interfaz para compartir el token OAuth entre procesos.
+
+    Un worker publica el token con write(); el resto lo leen con read(). Para
+    que solo un worker lo renueve, el que quiera refrescar debe obtener antes
+    el lease con try_acquire_refresh().
+    """
+
+    @abstractmethod
+    async def read(self) -> Optional[StoredToken]:
+        """Devuelve el último token publicado o None"""
+        pass
+
+    @abstractmethod
+    async def write(self, token: StoredToken):
+        """Publica un token nuevo"""
+        pass
+
+    @abstractmethod
+    async def try_acquire_refresh(self, owner: str, ttl_seconds: float) -> bool:
+        """
+        Intenta convertirse en el único worker que renueva el token
+
+        Args:
+            owner: Identificador único del worker
+            ttl_seconds: Duración del lease; caduca solo si el worker muere
+
+        Returns:
+            True si el lease se ha obtenido
+        """
+        pass
+
+    @abstractmethod
+    async def release_refresh(self, owner: str):
+        """Libera el lease si pertenece a owner"""
+        pass
+
+
+class MemoryTokenStore(TokenStore):
+    """Almacén dentro del proceso; comparte el token entre instancias del servicio"""
+
+    def __init__(self):
+        self._token: Optional[StoredToken] = None
+        self._lease_owner: Optional[str] = None
+        self._lease_expires_at = 0.0
+
+    async def read(self) -> Optional[StoredToken]:
+        return self._token
+
+    async def write(self, token: StoredToken):
+        self._token = token
+
+    async def try_acquire_refresh(self, owner: str, ttl_seconds: float) -> bool:
+        now = time()
+        if self._lease_owner and self._lease_owner != owner and now < self._lease_expires_at:
+            return False
+        self._lease_owner = owner
+        self._lease_expires_at = now + ttl_seconds
+        return True
+
+    async def release_refresh(self, owner: str):
+        if self._lease_owner == owner:
+            self._lease_owner = None
+            self._lease_expires_at = 0.0
+
+
+class FileTokenStore(TokenStore):
+    """
+    Almacén en un fichero compartido por los workers de un mismo host.
+
+    Cada operación toma un flock exclusivo sobre un fichero .lock auxiliar y
+    el contenido se reemplaza de forma atómica. Con la ruta en /dev/shm el
+    fichero vive en memoria compartida.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    def _locked(self, fn):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                return fn()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self, state: Dict[str, Any]):
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix=self.path.name)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    async def read(self) -> Optional[StoredToken]:
+        state = await asyncio.to_thread(self._locked, self._load)
+        if not state.get("access_token"):
+            return None
+        return StoredToken(access_token=state["access_token"], expires_at=state["expires_at"])
+
+    async def write(self, token: StoredToken):
+        def update():
+            state = self._load()
+            state.update(token.model_dump())
+            self._save(state)
+        await asyncio.to_thread(self._locked, update)
+
+    async def try_acquire_refresh(self, owner: str, ttl_seconds: float) -> bool:
+        def acquire() -> bool:
+            state = self._load()
+            now = time()
+            lease_owner = state.get("lease_owner")
+            if lease_owner and lease_owner != owner and now < state.get("lease_expires_at", 0):
+                return False
+            state["lease_owner"] = owner
+            state["lease_expires_at"] = now + ttl_seconds
+            self._save(state)
+            return True
+        return await asyncio.to_thread(self._locked, acquire)
+
+    async def release_refresh(self, owner: str):
+        def release():
+            state = self._load()
+            if state.get("lease_owner") == owner:
+                state.pop("lease_owner", None)
+                state.pop("lease_expires_at", None)
+                self._save(state)
+        await asyncio.to_thread(self._locked, release)
+
+
+class RedisTokenStore(TokenStore):
+    """
+    Almacén sobre Redis para despliegues con varios hosts.
+
+    El token se guarda con expiración igual a su vida útil y el lease de
+    refresco con SET NX PX, por lo que un líder caído libera el lease solo.
+    """
+
+    def __init__(self, client, namespace: str = "digikey:token"):
+        self.client = client
+        self.token_key = namespace
+        self.lease_key = f"{namespace}:refresh"
+
+    async def read(self) -> Optional[StoredToken]:
+        raw = await self.client.get(self.token_key)
+        if not raw:
+            return None
+        return StoredToken.model_validate_json(raw)
+
+    async def write(self, token: StoredToken):
+        ttl_ms = int((token.expires_at - time()) * 1000)
+        if ttl_ms <= 0:
+            return
+        await self.client.set(self.token_key, token.model_dump_json(), px=ttl_ms)
+
+    async def try_acquire_refresh(self, owner: str, ttl_seconds: float) -> bool:
+        acquired = await self.client.set(self.lease_key, owner, nx=True, px=int(ttl_seconds * 1000))
+        if acquired:
+            return True
+        current = await self.client.get(self.lease_key)
+        return current is not None and current.decode("utf-8") == owner
+
+    async def release_refresh(self, owner: str):
+        current = await self.client.get(self.lease_key)
+        if current is not None and current.decode("utf-8") == owner:
+            await self.client.delete(self.lease_key)
+
+
+_stores: Dict[tuple, TokenStore] = {}
+
+
+def get_token_store(settings: Settings) -> TokenStore:
+    """
+    Obtiene el almacén de token compartido según digikey_token_store
+
+    Returns:
+        Instancia única por proceso para la configuración dada
+    """
+    backend = settings.digikey_token_store.lower()
+    path = settings.digikey_token_store_path or os.path.join(
+        tempfile.gettempdir(), "digikey_token.json"
+    )
+    key = (backend, path, settings.redis_url)
+    store = _stores.get(key)
+    if store is not None:
+        return store
+
+    if backend == "memory":
+        store = MemoryTokenStore()
+    elif backend == "file":
+        store = FileTokenStore(path)
+    elif backend == "redis":
+        store = RedisTokenStore(get_redis_client(settings))
+    else:
+        raise ValueError(f"Invalid digikey_token_store: {settings.digikey_token_store}")
+
+    _stores[key] = store
+    return store
@@ -71,3 +71,63 @@ class BaseDistributorService(ABC):
             True si el servicio está configurado y disponible
         """
         pass
+    
+    async def get_purchase_options(
+        self,
+        part_number: str,
+        quantity: int,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        locale_site: str = "US"
+    ) -> List[GenericComponent]:
+        """
+        Obtiene las opciones de compra (embalajes, bobinas) de un componente
+        
+        Cada opción es un GenericComponent con sus propios tramos de precio,
+        MOQ, múltiplo de pedido y stock. Por defecto la única opción es el
+        propio componente; los distribuidores con precios por cantidad o
+        embalajes alternativos pueden sobrescribirlo.
+        
+        Args:
+            part_number: Número de parte del distribuidor o MPN
+            quantity: Cantidad que se quiere comprar
+            locale_language: Código de idioma
+            locale_currency: Código de moneda
+            locale_site: Código de sitio
+            
+        Returns:
+            Lista de opciones, vacía si el componente no existe
+        """
+        component = await self.get_component_details(
+            part_number=part_number,
+            locale_language=locale_language,
+            locale_currency=locale_currency,
+            locale_site=locale_site
+        )
+        return [component] if component else []
+    
+    async def get_locale_overlay(
+        self,
+        part_number: str,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        locale_site: str = "US"
+    ) -> Optional[GenericComponent]:
+        """
+        Obtiene solo los datos de un componente que dependen del locale
+        
+        Se usa cuando la cache ya tiene el núcleo común del componente (ver
+        ComponentCache): basta con descripción, precios, stock y URL del
+        sitio (LOCALE_FIELDS). Por defecto no hay consulta reducida y se
+        devuelve None, con lo que se pide el detalle completo.
+        
+        Args:
+            part_number: Número de parte del distribuidor
+            locale_language: Código de idioma
+            locale_currency: Código de moneda
+            locale_site: Código de sitio
+            
+        Returns:
+            Componente con los campos del locale o None si no se soporta
+        """
+        return None
@@ -0,0 +1,143 @@
+from itertools import combinations
+from typing import List, Dict, Sequence
+
+import numpy as np
+
+from models.base import GenericComponent
+from services.cache import distributor_key
+from services.pricing import PriceTable
+
+
+BOM_LINE_OK = "ok"
+BOM_LINE_NO_OFFERS = "no_offers"
+BOM_LINE_INSUFFICIENT_STOCK = "insufficient_stock"
+BOM_LINE_ERROR = "error"
+
+# Con más distribuidores no se prueban todos los subconjuntos (2^n)
+MAX_EXHAUSTIVE_DISTRIBUTORS = 10
+
+
+class BomSolution:
+    """Oferta elegida para cada línea y coste total del pedido"""
+
+    def __init__(self, lines: int):
+        self.selected = np.full(lines, -1, dtype=np.int64)
+        self.order_quantities = np.zeros(lines, dtype=np.int64)
+        self.unit_prices = np.full(lines, np.nan)
+        self.extended_prices = np.full(lines, np.nan)
+        self.statuses: List[str] = [BOM_LINE_NO_OFFERS] * lines
+        self.offers_considered = np.zeros(lines, dtype=np.int64)
+        self.distributors_used: List[str] = []
+        self.parts_cost = 0.0
+        self.penalty_cost = 0.0
+
+    @property
+    def total_cost(self) -> float:
+        return self.parts_cost + self.penalty_cost
+
+
+def _best_subset(costs: np.ndarray, penalty: float) -> np.ndarray:
+    """
+    Columnas (distribuidores) que minimizan el coste de piezas más penalty
+    por distribuidor usado, sin dejar sin cubrir ninguna línea que algún
+    distribuidor pueda servir.
+    """
+    distributors = costs.shape[1]
+    everything = np.ones(distributors, dtype=bool)
+    if penalty <= 0 or distributors <= 1 or distributors > MAX_EXHAUSTIVE_DISTRIBUTORS:
+        return everything
+
+    coverable = np.isfinite(costs).any(axis=1)
+    best_mask = everything
+    best_cost = np.inf
+    for size in range(1, distributors + 1):
+        for columns in combinations(range(distributors), size):
+            line_costs = costs[:, columns].min(axis=1)
+            if not np.isfinite(line_costs[coverable]).all():
+                continue
+            total = line_costs[coverable].sum() + penalty * size
+            if total < best_cost:
+                best_cost = total
+                best_mask = np.zeros(distributors, dtype=bool)
+                best_mask[list(columns)] = True
+    return best_mask
+
+
+def optimize_bom(
+    quantities: Sequence[int],
+    offers: Sequence[Sequence[GenericComponent]],
+    distributor_penalty: float = 0.0,
+    allow_backorder: bool = False
+) -> BomSolution:
+    """
+    Elige la oferta más barata de cada línea de una BOM
+
+    Todas las ofertas de todas las líneas se valoran en una única pasada
+    vectorizada (PriceTable) a la cantidad de su línea, aplicando MOQ y
+    múltiplo de pedido. Sin backorder, una oferta solo es válida si su
+    stock cubre la cantidad a pedir. Con distributor_penalty > 0 se busca
+    el subconjunto de distribuidores que minimiza piezas + penalización.
+
+    Args:
+        quantities: Cantidad requerida de cada línea
+        offers: Ofertas candidatas de cada línea (de cualquier distribuidor)
+        distributor_penalty: Coste fijo por cada distribuidor utilizado
+        allow_backorder: Aceptar ofertas sin stock suficiente
+
+    Returns:
+        BomSolution con la oferta elegida (índice dentro de offers[línea])
+    """
+    lines = len(quantities)
+    solution = BomSolution(lines)
+    counts = np.fromiter((len(line_offers) for line_offers in offers), dtype=np.int64, count=lines)
+    solution.offers_considered = counts
+    flat = [offer for line_offers in offers for offer in line_offers]
+    if not flat:
+        return solution
+
+    line_of = np.repeat(np.arange(lines, dtype=np.int64), counts)
+    first_offer = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    names: Dict[str, int] = {}
+    distributor_of = np.fromiter(
+        (names.setdefault(distributor_key(offer.distributor), len(names)) for offer in flat),
+        dtype=np.int64,
+        count=len(flat)
+    )
+    stock = np.fromiter((offer.quantity_available for offer in flat), dtype=np.int64, count=len(flat))
+
+    table = PriceTable.from_components(flat)
+    ordered, unit, extended = table.price(np.asarray(quantities, dtype=np.int64)[line_of], rows=np.arange(len(flat)))
+    priced = np.isfinite(extended)
+    feasible = priced if allow_backorder else priced & (stock >= ordered)
+    offer_costs = np.where(feasible, extended, np.inf)
+
+    # Mejor coste de cada distribuidor para cada línea
+    costs = np.full((lines, len(names)), np.inf)
+    np.minimum.at(costs, (line_of, distributor_of), offer_costs)
+    allowed = _best_subset(costs, distributor_penalty)
+
+    candidate_costs = np.where(allowed[distributor_of], offer_costs, np.inf)
+    order = np.lexsort((candidate_costs, line_of))
+    starts = np.searchsorted(line_of[order], np.arange(lines))
+    has_offers = counts > 0
+    best = np.full(lines, -1, dtype=np.int64)
+    best[has_offers] = order[starts[has_offers]]
+    chosen = has_offers.copy()
+    chosen[has_offers] = np.isfinite(candidate_costs[best[has_offers]])
+
+    rows = best[chosen]
+    solution.selected[chosen] = rows - first_offer[chosen]
+    solution.order_quantities[chosen] = ordered[rows]
+    solution.unit_prices[chosen] = unit[rows]
+    solution.extended_prices[chosen] = extended[rows]
+    for line in np.flatnonzero(has_offers & ~chosen):
+        solution.statuses[line] = BOM_LINE_INSUFFICIENT_STOCK
+    for line in np.flatnonzero(chosen):
+        solution.statuses[line] = BOM_LINE_OK
+
+    by_code = {code: name for name, code in names.items()}
+    used = np.unique(distributor_of[rows])
+    solution.distributors_used = [by_code[code] for code in used.tolist()]
+    solution.parts_cost = float(extended[rows].sum())
+    solution.penalty_cost = distributor_penalty * len(solution.distributors_used)
+    return solution
@@ -0,0 +1,55 @@
+"""
+Cache package for Electronics Parts API
+"""
+from .backends import (
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    TieredCacheBackend
+)
+from .serialization import (
+    dump_components,
+    load_components,
+    strip_locale,
+    apply_locale,
+    LOCALE_FIELDS
+)
+from .component_cache import (
+    CacheEntry,
+    ComponentCache,
+    get_component_cache,
+    search_cache_key,
+    details_cache_key,
+    core_cache_key,
+    compare_cache_key,
+    offers_cache_key,
+    catalog_cache_key,
+    cache_namespace,
+    distributor_key
+)
+from .negative import NegativeCache, get_negative_cache
+
+__all__ = [
+    'CacheBackend',
+    'MemoryCacheBackend',
+    'RedisCacheBackend',
+    'TieredCacheBackend',
+    'dump_components',
+    'load_components',
+    'strip_locale',
+    'apply_locale',
+    'LOCALE_FIELDS',
+    'CacheEntry',
+    'ComponentCache',
+    'get_component_cache',
+    'search_cache_key',
+    'details_cache_key',
+    'core_cache_key',
+    'compare_cache_key',
+    'offers_cache_key',
+    'catalog_cache_key',
+    'cache_namespace',
+    'distributor_key',
+    'NegativeCache',
+    'get_negative_cache'
+]
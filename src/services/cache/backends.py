@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from heapq import heappush, heappop, heapify
+from itertools import count
+from time import monotonic
+from typing import Optional, Tuple, Dict, List, Callable
+
+from services.metrics import get_metrics
+
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(ABC):
+    """Interfaz de almacenamiento clave/valor (bytes) con expiración"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Devuelve el valor o None si no existe o ha expirado"""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float, cost: Optional[float] = None):
+        """Guarda un valor con el TTL indicado; cost (ms para volver a obtenerlo) guía la expulsión"""
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Elimina la clave si existe"""
+        pass
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "cost", "hits", "priority", "namespace", "seq")
+
+    def __init__(self, value: bytes, expires_at: float, size: int, cost: float, hits: int, namespace: str):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.cost = cost
+        self.hits = hits
+        self.namespace = namespace
+        self.priority = 0.0
+        self.seq = 0
+
+
+# Memoria aproximada de cada entrada además de clave y valor (dict, _Entry, heap)
+_ENTRY_OVERHEAD = 200
+
+
+def _default_namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Cache en memoria del proceso acotada por bytes y por número de entradas.
+
+    La expulsión es GreedyDual-Size-Frequency: la prioridad de cada entrada
+    es L + aciertos * coste / tamaño, donde coste es lo que costó obtener el
+    valor (ms de la llamada al distribuidor) y L sube hasta la prioridad de
+    la última expulsada, de modo que lo que deja de consultarse envejece. Se
+    expulsa primero lo grande, barato de volver a pedir y poco consultado.
+
+    namespace_of(key) agrupa las claves en espacios (búsquedas, detalles,
+    catálogos...); namespace_budgets fija un máximo de bytes por espacio
+    además del global max_bytes. Un límite 0 desactiva esa cota.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 0,
+        namespace_budgets: Optional[Dict[str, int]] = None,
+        namespace_of: Optional[Callable[[str], str]] = None,
+        name: str = "memory"
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.namespace_budgets = {ns: budget for ns, budget in (namespace_budgets or {}).items() if budget > 0}
+        self.namespace_of = namespace_of or _default_namespace
+        self.name = name
+        self.total_bytes = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._heaps: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._bytes: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+        # Coste medio observado por espacio, para los set() sin coste
+        self._costs: Dict[str, Tuple[float, int]] = {}
+        self._inflation = 0.0
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def namespace_bytes(self, namespace: str) -> int:
+        return self._bytes.get(namespace, 0)
+
+    def _push(self, key: str, entry: _Entry):
+        entry.priority = self._inflation + entry.hits * entry.cost / entry.size
+        entry.seq = next(self._seq)
+        heap = self._heaps.setdefault(entry.namespace, [])
+        heappush(heap, (entry.priority, entry.seq, key))
+        # Cada acierto deja un elemento obsoleto en el heap: se reconstruye si crece demasiado
+        if len(heap) > 2 * self._counts.get(entry.namespace, 0) + 64:
+            live = [
+                (item.priority, item.seq, item_key)
+                for item_key, item in self._entries.items()
+                if item.namespace == entry.namespace
+            ]
+            heapify(live)
+            self._heaps[entry.namespace] = live
+
+    def clear(self):
+        """Descarta todas las entradas (conserva los costes observados)"""
+        self._entries.clear()
+        self._heaps.clear()
+        self._bytes.clear()
+        self._counts.clear()
+        self.total_bytes = 0
+        get_metrics().set_gauge("cache_bytes", 0, cache=self.name)
+
+    def _remove(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+            self._bytes[entry.namespace] -= entry.size
+            self._counts[entry.namespace] -= 1
+        return entry
+
+    def _head(self, namespace: str) -> Optional[Tuple[float, int, str]]:
+        """Elemento vivo de menor prioridad del espacio, descartando los obsoletos"""
+        heap = self._heaps.get(namespace)
+        while heap:
+            priority, seq, key = heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry.seq == seq:
+                return heap[0]
+            heappop(heap)
+        return None
+
+    def _evict(self, namespace: str) -> bool:
+        head = self._head(namespace)
+        if head is None:
+            return False
+        priority, _, key = heappop(self._heaps[namespace])
+        self._inflation = max(self._inflation, priority)
+        self._remove(key)
+        get_metrics().increment("cache_evictions_total", cache=self.name, namespace=namespace)
+        return True
+
+    def _evict_global(self) -> bool:
+        lowest = None
+        for namespace in self._heaps:
+            head = self._head(namespace)
+            if head is not None and (lowest is None or head < lowest[0]):
+                lowest = (head, namespace)
+        if lowest is None:
+            return False
+        return self._evict(lowest[1])
+
+    def _default_cost(self, namespace: str) -> float:
+        total, samples = self._costs.get(namespace, (0.0, 0))
+        return total / samples if samples else 1.0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if monotonic() >= entry.expires_at:
+            self._remove(key)
+            return None
+        entry.hits += 1
+        self._push(key, entry)
+        return entry.value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float, cost: Optional[float] = None):
+        namespace = self.namespace_of(key)
+        previous = self._remove(key)
+        size = len(value) + len(key) + _ENTRY_OVERHEAD
+        budget = self.namespace_budgets.get(namespace)
+        if (budget and size > budget) or (self.max_bytes and size > self.max_bytes):
+            return
+
+        if cost is None:
+            cost = self._default_cost(namespace)
+        else:
+            total, samples = self._costs.get(namespace, (0.0, 0))
+            self._costs[namespace] = (total + cost, samples + 1)
+        entry = _Entry(
+            value,
+            monotonic() + ttl_seconds,
+            size,
+            max(cost, 0.001),
+            previous.hits if previous is not None else 1,
+            namespace
+        )
+        self._entries[key] = entry
+        self.total_bytes += size
+        self._bytes[namespace] = self._bytes.get(namespace, 0) + size
+        self._counts[namespace] = self._counts.get(namespace, 0) + 1
+        self._push(key, entry)
+
+        while budget and self._bytes[namespace] > budget and self._evict(namespace):
+            pass
+        while (
+            (self.max_bytes and self.total_bytes > self.max_bytes)
+            or (self.max_entries and len(self._entries) > self.max_entries)
+        ) and self._evict_global():
+            pass
+
+        metrics = get_metrics()
+        metrics.set_gauge("cache_bytes", self.total_bytes, cache=self.name)
+        metrics.set_gauge("cache_namespace_bytes", self._bytes[namespace], cache=self.name, namespace=namespace)
+
+    async def delete(self, key: str):
+        self._remove(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache compartida entre réplicas sobre cualquier servidor que hable el
+    protocolo Redis (o InMemoryRedis en local)
+    """
+
+    def __init__(self, client, prefix: str = "parts:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float, cost: Optional[float] = None):
+        await self.client.set(self.prefix + key, value, px=max(int(ttl_seconds * 1000), 1))
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+
+class TieredCacheBackend(CacheBackend):
+    """
+    Cache de dos niveles: una L1 pequeña en el proceso delante de una L2
+    compartida.
+
+    Cada escritura o borrado en L2 se anuncia por pub/sub para que el resto
+    de réplicas descarten su copia en L1; el TTL corto de L1 acota la
+    desactualización si se pierde algún mensaje.
+
+    Si la suscripción cae se registra el error y se reintenta con espera
+    exponencial (retry_seconds hasta max_retry_seconds); al recuperarla se
+    vacía la L1, porque las invalidaciones publicadas entretanto se perdieron.
+    """
+
+    def __init__(
+        self,
+        l1: MemoryCacheBackend,
+        l2: CacheBackend,
+        client,
+        channel: str = "parts:cache:invalidate",
+        l1_ttl_seconds: float = 30.0,
+        retry_seconds: float = 0.5,
+        max_retry_seconds: float = 30.0
+    ):
+        self.l1 = l1
+        self.l2 = l2
+        self.client = client
+        self.channel = channel
+        self.l1_ttl_seconds = l1_ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.node_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        delay = self.retry_seconds
+        failed = False
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                if failed:
+                    # Las invalidaciones publicadas sin suscripción se han perdido
+                    self.l1.clear()
+                    failed = False
+                async for message in pubsub.listen():
+                    delay = self.retry_seconds
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    origin, _, key = data.partition(" ")
+                    if origin != self.node_id:
+                        await self.l1.delete(key)
+                # listen() no termina salvo que se cierre la conexión
+                raise ConnectionError("pub/sub subscription closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed = True
+                logger.warning(
+                    "Cache invalidation listener failed, retrying in %.1fs: %s", delay, e,
+                    extra={"key": self.channel, "status": type(e).__name__}
+                )
+                get_metrics().increment("cache_invalidation_errors_total", cache=self.l1.name)
+            finally:
+                # reset() existe en redis.asyncio desde 4.2 (aclose() solo desde 5.0.1)
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_seconds)
+
+    async def _announce(self, key: str):
+        await self.client.publish(self.channel, f"{self.node_id} {key}")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        self._ensure_listener()
+        value = await self.l1.get(key)
+        if value is not None:
+            return value
+        value = await self.l2.get(key)
+        if value is not None:
+            await self.l1.set(key, value, self.l1_ttl_seconds)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float, cost: Optional[float] = None):
+        self._ensure_listener()
+        await self.l2.set(key, value, ttl_seconds, cost)
+        await self.l1.set(key, value, min(ttl_seconds, self.l1_ttl_seconds), cost)
+        await self._announce(key)
+
+    async def delete(self, key: str):
+        self._ensure_listener()
+        await self.l2.delete(key)
+        await self.l1.delete(key)
+        await self._announce(key)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
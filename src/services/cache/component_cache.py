@@ -0,0 +1,354 @@
+import hashlib
+import json
+import struct
+from time import time
+from typing import Optional, List, Dict, Any, Callable
+
+from models.base import GenericComponent
+from services.cache.backends import (
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    TieredCacheBackend
+)
+from services.cache.serialization import (
+    dump_components,
+    load_components,
+    strip_locale,
+    dump_overlay,
+    load_overlay
+)
+from services.redis_client import get_redis_client
+from config import Settings
+
+
+def distributor_key(distributor: Any) -> str:
+    """Nombre normalizado de un distribuidor (acepta DistributorEnum o str)"""
+    return str(getattr(distributor, "value", distributor)).lower()
+
+
+def search_cache_key(
+    distributor: Any,
+    keywords: str,
+    max_results: int,
+    offset: int,
+    filters: Optional[Dict[str, Any]],
+    locale_language: str,
+    locale_currency: str,
+    locale_site: str
+) -> str:
+    """Clave de cache para una búsqueda en un distribuidor"""
+    query = json.dumps(
+        [keywords.strip().lower(), max_results, offset, filters or {}],
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    return (
+        f"search:{distributor_key(distributor)}:"
+        f"{locale_language}:{locale_currency}:{locale_site}:{digest}"
+    )
+
+
+def details_cache_key(
+    distributor: Any,
+    part_number: str,
+    locale_language: str,
+    locale_currency: str,
+    locale_site: str
+) -> str:
+    """Clave de cache para los detalles de un componente"""
+    return (
+        f"details:{distributor_key(distributor)}:"
+        f"{locale_language}:{locale_currency}:{locale_site}:{part_number.strip()}"
+    )
+
+
+def compare_cache_key(
+    distributors: Optional[List[Any]],
+    manufacturer_part_number: str,
+    locale_language: str,
+    locale_currency: str,
+    locale_site: str
+) -> str:
+    """Clave de una comparación por MPN entre distribuidores"""
+    scope = ",".join(sorted(distributor_key(d) for d in distributors)) if distributors else "*"
+    return (
+        f"compare:{scope}:{locale_language}:{locale_currency}:{locale_site}:"
+        f"{manufacturer_part_number.strip().lower()}"
+    )
+
+
+def core_cache_key(distributor: Any, part_number: str) -> str:
+    """Clave del núcleo de un componente, común a todos los locales"""
+    return f"core:{distributor_key(distributor)}:{part_number.strip()}"
+
+
+def offers_cache_key(
+    distributor: Any,
+    part_number: str,
+    quantity: int,
+    locale_language: str,
+    locale_currency: str,
+    locale_site: str
+) -> str:
+    """Clave de las opciones de compra de un componente para una cantidad"""
+    return (
+        f"offers:{distributor_key(distributor)}:"
+        f"{locale_language}:{locale_currency}:{locale_site}:{quantity}:{part_number.strip()}"
+    )
+
+
+def catalog_cache_key(distributor: Any, kind: str, locale_language: str, locale_site: str) -> str:
+    """Clave de un catálogo del distribuidor (fabricantes, categorías...)"""
+    return f"catalog:{distributor_key(distributor)}:{kind}:{locale_language}:{locale_site}"
+
+
+# Espacio de cada prefijo de clave, con su propio presupuesto de memoria
+CACHE_NAMESPACE_SEARCH = "search"
+CACHE_NAMESPACE_DETAILS = "details"
+CACHE_NAMESPACE_CATALOG = "catalog"
+_KEY_NAMESPACES = {
+    "search": CACHE_NAMESPACE_SEARCH,
+    "compare": CACHE_NAMESPACE_SEARCH,
+    "details": CACHE_NAMESPACE_DETAILS,
+    "core": CACHE_NAMESPACE_DETAILS,
+    "offers": CACHE_NAMESPACE_DETAILS,
+    "catalog": CACHE_NAMESPACE_CATALOG,
+}
+
+
+def cache_namespace(key: str) -> str:
+    """Espacio de memoria (search, details, catalog) al que pertenece una clave"""
+    prefix = key.split(":", 1)[0]
+    return _KEY_NAMESPACES.get(prefix, prefix)
+
+
+# Marca de tiempo de escritura que precede a cada entrada
+_STORED_AT = struct.Struct("<d")
+
+
+class CacheEntry:
+    """Componentes leídos de la cache junto con su antigüedad"""
+
+    __slots__ = ("components", "stored_at", "stale")
+
+    def __init__(self, components: List[GenericComponent], stored_at: float, stale: bool):
+        self.components = components
+        self.stored_at = stored_at
+        self.stale = stale
+
+    @property
+    def age_seconds(self) -> float:
+        return max(time() - self.stored_at, 0.0)
+
+    def flagged_components(self) -> List[GenericComponent]:
+        """Componentes marcados como desactualizados si la entrada es stale"""
+        if not self.stale:
+            return self.components
+        age = round(self.age_seconds, 1)
+        return [
+            c.model_copy(update={"stale": True, "data_age_seconds": age})
+            for c in self.components
+        ]
+
+
+class ComponentCache:
+    """
+    Cache de resultados de búsqueda y detalles de componentes.
+
+    Los componentes se guardan serializados en formato binario compacto
+    sobre un CacheBackend intercambiable (memoria, Redis o dos niveles).
+    Las entradas se conservan max_stale_seconds más allá de su TTL para
+    poder servirlas, marcadas como stale, si el distribuidor falla.
+
+    Los detalles pueden guardarse separados por locale (core_key): un
+    núcleo común a todos los idiomas, monedas y sitios, con vigencia
+    core_ttl_seconds, y una capa pequeña por locale con descripción,
+    precios y stock bajo la clave de detalles.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        search_ttl_seconds: float = 300,
+        details_ttl_seconds: float = 900,
+        max_stale_seconds: float = 0,
+        core_ttl_seconds: float = 86400
+    ):
+        self.backend = backend
+        self.search_ttl_seconds = search_ttl_seconds
+        self.details_ttl_seconds = details_ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.core_ttl_seconds = core_ttl_seconds
+
+    async def _get_entry(
+        self,
+        key: str,
+        ttl_seconds: float,
+        allow_stale: bool,
+        decode: Callable[[bytes], List[GenericComponent]] = load_components
+    ) -> Optional[CacheEntry]:
+        data = await self.backend.get(key)
+        if data is None:
+            return None
+        try:
+            (stored_at,) = _STORED_AT.unpack_from(data)
+            components = decode(data[_STORED_AT.size:])
+        except (ValueError, struct.error):
+            # Entrada escrita con otro formato: se trata como fallo de cache
+            await self.backend.delete(key)
+            return None
+
+        stale = time() - stored_at > ttl_seconds
+        if stale and not allow_stale:
+            return None
+        return CacheEntry(components, stored_at, stale)
+
+    async def _set_entry(
+        self,
+        key: str,
+        components: List[GenericComponent],
+        ttl_seconds: float,
+        fetch_ms: Optional[float] = None
+    ):
+        data = _STORED_AT.pack(time()) + dump_components(components)
+        await self.backend.set(key, data, ttl_seconds + self.max_stale_seconds, fetch_ms)
+
+    async def get_search(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        return await self._get_entry(key, self.search_ttl_seconds, allow_stale)
+
+    async def set_search(self, key: str, components: List[GenericComponent], fetch_ms: Optional[float] = None):
+        await self._set_entry(key, components, self.search_ttl_seconds, fetch_ms)
+
+    async def get_details(
+        self,
+        key: str,
+        allow_stale: bool = False,
+        core_key: Optional[str] = None
+    ) -> Optional[CacheEntry]:
+        """
+        Lee el detalle de un componente
+
+        Con core_key el detalle se compone del núcleo y de la capa del
+        locale guardada en key; la frescura es la de la capa (precios y
+        stock). Sin núcleo no hay acierto aunque exista la capa.
+        """
+        if core_key is None:
+            entry = await self._get_entry(key, self.details_ttl_seconds, allow_stale)
+        else:
+            core = await self.get_core(core_key, allow_stale=True)
+            if core is None:
+                return None
+            entry = await self._get_entry(
+                key,
+                self.details_ttl_seconds,
+                allow_stale,
+                decode=lambda data: [load_overlay(core, data)]
+            )
+        if entry is None or not entry.components:
+            return None
+        return entry
+
+    async def set_details(
+        self,
+        key: str,
+        component: GenericComponent,
+        core_key: Optional[str] = None,
+        store_core: bool = True,
+        fetch_ms: Optional[float] = None
+    ):
+        """
+        Guarda el detalle de un componente
+
+        Con core_key se guarda la capa del locale en key y, si store_core,
+        el núcleo común en core_key. fetch_ms (lo que costó obtenerlo) pesa
+        en la expulsión de la cache en memoria.
+        """
+        if core_key is None:
+            await self._set_entry(key, [component], self.details_ttl_seconds, fetch_ms)
+            return
+        if store_core:
+            await self._set_entry(core_key, [strip_locale(component)], self.core_ttl_seconds, fetch_ms)
+        data = _STORED_AT.pack(time()) + dump_overlay(component)
+        await self.backend.set(key, data, self.details_ttl_seconds + self.max_stale_seconds, fetch_ms)
+
+    async def get_core(self, core_key: str, allow_stale: bool = False) -> Optional[GenericComponent]:
+        """Núcleo común de un componente o None si no está (o caducó y no allow_stale)"""
+        entry = await self._get_entry(core_key, self.core_ttl_seconds, allow_stale)
+        if entry is None or not entry.components:
+            return None
+        return entry.components[0]
+
+    async def get_offers(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        return await self._get_entry(key, self.details_ttl_seconds, allow_stale)
+
+    async def set_offers(self, key: str, components: List[GenericComponent], fetch_ms: Optional[float] = None):
+        await self._set_entry(key, components, self.details_ttl_seconds, fetch_ms)
+
+    async def get_catalog(self, key: str) -> Optional[bytes]:
+        """Catálogo serializado o None si no está o caducó"""
+        return await self.backend.get(key)
+
+    async def set_catalog(self, key: str, data: bytes, ttl_seconds: float, fetch_ms: Optional[float] = None):
+        await self.backend.set(key, data, ttl_seconds, fetch_ms)
+
+    async def delete(self, key: str):
+        await self.backend.delete(key)
+
+
+def build_cache_backend(settings: Settings) -> CacheBackend:
+    """
+    Construye el backend configurado en cache_backend
+
+    - "memory": en el proceso, acotada por bytes (global y por espacio)
+    - "redis": compartido en Redis (redis_url)
+    - "tiered": L1 en el proceso + L2 en Redis con invalidación por pub/sub
+    """
+    backend = settings.cache_backend.lower()
+    if backend == "memory":
+        return MemoryCacheBackend(
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+            namespace_budgets={
+                CACHE_NAMESPACE_SEARCH: settings.cache_search_max_bytes,
+                CACHE_NAMESPACE_DETAILS: settings.cache_details_max_bytes,
+                CACHE_NAMESPACE_CATALOG: settings.cache_catalog_max_bytes,
+            },
+            namespace_of=cache_namespace
+        )
+    if backend == "redis":
+        return RedisCacheBackend(get_redis_client(settings))
+    if backend == "tiered":
+        client = get_redis_client(settings)
+        return TieredCacheBackend(
+            l1=MemoryCacheBackend(
+                max_entries=settings.cache_l1_max_entries,
+                max_bytes=settings.cache_l1_max_bytes,
+                namespace_of=cache_namespace,
+                name="l1"
+            ),
+            l2=RedisCacheBackend(client),
+            client=client,
+            l1_ttl_seconds=settings.cache_l1_ttl_seconds
+        )
+    raise ValueError(f"Invalid cache_backend: {settings.cache_backend}")
+
+
+_caches: Dict[tuple, ComponentCache] = {}
+
+
+def get_component_cache(settings: Settings) -> ComponentCache:
+    """Obtiene la cache de componentes compartida por el proceso"""
+    key = (settings.cache_backend, settings.redis_url)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = ComponentCache(
+            build_cache_backend(settings),
+            search_ttl_seconds=settings.cache_search_ttl_seconds,
+            details_ttl_seconds=settings.cache_details_ttl_seconds,
+            max_stale_seconds=settings.cache_max_stale_seconds,
+            core_ttl_seconds=settings.cache_core_ttl_seconds
+        )
+        _caches[key] = cache
+    return cache
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict
+
+from config import Settings
+
+
+class NegativeCache:
+    """
+    Cache acotada de claves que el distribuidor no encontró (404 o búsqueda
+    vacía).
+
+    Las entradas viven poco (ttl_seconds) y se descartan en cuanto se
+    observa un resultado positivo para la misma clave. Usa las mismas claves
+    que ComponentCache, por lo que ya incluyen distribuidor y locale.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 120):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, key: str) -> bool:
+        """True si la clave se registró como no encontrada y no ha expirado"""
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if monotonic() >= expires_at:
+            del self._entries[key]
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, key: str):
+        self._entries[key] = monotonic() + self.ttl_seconds
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+
+_negative_caches: Dict[tuple, NegativeCache] = {}
+
+
+def get_negative_cache(settings: Settings) -> NegativeCache:
+    """Obtiene la cache negativa compartida por el proceso"""
+    key = (settings.negative_cache_max_entries, settings.negative_cache_ttl_seconds)
+    cache = _negative_caches.get(key)
+    if cache is None:
+        cache = NegativeCache(
+            max_entries=settings.negative_cache_max_entries,
+            ttl_seconds=settings.negative_cache_ttl_seconds
+        )
+        _negative_caches[key] = cache
+    return cache
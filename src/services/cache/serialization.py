@@ -0,0 +1,154 @@
+import json
+import zlib
+from typing import List, Any
+
+from models.base import GenericComponent, PriceBreak, ComponentParameter
+
+
+# Cabecera del formato: magic + versión
+_MAGIC = b"GC"
+_VERSION = 3
+
+# Orden posicional de los campos; nunca reordenar sin subir _VERSION
+_FIELDS = (
+    "distributor",
+    "distributor_part_number",
+    "manufacturer",
+    "manufacturer_part_number",
+    "description",
+    "detailed_description",
+    "quantity_available",
+    "minimum_order_quantity",
+    "unit_price",
+    "price_breaks",
+    "datasheet_url",
+    "product_url",
+    "image_url",
+    "parameters",
+    "packaging",
+    "series",
+    "product_status",
+    "rohs_status",
+    "lifecycle_status",
+    "raw_data",
+    "order_multiple",
+)
+
+
+def _component_to_row(component: GenericComponent) -> List[Any]:
+    row = []
+    for field in _FIELDS:
+        value = getattr(component, field)
+        if field == "price_breaks":
+            value = [[pb.quantity, pb.unit_price, pb.total_price] for pb in value]
+        elif field == "parameters":
+            value = [[p.name, p.value, p.unit, p.numeric_value] for p in value]
+        row.append(value)
+    return row
+
+
+def _row_to_component(row: List[Any]) -> GenericComponent:
+    data = dict(zip(_FIELDS, row))
+    data["price_breaks"] = [
+        PriceBreak(quantity=q, unit_price=u, total_price=t)
+        for q, u, t in data["price_breaks"]
+    ]
+    data["parameters"] = [
+        ComponentParameter(name=n, value=v, unit=unit, numeric_value=num)
+        for n, v, unit, num in data["parameters"]
+    ]
+    return GenericComponent(**data)
+
+
+def dump_components(components: List[GenericComponent]) -> bytes:
+    """
+    Serializa componentes a un formato binario compacto
+
+    Cada componente se codifica como una fila posicional (sin nombres de
+    campo) y el conjunto se comprime con zlib.
+
+    Args:
+        components: Componentes a serializar
+
+    Returns:
+        Bytes listos para guardar en cualquier CacheBackend
+    """
+    rows = [_component_to_row(c) for c in components]
+    payload = json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _MAGIC + bytes([_VERSION]) + zlib.compress(payload, 6)
+
+
+def load_components(data: bytes) -> List[GenericComponent]:
+    """
+    Deserializa el resultado de dump_components
+
+    Raises:
+        ValueError: Si los bytes no tienen el formato esperado
+    """
+    if data[:2] != _MAGIC or data[2] != _VERSION:
+        raise ValueError("Unsupported component serialization format")
+    rows = json.loads(zlib.decompress(data[3:]))
+    return [_row_to_component(row) for row in rows]
+
+
+# Separación por locale: los campos que cambian con idioma, moneda o sitio
+# forman la "capa" del locale; el resto es el núcleo común del producto
+_OVERLAY_MAGIC = b"GO"
+# v2: raw_data pasa a la capa (la respuesta original depende del locale)
+_OVERLAY_VERSION = 2
+LOCALE_FIELDS = (
+    "description",
+    "detailed_description",
+    "quantity_available",
+    "minimum_order_quantity",
+    "order_multiple",
+    "unit_price",
+    "price_breaks",
+    "product_url",
+    "raw_data",
+)
+_LOCALE_DEFAULTS = {
+    name: GenericComponent.model_fields[name].get_default(call_default_factory=True)
+    for name in LOCALE_FIELDS
+}
+_LOCALE_DEFAULTS["description"] = ""
+_LOCALE_DEFAULTS["quantity_available"] = 0
+
+
+def strip_locale(component: GenericComponent) -> GenericComponent:
+    """Núcleo del componente: sin descripción, precios, stock, URL del sitio ni raw_data"""
+    return component.model_copy(update={**_LOCALE_DEFAULTS, "price_breaks": []})
+
+
+def apply_locale(core: GenericComponent, overlay: GenericComponent) -> GenericComponent:
+    """Componente completo a partir del núcleo y de la capa de un locale"""
+    return core.model_copy(update={name: getattr(overlay, name) for name in LOCALE_FIELDS})
+
+
+def dump_overlay(component: GenericComponent) -> bytes:
+    """Serializa solo los campos dependientes del locale (LOCALE_FIELDS)"""
+    row = []
+    for field in LOCALE_FIELDS:
+        value = getattr(component, field)
+        if field == "price_breaks":
+            value = [[pb.quantity, pb.unit_price, pb.total_price] for pb in value]
+        row.append(value)
+    payload = json.dumps(row, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _OVERLAY_MAGIC + bytes([_OVERLAY_VERSION]) + zlib.compress(payload, 6)
+
+
+def load_overlay(core: GenericComponent, data: bytes) -> GenericComponent:
+    """
+    Reconstruye el componente aplicando al núcleo una capa de dump_overlay
+
+    Raises:
+        ValueError: Si los bytes no tienen el formato esperado
+    """
+    if data[:2] != _OVERLAY_MAGIC or data[2] != _OVERLAY_VERSION:
+        raise ValueError("Unsupported locale overlay format")
+    values = dict(zip(LOCALE_FIELDS, json.loads(zlib.decompress(data[3:]))))
+    values["price_breaks"] = [
+        PriceBreak(quantity=q, unit_price=u, total_price=t)
+        for q, u, t in values["price_breaks"]
+    ]
+    return core.model_copy(update=values)
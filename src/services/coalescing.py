@@ -0,0 +1,87 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from services.metrics import get_metrics
+
+
+T = TypeVar("T")
+
+
+class _InflightCall:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Agrupa llamadas concurrentes al distribuidor con la misma clave en una
+    sola tarea compartida (singleflight).
+
+    Cada llamante espera la tarea a través de asyncio.shield, de modo que
+    cancelar a un llamante (p. ej. porque su cliente HTTP se desconectó) no
+    cancela el trabajo mientras otro llamante lo siga esperando. Cuando se va
+    el último, la tarea se cancela y se libera la conexión con el distribuidor.
+    La tarea compartida es la que escribe en la cache, así que su resultado
+    sirve a todos los llamantes que se unieron a ella.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._calls: Dict[str, _InflightCall] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta factory() o se une a la ejecución en curso con la misma clave
+
+        Args:
+            key: Clave de la llamada (la misma que usa la cache)
+            factory: Crea la corrutina que consulta al distribuidor
+
+        Returns:
+            El resultado de la tarea compartida
+        """
+        metrics = get_metrics()
+        call = self._calls.get(key)
+        if call is None:
+            call = _InflightCall(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+        else:
+            metrics.increment("upstream_coalesced_total", kind=self.kind)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.task.done():
+                if call.waiters == 0:
+                    # Nadie más espera el resultado: se libera al distribuidor
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                    call.task.cancel()
+                    metrics.increment("upstream_cancelled_total", kind=self.kind)
+                else:
+                    metrics.increment("upstream_cancel_deferred_total", kind=self.kind)
+
+    def _finished(self, key: str, call: _InflightCall):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Marca la excepción como recuperada aunque ningún llamante la espere ya
+        if not call.task.cancelled():
+            call.task.exception()
+
+
+_coalescers: Dict[str, RequestCoalescer] = {}
+
+
+def get_coalescer(kind: str) -> RequestCoalescer:
+    """Obtiene el coalescedor del proceso para un tipo de llamada (search, details)"""
+    coalescer = _coalescers.get(kind)
+    if coalescer is None:
+        coalescer = _coalescers[kind] = RequestCoalescer(kind)
+    return coalescer
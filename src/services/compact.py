@@ -0,0 +1,196 @@
+import json
+import math
+import sys
+import zlib
+from array import array
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+from models.base import GenericComponent, PriceBreak, ComponentParameter
+
+
+# Textos muy repetidos entre partes (fabricantes, nombres y valores de
+# parámetros, embalajes, estados): una sola copia por proceso
+_strings: Dict[str, str] = {}
+_strings_bytes = 0
+
+_NAN = float("nan")
+
+
+def intern_string(value: Optional[str]) -> Optional[str]:
+    """Copia compartida de value (o None)"""
+    global _strings_bytes
+    if value is None:
+        return None
+    shared = _strings.get(value)
+    if shared is None:
+        shared = _strings[value] = value
+        _strings_bytes += sys.getsizeof(value)
+    return shared
+
+
+def interned_memory_bytes() -> int:
+    """Memoria aproximada de los textos compartidos"""
+    return _strings_bytes + sys.getsizeof(_strings)
+
+
+class CompactComponent:
+    """
+    Forma compacta de un GenericComponent para índices en memoria.
+
+    Sin modelos pydantic anidados: los tramos de precio van empaquetados en
+    un array de doubles (cantidad, unitario, total), los parámetros en tuplas
+    paralelas con nombres, unidades y valores compartidos (intern_string) y
+    raw_data comprimido. Los campos transitorios (stale, price_at_qty...) no
+    se guardan. to_component() reconstruye el modelo de la API.
+    """
+
+    __slots__ = (
+        "distributor",
+        "distributor_part_number",
+        "manufacturer",
+        "manufacturer_part_number",
+        "description",
+        "detailed_description",
+        "quantity_available",
+        "minimum_order_quantity",
+        "order_multiple",
+        "unit_price",
+        "prices",
+        "datasheet_url",
+        "product_url",
+        "image_url",
+        "parameter_names",
+        "parameter_values",
+        "parameter_units",
+        "parameter_numeric",
+        "packaging",
+        "series",
+        "product_status",
+        "rohs_status",
+        "lifecycle_status",
+        "raw",
+    )
+
+    @classmethod
+    def from_component(cls, component: GenericComponent) -> "CompactComponent":
+        compact = cls.__new__(cls)
+        compact.distributor = intern_string(component.distributor)
+        compact.distributor_part_number = component.distributor_part_number
+        compact.manufacturer = intern_string(component.manufacturer)
+        compact.manufacturer_part_number = component.manufacturer_part_number
+        compact.description = component.description
+        compact.detailed_description = component.detailed_description
+        compact.quantity_available = component.quantity_available
+        compact.minimum_order_quantity = component.minimum_order_quantity
+        compact.order_multiple = component.order_multiple
+        compact.unit_price = component.unit_price
+        compact.prices = array("d", [
+            value
+            for pb in component.price_breaks
+            for value in (pb.quantity, pb.unit_price, pb.total_price)
+        ])
+        compact.datasheet_url = component.datasheet_url
+        compact.product_url = component.product_url
+        compact.image_url = component.image_url
+        parameters = component.parameters
+        compact.parameter_names = tuple(intern_string(p.name) for p in parameters)
+        compact.parameter_values = tuple(intern_string(p.value) for p in parameters)
+        compact.parameter_units = tuple(intern_string(p.unit) for p in parameters)
+        compact.parameter_numeric = array("d", [
+            _NAN if p.numeric_value is None else p.numeric_value for p in parameters
+        ])
+        compact.packaging = intern_string(component.packaging)
+        compact.series = intern_string(component.series)
+        compact.product_status = intern_string(component.product_status)
+        compact.rohs_status = intern_string(component.rohs_status)
+        compact.lifecycle_status = intern_string(component.lifecycle_status)
+        compact.raw = (
+            zlib.compress(json.dumps(component.raw_data, separators=(",", ":")).encode("utf-8"), 6)
+            if component.raw_data else None
+        )
+        return compact
+
+    def iter_price_breaks(self) -> Iterator[Tuple[int, float, float]]:
+        """Tramos como (cantidad, precio unitario, precio total)"""
+        prices = self.prices
+        for i in range(0, len(prices), 3):
+            yield int(prices[i]), prices[i + 1], prices[i + 2]
+
+    def to_component(self) -> GenericComponent:
+        """Modelo de la API equivalente"""
+        return GenericComponent(
+            distributor=self.distributor,
+            distributor_part_number=self.distributor_part_number,
+            manufacturer=self.manufacturer,
+            manufacturer_part_number=self.manufacturer_part_number,
+            description=self.description,
+            detailed_description=self.detailed_description,
+            quantity_available=self.quantity_available,
+            minimum_order_quantity=self.minimum_order_quantity,
+            order_multiple=self.order_multiple,
+            unit_price=self.unit_price,
+            price_breaks=[
+                PriceBreak(quantity=q, unit_price=u, total_price=t)
+                for q, u, t in self.iter_price_breaks()
+            ],
+            datasheet_url=self.datasheet_url,
+            product_url=self.product_url,
+            image_url=self.image_url,
+            parameters=[
+                ComponentParameter(
+                    name=name,
+                    value=value,
+                    unit=unit,
+                    numeric_value=None if math.isnan(numeric) else numeric
+                )
+                for name, value, unit, numeric in zip(
+                    self.parameter_names,
+                    self.parameter_values,
+                    self.parameter_units,
+                    self.parameter_numeric
+                )
+            ],
+            packaging=self.packaging,
+            series=self.series,
+            product_status=self.product_status,
+            rohs_status=self.rohs_status,
+            lifecycle_status=self.lifecycle_status,
+            raw_data=self.raw_data()
+        )
+
+    def raw_data(self) -> Dict[str, Any]:
+        if self.raw is None:
+            return {}
+        return json.loads(zlib.decompress(self.raw))
+
+    def memory_bytes(self) -> int:
+        """
+        Memoria propia aproximada de la parte
+
+        Los textos compartidos (intern_string) no se cuentan aquí sino en
+        interned_memory_bytes(), una vez para todo el proceso.
+        """
+        size = sys.getsizeof(self)
+        for value in (
+            self.distributor_part_number,
+            self.manufacturer_part_number,
+            self.description,
+            self.detailed_description,
+            self.datasheet_url,
+            self.product_url,
+            self.image_url,
+            self.raw,
+            self.quantity_available,
+            self.unit_price,
+        ):
+            if value is not None:
+                size += sys.getsizeof(value)
+        for value in (
+            self.prices,
+            self.parameter_names,
+            self.parameter_values,
+            self.parameter_units,
+            self.parameter_numeric,
+        ):
+            size += sys.getsizeof(value)
+        return size
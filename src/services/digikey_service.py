@@ -1,17 +1,39 @@
+import asyncio
 import httpx
-from typing import Optional, List, Dict, Any
+from time import monotonic
+from typing import Optional, List, Dict, Any, Type, TypeVar
 from services.base_service import BaseDistributorService
 from services.auth.digikey_auth import DigiKeyAuthService
+from services.auth.token_store import get_token_store
+from services.transport import get_digikey_transport, get_http_client, TRANSPORT_MODE_REPLAY
+from services.units import parse_quantity
+from services.pricing import order_multiple_for, order_quantity, unit_price_at
+from services.admission import get_admission_controller
+from services.scheduler import get_upstream_scheduler
+from services.quota import get_quota_manager, QuotaExceededError
+from services.metrics import get_metrics
+from services.upstream_health import is_degradable_error
+from services.cache import get_component_cache, catalog_cache_key
 from models.base import GenericComponent, PriceBreak, ComponentParameter
 from models.digikey import (
     DigiKeyProduct,
     DigiKeyProductSearchResponse,
     DigiKeyManufacturersResponse,
-    DigiKeyCategoriesResponse
+    DigiKeyCategoriesResponse,
+    DigiKeyPricingByQuantityResponse,
+    DigiKeyPricingOption,
+    DigiKeyDigiReelPricing,
+    DigiKeyProductPricingResponse,
+    DigiKeyProductPricing,
+    DigiKeyProductPricingVariation,
+    DigiKeyDescription
 )
 from config import Settings
 
 
+CatalogT = TypeVar("CatalogT", DigiKeyManufacturersResponse, DigiKeyCategoriesResponse)
+
+
 class DigiKeyService(BaseDistributorService):
     def __init__(self, settings: Settings):
         self.settings = settings
@@ -20,22 +42,32 @@ class DigiKeyService(BaseDistributorService):
             else settings.digikey_api_url
         )
         self.api_version = "v4"
+        self.transport = get_digikey_transport(settings)
+        self.scheduler = get_upstream_scheduler(settings)
+        self.quota = get_quota_manager(settings)
+        self.cache = get_component_cache(settings)
         self.auth_service = DigiKeyAuthService(
             client_id=settings.digikey_client_id,
             client_secret=settings.digikey_client_secret,
-            api_url=self.base_url
+            api_url=self.base_url,
+            transport=self.transport,
+            token_store=get_token_store(settings)
         )
 
+    @staticmethod
+    def is_configured(settings: Settings) -> bool:
+        """Indica si hay credenciales o un fichero de reproducción que usar"""
+        if settings.digikey_transport_mode.lower() == TRANSPORT_MODE_REPLAY:
+            return True
+        return bool(settings.digikey_client_id and settings.digikey_client_secret)
+
     @property
     def distributor_name(self) -> str:
         return "DigiKey"
 
     async def is_available(self) -> bool:
         """Verifica si el servicio DigiKey está configurado"""
-        return bool(
-            self.settings.digikey_client_id and 
-            self.settings.digikey_client_secret
-        )
+        return self.is_configured(self.settings)
 
     async def _get_headers(
         self,
@@ -53,6 +85,46 @@ class DigiKeyService(BaseDistributorService):
             "Content-Type": "application/json"
         }
 
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        json: Optional[Dict[str, Any]] = None
+    ) -> httpx.Response:
+        """
+        Ejecuta una petición contra la API de DigiKey usando el transporte configurado
+
+        La petición espera turno en el planificador de cuota según la
+        prioridad del contexto (ver services.scheduler.priority_scope); al
+        reproducir tráfico grabado no hay cuota que repartir. La llamada se
+        carga al presupuesto del consumidor de la petición en curso.
+
+        Raises:
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
+        """
+        if self.quota is not None:
+            self.quota.charge_upstream()
+        if self.settings.digikey_transport_mode.lower() != TRANSPORT_MODE_REPLAY:
+            await self.scheduler.acquire()
+        started = monotonic()
+        try:
+            client = get_http_client(self.transport, self.settings.digikey_max_connections)
+            response = await client.request(method, url, json=json, headers=headers)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self._record_latency(monotonic() - started, overloaded=is_degradable_error(e))
+            raise
+        self._record_latency(monotonic() - started, overloaded=False)
+        return response
+
+    def _record_latency(self, latency: float, overloaded: bool):
+        """Publica la latencia de DigiKey en métricas y en el control de admisión"""
+        get_metrics().observe("upstream_latency_ms", latency * 1000, distributor="digikey")
+        controller = get_admission_controller(self.settings)
+        if controller is not None:
+            controller.record_upstream(latency, overloaded=overloaded)
+
     async def search_components(
         self,
         keywords: str,
@@ -77,16 +149,13 @@ class DigiKeyService(BaseDistributorService):
         if filters:
             payload["FilterOptionsRequest"] = filters
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            search_response = DigiKeyProductSearchResponse(**data)
-            
-            return [
-                self._convert_to_generic(product) 
-                for product in search_response.products
-            ]
+        response = await self._request("POST", url, headers, json=payload)
+        search_response = DigiKeyProductSearchResponse(**response.json())
+        
+        return [
+            self._convert_to_generic(product) 
+            for product in search_response.products
+        ]
 
     async def get_component_details(
         self,
@@ -100,42 +169,229 @@ class DigiKeyService(BaseDistributorService):
         
         headers = await self._get_headers(locale_language, locale_currency, locale_site)
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            product = DigiKeyProduct(**data)
-            return self._convert_to_generic(product)
+        response = await self._request("GET", url, headers)
+        product = DigiKeyProduct(**response.json())
+        return self._convert_to_generic(product)
+
+    async def get_locale_overlay(
+        self,
+        part_number: str,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        locale_site: str = "US"
+    ) -> Optional[GenericComponent]:
+        """
+        Descripción, precios y stock de un locale mediante la consulta de precios
+        
+        La respuesta de /pricing es mucho menor que la de productdetails
+        (sin parámetros ni media) y basta para completar un núcleo cacheado.
+        Devuelve None si no incluye la variante con ese número de parte.
+        """
+        url = f"{self.base_url}/products/{self.api_version}/search/{part_number}/pricing"
+        headers = await self._get_headers(locale_language, locale_currency, locale_site)
+
+        response = await self._request("GET", url, headers)
+        pricing_response = DigiKeyProductPricingResponse(**response.json())
+        for pricing in pricing_response.product_pricings:
+            for variation in pricing.product_variations:
+                if variation.digi_key_product_number == part_number:
+                    return self._pricing_to_overlay(pricing, variation)
+        # Sin la variante exacta no se sustituye por otra (otro embalaje tiene
+        # otro precio y stock): el llamante pide el detalle completo
+        return None
+
+    def _pricing_to_overlay(
+        self,
+        pricing: DigiKeyProductPricing,
+        variation: DigiKeyProductPricingVariation
+    ) -> GenericComponent:
+        """Campos del locale de un componente a partir de una variante de /pricing"""
+        price_breaks = [
+            PriceBreak(quantity=pb.break_quantity, unit_price=pb.unit_price, total_price=pb.total_price)
+            for pb in variation.standard_pricing
+        ]
+        package = variation.package_type.name if variation.package_type else None
+        order_multiple = order_multiple_for(package, pricing.standard_package)
+        unit_price = None
+        if price_breaks:
+            minimum = order_quantity(1, variation.minimum_order_quantity, order_multiple)
+            unit_price = unit_price_at(price_breaks, minimum)
+        description = pricing.description or DigiKeyDescription()
+        return GenericComponent(
+            distributor="DigiKey",
+            distributor_part_number=variation.digi_key_product_number,
+            manufacturer="",
+            manufacturer_part_number=pricing.manufacturer_product_number or "",
+            description=description.product_description or "",
+            detailed_description=description.detailed_description,
+            quantity_available=pricing.quantity_available,
+            minimum_order_quantity=variation.minimum_order_quantity,
+            order_multiple=order_multiple,
+            unit_price=unit_price,
+            price_breaks=price_breaks,
+            product_url=pricing.product_url
+            or f"https://www.digikey.com/product-detail/en/-/{variation.digi_key_product_number}",
+            packaging=package,
+            raw_data=pricing.model_dump(by_alias=True)
+        )
+
+    async def get_purchase_options(
+        self,
+        part_number: str,
+        quantity: int,
+        locale_language: str = "en",
+        locale_currency: str = "USD",
+        locale_site: str = "US"
+    ) -> List[GenericComponent]:
+        """
+        Opciones de compra de DigiKey para una cantidad
+        
+        Consulta en paralelo pricingbyquantity (combinaciones de cut tape y
+        bobina que DigiKey valora para la cantidad) y digireelpricing (bobina
+        a medida con su tarifa de rebobinado). Cada opción se devuelve como
+        un componente con un único tramo en la cantidad valorada.
+        
+        Raises:
+            QuotaExceededError: Si el consumidor agotó sus llamadas al distribuidor
+            httpx.HTTPError: Si falla la consulta de precios por cantidad
+        """
+        base = f"{self.base_url}/products/{self.api_version}/search/{part_number}"
+        headers = await self._get_headers(locale_language, locale_currency, locale_site)
+        pricing, digireel = await asyncio.gather(
+            self._request("GET", f"{base}/pricingbyquantity/{quantity}", headers),
+            self._request("GET", f"{base}/digireelpricing?requestedQuantity={quantity}", headers),
+            return_exceptions=True
+        )
+        if isinstance(pricing, BaseException):
+            raise pricing
+        if isinstance(digireel, QuotaExceededError):
+            raise digireel
+
+        response = DigiKeyPricingByQuantityResponse(**pricing.json())
+        options = response.my_pricing_options or response.standard_pricing_options
+        offers = [
+            self._option_to_generic(response, option, part_number)
+            for option in options
+            if option.total_quantity_priced > 0 and option.products
+        ]
+        # Sin Digi-Reel para la parte DigiKey responde con error: solo hay cut tape y bobina
+        if not isinstance(digireel, BaseException):
+            reel = DigiKeyDigiReelPricing(**digireel.json())
+            if reel.extended_price > 0:
+                offers.append(self._digireel_to_generic(response, reel, part_number, quantity, options))
+        return offers
+
+    def _option_to_generic(
+        self,
+        response: DigiKeyPricingByQuantityResponse,
+        option: DigiKeyPricingOption,
+        part_number: str
+    ) -> GenericComponent:
+        """Una opción de pricingbyquantity como componente de tramo único"""
+        main = max(option.products, key=lambda p: p.quantity_priced)
+        packaging = " + ".join(dict.fromkeys(
+            p.package_type.name for p in option.products if p.package_type and p.package_type.name
+        ))
+        quantity = option.total_quantity_priced
+        unit_price = option.total_price / quantity
+        return GenericComponent(
+            distributor="DigiKey",
+            distributor_part_number=main.digi_key_product_number,
+            manufacturer=response.manufacturer.name if response.manufacturer else "",
+            manufacturer_part_number=response.manufacturer_part_number or part_number,
+            description=option.pricing_option or "",
+            quantity_available=option.quantity_available,
+            minimum_order_quantity=quantity,
+            unit_price=unit_price,
+            price_breaks=[PriceBreak(quantity=quantity, unit_price=unit_price, total_price=option.total_price)],
+            product_url=f"https://www.digikey.com/product-detail/en/-/{main.digi_key_product_number}",
+            packaging=packaging or None,
+            raw_data=option.model_dump(by_alias=True)
+        )
+
+    def _digireel_to_generic(
+        self,
+        response: DigiKeyPricingByQuantityResponse,
+        reel: DigiKeyDigiReelPricing,
+        part_number: str,
+        quantity: int,
+        options: List[DigiKeyPricingOption]
+    ) -> GenericComponent:
+        """La bobina Digi-Reel como componente de tramo único con la tarifa incluida"""
+        quantity = reel.requested_quantity or quantity
+        total_price = reel.extended_price + reel.reeling_fee
+        unit_price = total_price / quantity
+        return GenericComponent(
+            distributor="DigiKey",
+            distributor_part_number=response.requested_product or part_number,
+            manufacturer=response.manufacturer.name if response.manufacturer else "",
+            manufacturer_part_number=response.manufacturer_part_number or part_number,
+            description="Digi-Reel",
+            # Se rebobina a partir del stock en bobina del producto
+            quantity_available=max((option.quantity_available for option in options), default=0),
+            minimum_order_quantity=quantity,
+            unit_price=unit_price,
+            price_breaks=[PriceBreak(quantity=quantity, unit_price=unit_price, total_price=total_price)],
+            packaging="Digi-Reel®",
+            raw_data=reel.model_dump(by_alias=True)
+        )
 
     async def get_manufacturers(
         self,
         locale_language: str = "en",
         locale_site: str = "US"
     ) -> DigiKeyManufacturersResponse:
-        """Obtiene lista de fabricantes"""
-        url = f"{self.base_url}/products/{self.api_version}/search/manufacturers"
-        headers = await self._get_headers(locale_language, "USD", locale_site)
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return DigiKeyManufacturersResponse(**data)
+        """Obtiene lista de fabricantes (cacheada catalog_ttl_seconds)"""
+        return await self._get_catalog(
+            "manufacturers",
+            DigiKeyManufacturersResponse,
+            f"{self.base_url}/products/{self.api_version}/search/manufacturers",
+            locale_language,
+            locale_site
+        )
 
     async def get_categories(
         self,
         locale_language: str = "en",
         locale_site: str = "US"
     ) -> DigiKeyCategoriesResponse:
-        """Obtiene lista de categorías"""
-        url = f"{self.base_url}/products/{self.api_version}/search/categories"
-        headers = await self._get_headers(locale_language, "USD", locale_site)
+        """Obtiene lista de categorías (cacheada catalog_ttl_seconds)"""
+        return await self._get_catalog(
+            "categories",
+            DigiKeyCategoriesResponse,
+            f"{self.base_url}/products/{self.api_version}/search/categories",
+            locale_language,
+            locale_site
+        )
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return DigiKeyCategoriesResponse(**data)
+    async def _get_catalog(
+        self,
+        kind: str,
+        model: Type[CatalogT],
+        url: str,
+        locale_language: str,
+        locale_site: str
+    ) -> CatalogT:
+        """Catálogo desde la cache compartida (espacio "catalog") o desde DigiKey"""
+        key = catalog_cache_key("digikey", kind, locale_language, locale_site)
+        data = await self.cache.get_catalog(key)
+        if data is not None:
+            try:
+                return model.model_validate_json(data)
+            except ValueError:
+                await self.cache.delete(key)
+
+        started = monotonic()
+        headers = await self._get_headers(locale_language, "USD", locale_site)
+        response = await self._request("GET", url, headers)
+        catalog = model(**response.json())
+        await self.cache.set_catalog(
+            key,
+            catalog.model_dump_json(by_alias=True).encode("utf-8"),
+            self.settings.catalog_ttl_seconds,
+            fetch_ms=(monotonic() - started) * 1000
+        )
+        return catalog
 
     async def get_category_by_id(
         self,
@@ -147,10 +403,8 @@ class DigiKeyService(BaseDistributorService):
         url = f"{self.base_url}/products/{self.api_version}/search/categories/{category_id}"
         headers = await self._get_headers(locale_language, "USD", locale_site)
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        response = await self._request("GET", url, headers)
+        return response.json()
 
     def _convert_to_generic(self, product: DigiKeyProduct) -> GenericComponent:
         """Convierte un producto DigiKey al formato genérico"""
@@ -167,19 +421,24 @@ class DigiKeyService(BaseDistributorService):
                 for pb in product.standard_pricing.price_breaks
             ]
         
-        # Convertir parámetros
-        parameters = [
-            ComponentParameter(
+        # Convertir parámetros, normalizando los valores numéricos a unidades SI
+        parameters = []
+        for param in product.parameters:
+            numeric_value, unit = parse_quantity(param.value)
+            parameters.append(ComponentParameter(
                 name=param.parameter,
-                value=param.value
-            )
-            for param in product.parameters
-        ]
+                value=param.value,
+                unit=unit,
+                numeric_value=numeric_value
+            ))
         
-        # Obtener precio unitario
+        # Precio unitario al pedir el mínimo: el tramo aplicable al MOQ
+        # redondeado al múltiplo de pedido, no el primer tramo de la lista
+        order_multiple = order_multiple_for(product.packaging, product.standard_package)
         unit_price = None
         if price_breaks:
-            unit_price = price_breaks[0].unit_price
+            minimum = order_quantity(1, product.minimum_order_quantity, order_multiple)
+            unit_price = unit_price_at(price_breaks, minimum)
         elif product.unit_price:
             unit_price = product.unit_price
         
@@ -192,6 +451,7 @@ class DigiKeyService(BaseDistributorService):
             detailed_description=product.detailed_description,
             quantity_available=product.quantity_available,
             minimum_order_quantity=product.minimum_order_quantity,
+            order_multiple=order_multiple,
             unit_price=unit_price,
             price_breaks=price_breaks,
             datasheet_url=product.primary_datasheet,
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from time import time
+from typing import Optional, List, Dict
+
+import numpy as np
+
+from models.base import GenericComponent, PriceBreak
+from config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+# Decimales de los importes por moneda (el resto usa 2)
+_CURRENCY_DECIMALS = {"JPY": 0, "KRW": 0, "HUF": 0, "TWD": 0}
+# Decimales de los precios unitarios convertidos
+_UNIT_PRICE_DECIMALS = 5
+
+
+class FxRateTable:
+    """
+    Tipos de cambio cargados de un fichero JSON.
+
+    Formato: {"base": "USD", "rates": {"EUR": 0.92, "GBP": 0.79, ...}}, con
+    las unidades de cada moneda que vale una unidad de la base. reload()
+    solo relee el fichero si ha cambiado; si el nuevo contenido no es
+    válido se conservan los tipos anteriores.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.base: Optional[str] = None
+        self.rates: Dict[str, float] = {}
+        self.loaded_at: Optional[float] = None
+        self._mtime: Optional[float] = None
+
+    def reload(self) -> bool:
+        """Relee el fichero si cambió; devuelve True si se cargaron tipos nuevos"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            base = str(data["base"]).upper()
+            rates = {str(code).upper(): float(rate) for code, rate in data["rates"].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning("Ignoring FX rate file %s: %s", self.path, e)
+            self._mtime = mtime
+            return False
+        rates[base] = 1.0
+        self.base = base
+        self.rates = {code: rate for code, rate in rates.items() if rate > 0}
+        self.loaded_at = time()
+        self._mtime = mtime
+        logger.info("Loaded %d FX rates from %s", len(self.rates), self.path, extra={"base": base})
+        return True
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Unidades de to_currency por unidad de from_currency, o None si falta alguna"""
+        from_currency = from_currency.upper()
+        to_currency = to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+        source = self.rates.get(from_currency)
+        target = self.rates.get(to_currency)
+        if source is None or target is None:
+            return None
+        return target / source
+
+
+def convert_components(
+    components: List[GenericComponent],
+    rate: float,
+    from_currency: str,
+    to_currency: str
+) -> List[GenericComponent]:
+    """
+    Convierte los precios de components con rate en una pasada vectorizada
+
+    Todos los precios unitarios y totales de todos los tramos se reúnen en
+    un único array, se multiplican y redondean juntos, y se devuelven copias
+    (los originales pueden estar compartidos con la cache o los índices)
+    con converted_from_currency. price_at_qty no se convierte: se calcula
+    después sobre los precios ya convertidos.
+    """
+    if not components:
+        return components
+    counts = [len(c.price_breaks) for c in components]
+    unit_prices = np.array(
+        [pb.unit_price for c in components for pb in c.price_breaks]
+        + [np.nan if c.unit_price is None else c.unit_price for c in components],
+        dtype=np.float64
+    )
+    totals = np.array([pb.total_price for c in components for pb in c.price_breaks], dtype=np.float64)
+    unit_prices = np.round(unit_prices * rate, _UNIT_PRICE_DECIMALS).tolist()
+    totals = np.round(totals * rate, _CURRENCY_DECIMALS.get(to_currency.upper(), 2)).tolist()
+
+    converted = []
+    position = 0
+    component_units = unit_prices[len(totals):]
+    for component, count, unit_price in zip(components, counts, component_units):
+        price_breaks = [
+            PriceBreak(quantity=pb.quantity, unit_price=unit_prices[position + i], total_price=totals[position + i])
+            for i, pb in enumerate(component.price_breaks)
+        ]
+        position += count
+        converted.append(component.model_copy(update={
+            "unit_price": None if component.unit_price is None else unit_price,
+            "price_breaks": price_breaks,
+            "converted_from_currency": from_currency.upper(),
+        }))
+    return converted
+
+
+async def refresh_fx_rates(settings: Settings):
+    """Relee periódicamente el fichero de tipos de cambio"""
+    table = get_fx_rates(settings)
+    if table is None:
+        return
+    while True:
+        await asyncio.sleep(settings.fx_refresh_seconds)
+        try:
+            await asyncio.to_thread(table.reload)
+        except Exception as e:
+            logger.error("Error refreshing FX rates: %s", e)
+
+
+_tables: Dict[str, FxRateTable] = {}
+
+
+def get_fx_rates(settings: Settings) -> Optional[FxRateTable]:
+    """Obtiene la tabla de tipos de cambio del proceso o None si la conversión local está desactivada"""
+    if not settings.fx_enabled or not settings.fx_rates_path:
+        return None
+    table = _tables.get(settings.fx_rates_path)
+    if table is None:
+        table = _tables[settings.fx_rates_path] = FxRateTable(settings.fx_rates_path)
+        table.reload()
+    return table
@@ -0,0 +1,429 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from pathlib import Path
+from time import time
+from typing import Optional, List, Dict, Tuple, Iterator, Any
+
+from services.cache import distributor_key
+from services.metrics import get_metrics
+from models.base import GenericComponent, HistoryPoint, PartHistoryResponse, PartChange, ChangeFeedResponse
+from config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+# Precios como enteros en millonésimas de la moneda; -1 = sin precio
+_PRICE_SCALE = 1_000_000
+_NO_PRICE = -1
+
+HistoryKey = Tuple[str, str, str]
+
+
+def history_key(distributor: Any, part_number: str, currency: str) -> HistoryKey:
+    """Clave de la serie: distribuidor, número de parte y moneda de los precios"""
+    return (distributor_key(distributor), part_number.strip(), currency.upper())
+
+
+def _encode_price(price: Optional[float]) -> int:
+    return _NO_PRICE if price is None else round(price * _PRICE_SCALE)
+
+
+def _decode_price(code: int) -> Optional[float]:
+    return None if code < 0 else code / _PRICE_SCALE
+
+
+def _append(column: array, value: int) -> array:
+    """Añade value a la columna, que pasa a enteros de 64 bits si no cabe en 32"""
+    try:
+        column.append(value)
+    except OverflowError:
+        column = array("q", column)
+        column.append(value)
+    return column
+
+
+class PartHistory:
+    """
+    Cambios de precio y stock de una parte en columnas delta-codificadas.
+
+    Cada columna (instante, stock, precio) guarda la diferencia con el punto
+    anterior, y el primero su valor absoluto, en enteros de 32 bits que pasan
+    a 64 si un salto no cabe. Los últimos valores absolutos se guardan aparte
+    para comparar y añadir sin decodificar la serie.
+    """
+
+    __slots__ = (
+        "times",
+        "quantities",
+        "prices",
+        "last_time",
+        "last_quantity",
+        "last_price",
+        "first_seen_at",
+        "last_seen_at",
+    )
+
+    def __init__(self, first_seen_at: int):
+        self.times = array("i")
+        self.quantities = array("i")
+        self.prices = array("i")
+        self.last_time = 0
+        self.last_quantity = 0
+        self.last_price = 0
+        self.first_seen_at = first_seen_at
+        self.last_seen_at = first_seen_at
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, ts: int, quantity: int, price: int):
+        ts = max(ts, self.last_time)
+        self.times = _append(self.times, ts - self.last_time)
+        self.quantities = _append(self.quantities, quantity - self.last_quantity)
+        self.prices = _append(self.prices, price - self.last_price)
+        self.last_time = ts
+        self.last_quantity = quantity
+        self.last_price = price
+        self.last_seen_at = max(self.last_seen_at, ts)
+
+    def points(self) -> Iterator[Tuple[int, int, int]]:
+        """Puntos decodificados como (instante, stock, precio codificado)"""
+        ts = quantity = price = 0
+        for dt, dq, dp in zip(self.times, self.quantities, self.prices):
+            ts += dt
+            quantity += dq
+            price += dp
+            yield ts, quantity, price
+
+    def trim(self, max_points: int):
+        """Conserva los max_points cambios más recientes"""
+        points = list(self.points())[-max_points:]
+        self.times = array("i")
+        self.quantities = array("i")
+        self.prices = array("i")
+        self.last_time = self.last_quantity = self.last_price = 0
+        for ts, quantity, price in points:
+            self.append(ts, quantity, price)
+
+    def memory_bytes(self) -> int:
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.times)
+            + sys.getsizeof(self.quantities)
+            + sys.getsizeof(self.prices)
+        )
+
+
+class PriceHistoryStore:
+    """
+    Histórico de precio y stock de las partes vistas en búsquedas y detalles.
+
+    Solo se guarda un punto cuando el stock o el precio cambian (o la parte
+    aparece por primera vez); las lecturas sin cambios solo actualizan
+    last_seen_at. Cada cambio recibe un número de secuencia creciente y se
+    conserva en un feed acotado para que los consumidores se sincronicen con
+    /history/changes?since=<cursor>. En disco es un log append-only (una
+    línea JSON por cambio) que se compacta al cargar si ha crecido más del
+    doble que lo retenido; tras compactar, los cursores anteriores reciben
+    reset_required.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_parts: int = 20000,
+        max_points_per_part: int = 500,
+        feed_size: int = 10000
+    ):
+        self.path = Path(path) if path else None
+        self.max_parts = max_parts
+        self.max_points_per_part = max_points_per_part
+        self.points = 0
+        self.memory_bytes = 0
+        self._parts: "OrderedDict[HistoryKey, PartHistory]" = OrderedDict()
+        # (seq, instante, clave, stock, precio, (stock, precio) anteriores o None)
+        self._feed: deque = deque(maxlen=feed_size)
+        self._seq = 0
+        self._pending: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def record_components(self, components: List[GenericComponent], currency: str) -> int:
+        """
+        Anota el precio y el stock recién obtenidos del distribuidor
+
+        Args:
+            components: Componentes tal como los devolvió el distribuidor
+            currency: Moneda en la que vienen sus precios
+
+        Returns:
+            Número de partes que cambiaron o aparecieron por primera vez
+        """
+        now = int(time())
+        changed = 0
+        for component in components:
+            key = history_key(component.distributor, component.distributor_part_number, currency)
+            if self._record(key, now, component.quantity_available, _encode_price(component.unit_price)):
+                changed += 1
+        metrics = get_metrics()
+        if changed:
+            metrics.increment("history_changes_total", value=changed)
+        metrics.set_gauge("history_parts", len(self._parts))
+        metrics.set_gauge("history_points", self.points)
+        metrics.set_gauge("history_memory_bytes", self.memory_bytes)
+        return changed
+
+    def _record(self, key: HistoryKey, ts: int, quantity: int, price: int, seq: Optional[int] = None) -> bool:
+        """
+        Añade un punto si cambia algo respecto al último de la parte
+
+        seq=None asigna el siguiente número y anota el cambio en el log; al
+        cargar el log se pasa el guardado (0 para los puntos compactados,
+        que no entran en el feed).
+        """
+        history = self._parts.get(key)
+        previous = None
+        if history is None:
+            history = self._parts[key] = PartHistory(ts)
+            self.memory_bytes += history.memory_bytes()
+            if len(self._parts) > self.max_parts:
+                _, evicted = self._parts.popitem(last=False)
+                self.points -= len(evicted)
+                self.memory_bytes -= evicted.memory_bytes()
+        else:
+            self._parts.move_to_end(key)
+            if history.last_quantity == quantity and history.last_price == price:
+                history.last_seen_at = max(history.last_seen_at, ts)
+                return False
+            previous = (history.last_quantity, history.last_price)
+
+        if seq is None:
+            self._seq += 1
+            seq = self._seq
+            if self.path is not None:
+                self._pending.append(json.dumps(
+                    [seq, ts, *key, quantity, price],
+                    separators=(",", ":"),
+                    ensure_ascii=False
+                ))
+        else:
+            self._seq = max(self._seq, seq)
+
+        size_before = history.memory_bytes()
+        points_before = len(history)
+        history.append(ts, quantity, price)
+        # Se recorta con holgura para no recodificar la serie en cada cambio
+        if len(history) > self.max_points_per_part + self.max_points_per_part // 4:
+            history.trim(self.max_points_per_part)
+        self.points += len(history) - points_before
+        self.memory_bytes += history.memory_bytes() - size_before
+        if seq:
+            self._feed.append((seq, history.last_time, key, quantity, price, previous))
+        return True
+
+    def history(
+        self,
+        key: HistoryKey,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        max_points: int = 200
+    ) -> Optional[PartHistoryResponse]:
+        """
+        Serie de una parte entre since y until, reducida a max_points
+
+        El primer punto es el valor vigente en since (changes=0) si la parte
+        ya existía entonces. Al reducir, cada punto resume un intervalo: el
+        último valor, el número de cambios y el mínimo y máximo de stock y
+        precio.
+
+        Returns:
+            Serie de la parte o None si no tiene histórico
+        """
+        history = self._parts.get(key)
+        if history is None:
+            return None
+        points = list(history.points())
+        times = [point[0] for point in points]
+        start = bisect_left(times, since) if since is not None else 0
+        end = bisect_right(times, until) if until is not None else len(points)
+        selected = [(ts, quantity, price, 1) for ts, quantity, price in points[start:end]]
+        if start > 0:
+            _, quantity, price = points[start - 1]
+            selected.insert(0, (since, quantity, price, 0))
+
+        downsampled = len(selected) > max_points
+        if downsampled:
+            first, last = selected[0][0], selected[-1][0]
+            width = max((last - first) / max_points, 1)
+            buckets: Dict[int, List[Tuple[int, int, int, int]]] = {}
+            for point in selected:
+                buckets.setdefault(min(int((point[0] - first) / width), max_points - 1), []).append(point)
+            result = [self._summarize(bucket) for bucket in buckets.values()]
+        else:
+            result = [self._summarize([point]) for point in selected]
+
+        return PartHistoryResponse(
+            distributor=key[0],
+            part_number=key[1],
+            currency=key[2],
+            first_seen_at=history.first_seen_at,
+            last_seen_at=history.last_seen_at,
+            total_points=len(points),
+            downsampled=downsampled,
+            points=result
+        )
+
+    @staticmethod
+    def _summarize(bucket: List[Tuple[int, int, int, int]]) -> HistoryPoint:
+        ts, quantity, price, _ = bucket[-1]
+        quantities = [point[1] for point in bucket]
+        prices = [point[2] for point in bucket if point[2] >= 0]
+        return HistoryPoint(
+            ts=ts,
+            quantity_available=quantity,
+            unit_price=_decode_price(price),
+            changes=sum(point[3] for point in bucket),
+            min_quantity=min(quantities),
+            max_quantity=max(quantities),
+            min_unit_price=_decode_price(min(prices)) if prices else None,
+            max_unit_price=_decode_price(max(prices)) if prices else None
+        )
+
+    def changes(self, since: int, limit: int = 500, distributor: Optional[str] = None) -> ChangeFeedResponse:
+        """
+        Cambios con número de secuencia mayor que since
+
+        Args:
+            since: Cursor devuelto por la petición anterior (0 la primera vez)
+            limit: Máximo de cambios devueltos
+            distributor: Solo los de este distribuidor (el cursor avanza igual)
+
+        Returns:
+            Cambios, siguiente cursor y si el feed ya no tiene todos los
+            cambios posteriores a since
+        """
+        oldest = self._feed[0][0] if self._feed else self._seq + 1
+        reset_required = since < oldest - 1 or since > self._seq
+        name = distributor_key(distributor) if distributor else None
+
+        pending = []
+        for event in reversed(self._feed):
+            if event[0] <= since:
+                break
+            pending.append(event)
+        pending.reverse()
+
+        changes = []
+        for seq, ts, key, quantity, price, previous in pending:
+            if len(changes) >= limit:
+                break
+            cursor = seq
+            if name is not None and key[0] != name:
+                continue
+            changes.append(PartChange(
+                seq=seq,
+                ts=ts,
+                distributor=key[0],
+                part_number=key[1],
+                currency=key[2],
+                quantity_available=quantity,
+                unit_price=_decode_price(price),
+                previous_quantity=previous[0] if previous else None,
+                previous_unit_price=_decode_price(previous[1]) if previous else None,
+                first_seen=previous is None
+            ))
+        else:
+            cursor = self._seq
+        return ChangeFeedResponse(changes=changes, next_cursor=cursor, reset_required=reset_required)
+
+    def save(self):
+        """
+        Añade al log los cambios pendientes
+
+        Si la escritura falla, los cambios vuelven a quedar pendientes (por
+        delante de los anotados mientras tanto) para el siguiente intento;
+        una línea repetida al reproducir el log no añade ningún punto.
+        """
+        lines, self._pending = self._pending, []
+        if self.path is None or not lines:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            self._pending[:0] = lines
+            raise
+
+    def load(self):
+        """Reproduce el log guardado; no hace nada si no existe"""
+        if self.path is None or not self.path.exists():
+            return
+        lines = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Última línea cortada por una parada brusca
+                    continue
+                lines += 1
+                if len(record) == 1:
+                    self._seq = max(self._seq, record[0])
+                    continue
+                seq, ts, distributor, part_number, currency, quantity, price = record
+                self._record((distributor, part_number, currency), ts, quantity, price, seq=seq)
+        if lines > 2 * self.points + 1000:
+            self.compact()
+
+    def compact(self):
+        """Reescribe el log de forma atómica con solo los puntos retenidos"""
+        if self.path is None:
+            return
+        self.save()
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix=self.path.name)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps([self._seq]) + "\n")
+            for key, history in self._parts.items():
+                for ts, quantity, price in history.points():
+                    f.write(json.dumps([0, ts, *key, quantity, price], separators=(",", ":"), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        logger.info("Compacted price history log", extra={"parts": len(self._parts), "points": self.points})
+
+
+_stores: Dict[str, PriceHistoryStore] = {}
+
+
+def get_history_store(settings: Settings) -> Optional[PriceHistoryStore]:
+    """Obtiene el histórico de precio y stock del proceso o None si está desactivado"""
+    if not settings.history_enabled:
+        return None
+    store = _stores.get(settings.history_path)
+    if store is None:
+        store = PriceHistoryStore(
+            settings.history_path or None,
+            max_parts=settings.history_max_parts,
+            max_points_per_part=settings.history_max_points_per_part,
+            feed_size=settings.history_feed_size
+        )
+        try:
+            store.load()
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring price history log: %s", e)
+        _stores[settings.history_path] = store
+    return store
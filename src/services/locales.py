@@ -0,0 +1,64 @@
+from typing import List, Optional
+
+
+# Moneda local de cada sitio de DigiKey
+SITE_CURRENCIES = {
+    "US": "USD",
+    "CA": "CAD",
+    "MX": "USD",
+    "BR": "USD",
+    "UK": "GBP",
+    "IE": "EUR",
+    "DE": "EUR",
+    "FR": "EUR",
+    "ES": "EUR",
+    "IT": "EUR",
+    "NL": "EUR",
+    "BE": "EUR",
+    "AT": "EUR",
+    "FI": "EUR",
+    "CH": "CHF",
+    "SE": "SEK",
+    "DK": "DKK",
+    "NO": "NOK",
+    "PL": "PLN",
+    "CZ": "CZK",
+    "HU": "HUF",
+    "IL": "ILS",
+    "JP": "JPY",
+    "CN": "CNY",
+    "HK": "HKD",
+    "TW": "TWD",
+    "KR": "KRW",
+    "SG": "SGD",
+    "IN": "INR",
+    "TH": "THB",
+    "PH": "PHP",
+    "MY": "MYR",
+    "AU": "AUD",
+    "NZ": "NZD",
+    "ZA": "ZAR",
+}
+
+# Sitios consultados como mucho en una sola petición
+MAX_LOCALE_SITES = 12
+
+
+def parse_locale_sites(value: Optional[str]) -> List[str]:
+    """
+    Sitios de una lista separada por comas, en mayúsculas y sin duplicados
+
+    Raises:
+        ValueError: Si hay más de MAX_LOCALE_SITES sitios
+    """
+    if not value:
+        return []
+    sites = list(dict.fromkeys(site.strip().upper() for site in value.split(",") if site.strip()))
+    if len(sites) > MAX_LOCALE_SITES:
+        raise ValueError(f"At most {MAX_LOCALE_SITES} locale sites per request")
+    return sites
+
+
+def site_currency(site: str, default: str = "USD") -> str:
+    """Moneda local del sitio o default si no se conoce"""
+    return SITE_CURRENCIES.get(site.upper(), default)
@@ -0,0 +1,68 @@
+from threading import Lock
+from typing import Dict, Tuple, Any
+
+
+def _series(name: str, labels: Dict[str, Any]) -> str:
+    """Nombre de serie al estilo Prometheus: name{a="x",b="y"}"""
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{labels[key]}"' for key in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+class Metrics:
+    """
+    Registro de métricas del proceso: contadores, valores instantáneos y
+    resúmenes (count/sum/max) de observaciones como latencias.
+
+    Las series se identifican por nombre y etiquetas; el snapshot se expone
+    como JSON en /metrics.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Tuple[int, float, float]] = {}
+
+    def increment(self, name: str, value: float = 1, **labels):
+        series = _series(name, labels)
+        with self._lock:
+            self._counters[series] = self._counters.get(series, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        self._gauges[_series(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        series = _series(name, labels)
+        with self._lock:
+            count, total, maximum = self._summaries.get(series, (0, 0.0, 0.0))
+            self._summaries[series] = (count + 1, total + value, max(maximum, value))
+
+    def counter(self, name: str, **labels) -> float:
+        return self._counters.get(_series(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            summaries = {
+                series: {
+                    "count": count,
+                    "sum": round(total, 3),
+                    "avg": round(total / count, 3) if count else 0.0,
+                    "max": round(maximum, 3)
+                }
+                for series, (count, total, maximum) in self._summaries.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": summaries
+            }
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Obtiene el registro de métricas del proceso"""
+    return _metrics
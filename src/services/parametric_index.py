@@ -0,0 +1,257 @@
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple, Union
+
+import numpy as np
+
+from models.base import GenericComponent, ParametricFilter
+from services.compact import CompactComponent
+from services.units import parse_quantity
+from config import Settings
+
+
+def normalize_parameter_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+class _Column:
+    """
+    Columna dispersa de un parámetro: pares (fila, valor) en arrays NumPy
+    que crecen por duplicación de capacidad.
+    """
+
+    def __init__(self, dtype):
+        self.rows = np.empty(16, dtype=np.int32)
+        self.values = np.empty(16, dtype=dtype)
+        self.size = 0
+        self._slots: Dict[int, int] = {}
+
+    def upsert(self, row: int, value):
+        slot = self._slots.get(row)
+        if slot is None:
+            if self.size == len(self.rows):
+                self.rows = np.resize(self.rows, self.size * 2)
+                self.values = np.resize(self.values, self.size * 2)
+            slot = self.size
+            self.size += 1
+            self._slots[row] = slot
+            self.rows[slot] = row
+        self.values[slot] = value
+        self._on_change()
+
+    def remove(self, row: int):
+        """Quita la fila de la columna (el último par ocupa su hueco)"""
+        slot = self._slots.pop(row, None)
+        if slot is None:
+            return
+        last = self.size - 1
+        if slot != last:
+            moved_row = int(self.rows[last])
+            self.rows[slot] = moved_row
+            self.values[slot] = self.values[last]
+            self._slots[moved_row] = slot
+        self.size = last
+        self._on_change()
+
+    def _on_change(self):
+        pass
+
+
+class _NumericColumn(_Column):
+    """Columna de valores SI con vista ordenada para consultas por rango"""
+
+    def __init__(self):
+        super().__init__(np.float64)
+        self._sorted_values: Optional[np.ndarray] = None
+        self._sorted_rows: Optional[np.ndarray] = None
+
+    def _on_change(self):
+        self._sorted_values = None
+
+    def range(self, low: float, high: float) -> np.ndarray:
+        """Filas con low <= valor <= high en O(log n + k)"""
+        if self._sorted_values is None:
+            order = np.argsort(self.values[:self.size], kind="stable")
+            self._sorted_values = self.values[:self.size][order]
+            self._sorted_rows = self.rows[:self.size][order]
+        start = np.searchsorted(self._sorted_values, low, side="left")
+        end = np.searchsorted(self._sorted_values, high, side="right")
+        return self._sorted_rows[start:end]
+
+
+class _TextColumn(_Column):
+    """Columna categórica: cada valor distinto se codifica como un entero"""
+
+    def __init__(self):
+        super().__init__(np.int32)
+        self.vocabulary: Dict[str, int] = {}
+
+    def upsert_text(self, row: int, text: str):
+        code = self.vocabulary.setdefault(text.lower(), len(self.vocabulary))
+        self.upsert(row, code)
+
+    def contains(self, fragment: str) -> np.ndarray:
+        """Filas cuyo valor contiene fragment (sin distinguir mayúsculas)"""
+        fragment = fragment.lower()
+        codes = [code for text, code in self.vocabulary.items() if fragment in text]
+        if not codes:
+            return np.empty(0, dtype=np.int32)
+        mask = np.isin(self.values[:self.size], codes)
+        return self.rows[:self.size][mask]
+
+
+class ParametricIndex:
+    """
+    Índice columnar en memoria sobre los parámetros técnicos de los
+    componentes vistos por el servicio.
+
+    Cada nombre de parámetro tiene una columna numérica (valores SI) y otra
+    categórica; las consultas combinan rangos y coincidencias de texto
+    intersecando máscaras booleanas sobre las filas. Las filas guardan la
+    forma compacta del componente; solo la página pedida se convierte a
+    GenericComponent.
+
+    Como mucho hay max_parts filas (0 = sin límite): al llegar una parte
+    nueva con el índice lleno se retira la actualizada hace más tiempo y
+    su fila se reutiliza.
+    """
+
+    def __init__(self, max_parts: int = 0):
+        self.max_parts = max_parts
+        self._components: List[CompactComponent] = []
+        self.memory_bytes = 0
+        # Clave -> fila, de la actualizada hace más tiempo a la más reciente
+        self._row_ids: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        # Columnas en las que tiene valor cada fila
+        self._row_columns: List[Tuple[_Column, ...]] = []
+        self._numeric: Dict[str, _NumericColumn] = {}
+        self._text: Dict[str, _TextColumn] = {}
+
+    def __len__(self) -> int:
+        return len(self._row_ids)
+
+    def add_components(self, components: List[GenericComponent]):
+        """Añade o actualiza componentes en el índice"""
+        for component in components:
+            key = (component.distributor, component.distributor_part_number)
+            compact = CompactComponent.from_component(component)
+            self.memory_bytes += compact.memory_bytes()
+            row = self._row_ids.get(key)
+            if row is not None:
+                self._row_ids.move_to_end(key)
+                self._clear_row(row)
+                self._components[row] = compact
+            elif self.max_parts and len(self._row_ids) >= self.max_parts:
+                _, row = self._row_ids.popitem(last=False)
+                self._clear_row(row)
+                self._row_ids[key] = row
+                self._components[row] = compact
+            else:
+                row = len(self._components)
+                self._row_ids[key] = row
+                self._components.append(compact)
+                self._row_columns.append(())
+
+            columns = []
+            for param in component.parameters:
+                name = normalize_parameter_name(param.name)
+                if param.numeric_value is not None:
+                    column = self._numeric.get(name)
+                    if column is None:
+                        column = self._numeric[name] = _NumericColumn()
+                    column.upsert(row, param.numeric_value)
+                    columns.append(column)
+                column = self._text.get(name)
+                if column is None:
+                    column = self._text[name] = _TextColumn()
+                column.upsert_text(row, param.value)
+                columns.append(column)
+            self._row_columns[row] = tuple(columns)
+
+    def _clear_row(self, row: int):
+        """Retira la fila de todas sus columnas y descuenta su memoria"""
+        for column in self._row_columns[row]:
+            column.remove(row)
+        self._row_columns[row] = ()
+        self.memory_bytes -= self._components[row].memory_bytes()
+
+    def _resolve_columns(self, name: str, columns: Dict[str, _Column]) -> List[_Column]:
+        """Nombre exacto o, si no existe, todas las columnas que empiezan por él"""
+        name = normalize_parameter_name(name)
+        if name in columns:
+            return [columns[name]]
+        return [column for column_name, column in columns.items() if column_name.startswith(name)]
+
+    @staticmethod
+    def _bound(value: Optional[Union[float, str]], default: float) -> float:
+        if value is None:
+            return default
+        if isinstance(value, (int, float)):
+            return float(value)
+        number, _ = parse_quantity(value)
+        if number is None:
+            raise ValueError(f"Invalid parametric bound: {value!r}")
+        return number
+
+    def _filter_rows(self, parametric_filter: ParametricFilter) -> np.ndarray:
+        matches = []
+        if parametric_filter.min is not None or parametric_filter.max is not None:
+            low = self._bound(parametric_filter.min, -np.inf)
+            high = self._bound(parametric_filter.max, np.inf)
+            for column in self._resolve_columns(parametric_filter.name, self._numeric):
+                matches.append(column.range(low, high))
+        if parametric_filter.value is not None:
+            text_rows = [
+                column.contains(parametric_filter.value)
+                for column in self._resolve_columns(parametric_filter.name, self._text)
+            ]
+            text_rows = np.concatenate(text_rows) if text_rows else np.empty(0, dtype=np.int32)
+            if parametric_filter.min is not None or parametric_filter.max is not None:
+                numeric_rows = np.concatenate(matches) if matches else np.empty(0, dtype=np.int32)
+                return np.intersect1d(numeric_rows, text_rows)
+            return text_rows
+        if not matches:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(matches)
+
+    def search(
+        self,
+        filters: List[ParametricFilter],
+        max_results: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[GenericComponent], int]:
+        """
+        Busca componentes que cumplan todas las condiciones
+
+        Args:
+            filters: Condiciones por parámetro (se combinan con AND)
+            max_results: Número máximo de componentes devueltos
+            offset: Offset para paginación
+
+        Returns:
+            (componentes de la página, total de coincidencias)
+
+        Raises:
+            ValueError: Si un límite no es un número ni una cantidad válida
+        """
+        mask = np.ones(len(self._components), dtype=bool)
+        for parametric_filter in filters:
+            filter_mask = np.zeros(len(self._components), dtype=bool)
+            filter_mask[self._filter_rows(parametric_filter)] = True
+            mask &= filter_mask
+
+        rows = np.flatnonzero(mask)
+        page = rows[offset:offset + max_results]
+        return [self._components[row].to_component() for row in page], int(len(rows))
+
+
+_indexes: Dict[str, ParametricIndex] = {}
+
+
+def get_parametric_index(settings: Settings) -> Optional[ParametricIndex]:
+    """Obtiene el índice paramétrico del proceso o None si está desactivado"""
+    if not settings.parametric_index_enabled:
+        return None
+    index = _indexes.get("default")
+    if index is None:
+        index = _indexes["default"] = ParametricIndex(max_parts=settings.parametric_index_max_parts)
+    return index
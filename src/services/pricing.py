@@ -0,0 +1,176 @@
+from bisect import bisect_right
+from typing import Optional, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from models.base import GenericComponent, PriceBreak
+
+
+# Las claves de búsqueda empaquetan (fila, cantidad) en un int64
+_QUANTITY_BITS = 32
+_MAX_QUANTITY = (1 << _QUANTITY_BITS) - 1
+
+# Embalajes que solo se venden en múltiplos de la bobina completa
+_FULL_REEL_PACKAGING = ("tape & reel", "tape and reel")
+
+
+def order_multiple_for(packaging: Optional[str], standard_package: Optional[int]) -> int:
+    """Múltiplo de pedido: la bobina estándar en Tape & Reel, 1 en el resto"""
+    if not packaging or not standard_package or standard_package <= 1:
+        return 1
+    name = packaging.lower()
+    if "digi-reel" in name or "cut tape" in name:
+        return 1
+    if any(reel in name for reel in _FULL_REEL_PACKAGING):
+        return standard_package
+    return 1
+
+
+def order_quantity(requested: int, minimum_order_quantity: int = 1, order_multiple: int = 1) -> int:
+    """Cantidad a pedir: al menos el MOQ y redondeada al múltiplo de pedido"""
+    quantity = max(requested, minimum_order_quantity, 1)
+    multiple = max(order_multiple, 1)
+    return -(-quantity // multiple) * multiple
+
+
+def unit_price_at(price_breaks: Sequence[PriceBreak], quantity: int) -> Optional[float]:
+    """
+    Precio unitario del tramo aplicable a quantity
+
+    Por debajo del primer tramo se aplica el primero. Los tramos pueden
+    venir en cualquier orden.
+    """
+    if not price_breaks:
+        return None
+    tiers = sorted(price_breaks, key=lambda pb: pb.quantity)
+    index = bisect_right([pb.quantity for pb in tiers], quantity) - 1
+    return tiers[max(index, 0)].unit_price
+
+
+class PriceTable:
+    """
+    Tramos de precio de muchos componentes empaquetados en arrays NumPy.
+
+    Los tramos de todas las filas se guardan contiguos (formato CSR):
+    offsets[i]:offsets[i + 1] delimita los de la fila i, ordenados por
+    cantidad. La búsqueda del tramo de cada línea es un único searchsorted
+    sobre claves (fila << 32 | cantidad), de modo que calcular el precio
+    de miles de líneas cuesta unas pocas operaciones vectorizadas.
+    """
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        break_quantities: np.ndarray,
+        unit_prices: np.ndarray,
+        minimum_order_quantities: np.ndarray,
+        order_multiples: np.ndarray
+    ):
+        self.offsets = offsets
+        self.break_quantities = break_quantities
+        self.unit_prices = unit_prices
+        self.minimum_order_quantities = minimum_order_quantities
+        self.order_multiples = order_multiples
+        rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+        self._keys = (rows << _QUANTITY_BITS) | break_quantities
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def from_components(cls, components: Sequence[GenericComponent]) -> "PriceTable":
+        """
+        Construye la tabla con una fila por componente
+
+        Un componente sin tramos pero con unit_price se trata como un
+        único tramo desde su MOQ; sin ninguno de los dos, su precio es NaN.
+        """
+        counts = np.zeros(len(components), dtype=np.int64)
+        quantities: List[int] = []
+        prices: List[float] = []
+        minimums = np.empty(len(components), dtype=np.int64)
+        multiples = np.empty(len(components), dtype=np.int64)
+        for row, component in enumerate(components):
+            minimums[row] = max(component.minimum_order_quantity, 1)
+            multiples[row] = max(component.order_multiple, 1)
+            tiers = component.price_breaks
+            if tiers:
+                for pb in sorted(tiers, key=lambda pb: pb.quantity):
+                    quantities.append(min(max(pb.quantity, 0), _MAX_QUANTITY))
+                    prices.append(pb.unit_price)
+                counts[row] = len(tiers)
+            elif component.unit_price is not None:
+                quantities.append(int(minimums[row]))
+                prices.append(component.unit_price)
+                counts[row] = 1
+
+        offsets = np.zeros(len(components) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(
+            offsets,
+            np.asarray(quantities, dtype=np.int64),
+            np.asarray(prices, dtype=np.float64),
+            minimums,
+            multiples
+        )
+
+    def _rows(self, rows: Optional[np.ndarray]) -> np.ndarray:
+        if rows is None:
+            return np.arange(len(self), dtype=np.int64)
+        return np.asarray(rows, dtype=np.int64)
+
+    def order_quantities(
+        self,
+        quantities: Union[int, np.ndarray],
+        rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Cantidades a pedir por línea (MOQ y múltiplo de pedido aplicados)
+
+        Args:
+            quantities: Cantidad pedida, escalar o una por línea
+            rows: Fila de la tabla de cada línea; por defecto una línea por fila
+        """
+        quantities = np.asarray(quantities, dtype=np.int64)
+        rows = self._rows(rows)
+        wanted = np.maximum(quantities, self.minimum_order_quantities[rows])
+        multiples = self.order_multiples[rows]
+        return -(-wanted // multiples) * multiples
+
+    def unit_prices_at(self, quantities: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Precio unitario del tramo aplicable a cada (fila, cantidad); NaN sin precio"""
+        quantities = np.minimum(np.asarray(quantities, dtype=np.int64), _MAX_QUANTITY)
+        rows = np.asarray(rows, dtype=np.int64)
+        positions = np.searchsorted(self._keys, (rows << _QUANTITY_BITS) | quantities, side="right") - 1
+        first = self.offsets[rows]
+        has_price = self.offsets[rows + 1] > first
+        # Por debajo del primer tramo se aplica el primero
+        positions = np.maximum(positions, first)
+        if not len(self.unit_prices):
+            return np.full(rows.shape, np.nan)
+        prices = self.unit_prices[np.minimum(positions, len(self.unit_prices) - 1)]
+        return np.where(has_price, prices, np.nan)
+
+    def price(
+        self,
+        quantities: Union[int, np.ndarray],
+        rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Precio de cada línea en una pasada vectorizada
+
+        Args:
+            quantities: Cantidad pedida, escalar o una por línea
+            rows: Fila de la tabla de cada línea; por defecto una línea por fila
+
+        Returns:
+            (cantidad a pedir, precio unitario, precio extendido) por línea;
+            los componentes sin precio dan NaN
+        """
+        quantities = np.asarray(quantities, dtype=np.int64)
+        rows = self._rows(rows)
+        quantities = np.broadcast_to(quantities, rows.shape)
+        ordered = self.order_quantities(quantities, rows)
+        unit = self.unit_prices_at(ordered, rows)
+        extended = np.round(unit * ordered, 2)
+        return ordered, unit, extended
@@ -0,0 +1,139 @@
+import json
+import logging
+import queue
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from time import time
+from typing import Optional, Dict
+
+from config import Settings
+
+
+QUERY_KIND_SEARCH = "search"
+QUERY_KIND_DETAILS = "details"
+QUERY_KIND_COMPARE = "compare"
+
+# Resultado de la cache para una consulta
+CACHE_HIT = "hit"
+CACHE_STALE = "stale"
+CACHE_NEGATIVE = "negative"
+CACHE_MISS = "miss"
+CACHE_ERROR = "error"
+
+_STOP = object()
+
+
+def normalize_query_key(kind: str, text: str) -> str:
+    """Clave normalizada: palabras en minúsculas; los números de parte solo se recortan"""
+    if kind == QUERY_KIND_DETAILS:
+        return text.strip()
+    return " ".join(text.lower().split())
+
+
+class QueryLogger:
+    """
+    Registro de consultas en ficheros JSONL rotados por tamaño.
+
+    record() solo encola la entrada y nunca bloquea el event loop: un hilo
+    dedicado escribe en disco y, si la cola se llena (disco lento), las
+    entradas se descartan y se cuentan en dropped.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10_000_000, backup_count: int = 5, queue_size: int = 10000):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        kind: str,
+        key: str,
+        latency_ms: float,
+        cache: str,
+        **fields
+    ):
+        """
+        Encola una consulta para el registro
+
+        Args:
+            kind: "search", "details" o "compare"
+            key: Palabras clave, número de parte o MPN (se normaliza)
+            latency_ms: Duración de la consulta
+            cache: Resultado de la cache (hit, stale, negative, miss, error)
+            **fields: Distribuidor, locale, paginación, consumidor...
+        """
+        entry = {
+            "ts": round(time(), 3),
+            "kind": kind,
+            "key": normalize_query_key(kind, key),
+            "latency_ms": round(latency_ms, 2),
+            "cache": cache,
+        }
+        entry.update(fields)
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            self.path,
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding="utf-8",
+            delay=True
+        )
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is _STOP:
+                    return
+                line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+                handler.emit(logging.makeLogRecord({"msg": line}))
+        finally:
+            handler.close()
+
+    def close(self, timeout: float = 5.0):
+        """Vacía la cola y detiene el hilo escritor"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+_loggers: Dict[str, QueryLogger] = {}
+
+
+def get_query_logger(settings: Settings) -> Optional[QueryLogger]:
+    """Obtiene el registro de consultas del proceso o None si está desactivado"""
+    if not settings.query_log_enabled or not settings.query_log_path:
+        return None
+    logger = _loggers.get(settings.query_log_path)
+    if logger is None:
+        logger = _loggers[settings.query_log_path] = QueryLogger(
+            settings.query_log_path,
+            max_bytes=settings.query_log_max_bytes,
+            backup_count=settings.query_log_backup_count
+        )
+    return logger
+
+
+def close_query_loggers():
+    for logger in _loggers.values():
+        logger.close()
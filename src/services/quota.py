@@ -0,0 +1,222 @@
+import math
+from contextvars import ContextVar
+from time import time
+from typing import Dict, Any, Optional, Mapping
+
+from services.metrics import get_metrics
+from config import Settings
+
+
+ANONYMOUS_CONSUMER = "anonymous"
+# Cuenta compartida por todas las API keys no configuradas
+UNKNOWN_KEY_CONSUMER = "unknown"
+API_KEY_HEADER = "x-api-key"
+CONSUMER_HEADER = "x-consumer-id"
+
+# Consumidor al que se cargan las llamadas al distribuidor del contexto actual
+current_consumer: ContextVar[Optional[str]] = ContextVar("current_consumer", default=None)
+
+
+class QuotaExceededError(Exception):
+    """Un consumidor ha agotado su presupuesto en la ventana actual"""
+
+    def __init__(self, consumer: str, budget: str, retry_after: float):
+        super().__init__(f"Consumer {consumer} exceeded its {budget} quota")
+        self.consumer = consumer
+        self.budget = budget
+        self.retry_after = retry_after
+
+
+class SlidingWindowCounter:
+    """
+    Contador de ventana deslizante aproximada (dos ventanas fijas).
+
+    La cuenta es la de la ventana actual más la de la anterior ponderada por
+    la fracción de ésta que aún cae dentro de la ventana deslizante; usa
+    memoria constante por consumidor.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window = window_seconds
+        self._index = 0
+        self._current = 0
+        self._previous = 0
+
+    def _roll(self, now: float):
+        index = int(now // self.window)
+        if index != self._index:
+            self._previous = self._current if index == self._index + 1 else 0
+            self._current = 0
+            self._index = index
+
+    def count(self, now: float) -> float:
+        self._roll(now)
+        elapsed = (now % self.window) / self.window
+        return self._previous * (1 - elapsed) + self._current
+
+    def add(self, now: float, amount: int = 1):
+        self._roll(now)
+        self._current += amount
+
+    def retry_after(self, limit: int, now: float) -> float:
+        """Segundos hasta que la cuenta baje de limit"""
+        self._roll(now)
+        remaining_in_window = self.window - (now % self.window)
+        if self._current >= limit or not self._previous:
+            return remaining_in_window
+        # previous * (1 - t) + current < limit  =>  t > 1 - (limit - current) / previous
+        target = 1 - (limit - self._current) / self._previous
+        elapsed = (now % self.window) / self.window
+        return max((target - elapsed) * self.window, 1.0)
+
+
+class ConsumerUsage:
+    def __init__(self, window_seconds: float, request_limit: int, upstream_limit: int):
+        self.request_limit = request_limit
+        self.upstream_limit = upstream_limit
+        self.requests = SlidingWindowCounter(window_seconds)
+        self.upstream_calls = SlidingWindowCounter(window_seconds)
+        self.rejected = 0
+
+    def is_idle(self, now: float) -> bool:
+        """Sin uso que cuente ya en la ventana deslizante"""
+        return not self.requests.count(now) and not self.upstream_calls.count(now)
+
+
+class QuotaManager:
+    """
+    Contabilidad y límites por consumidor de la API.
+
+    Cada consumidor (identificado por API key o cabecera) tiene un
+    presupuesto de peticiones a esta API y otro de llamadas al distribuidor
+    en una ventana deslizante; un límite 0 significa sin límite, pero el uso
+    se contabiliza igualmente. Los contadores son del proceso y los de
+    consumidores sin uso en la ventana se descartan una vez por ventana.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 86400,
+        requests_per_window: int = 0,
+        upstream_calls_per_window: int = 0,
+        api_keys: Optional[Mapping[str, str]] = None,
+        overrides: Optional[Mapping[str, Mapping[str, int]]] = None,
+        trust_consumer_header: bool = False
+    ):
+        self.window_seconds = window_seconds
+        self.requests_per_window = requests_per_window
+        self.upstream_calls_per_window = upstream_calls_per_window
+        self.api_keys = dict(api_keys or {})
+        self.overrides = {name: dict(limits) for name, limits in (overrides or {}).items()}
+        self.trust_consumer_header = trust_consumer_header
+        self._usage: Dict[str, ConsumerUsage] = {}
+        self._last_sweep = time()
+
+    def identify(self, headers: Mapping[str, str]) -> str:
+        """
+        Determina el consumidor de una petición
+
+        Una API key configurada se traduce a su nombre; todas las
+        desconocidas comparten la cuenta "unknown", para que cambiar de key
+        no renueve el presupuesto. Sin key, la cabecera X-Consumer-Id solo se
+        usa si trust_consumer_header (la pone un proxy de confianza); si no,
+        "anonymous".
+        """
+        api_key = headers.get(API_KEY_HEADER)
+        if api_key:
+            return self.api_keys.get(api_key) or UNKNOWN_KEY_CONSUMER
+        if self.trust_consumer_header:
+            return headers.get(CONSUMER_HEADER) or ANONYMOUS_CONSUMER
+        return ANONYMOUS_CONSUMER
+
+    def is_configured_key(self, headers: Mapping[str, str]) -> bool:
+        """Indica si la petición trae una API key de consumer_api_keys"""
+        api_key = headers.get(API_KEY_HEADER)
+        return bool(api_key) and api_key in self.api_keys
+
+    def _evict_idle(self, now: float):
+        """Descarta, como mucho una vez por ventana, los consumidores sin uso"""
+        if now - self._last_sweep < self.window_seconds:
+            return
+        self._last_sweep = now
+        for consumer in [name for name, usage in self._usage.items() if usage.is_idle(now)]:
+            del self._usage[consumer]
+
+    def _get_usage(self, consumer: str) -> ConsumerUsage:
+        usage = self._usage.get(consumer)
+        if usage is None:
+            self._evict_idle(time())
+            limits = self.overrides.get(consumer, {})
+            usage = self._usage[consumer] = ConsumerUsage(
+                self.window_seconds,
+                limits.get("requests", self.requests_per_window),
+                limits.get("upstream_calls", self.upstream_calls_per_window)
+            )
+        return usage
+
+    def _charge(self, consumer: str, budget: str):
+        now = time()
+        usage = self._get_usage(consumer)
+        counter = usage.requests if budget == "requests" else usage.upstream_calls
+        limit = usage.request_limit if budget == "requests" else usage.upstream_limit
+        if limit and counter.count(now) + 1 > limit:
+            usage.rejected += 1
+            get_metrics().increment("quota_rejected_total", consumer=consumer, budget=budget)
+            raise QuotaExceededError(consumer, budget, counter.retry_after(limit, now))
+        counter.add(now)
+
+    def charge_request(self, consumer: str):
+        """
+        Carga una petición a la API al consumidor
+
+        Raises:
+            QuotaExceededError: Si el consumidor agotó su presupuesto de peticiones
+        """
+        self._charge(consumer, "requests")
+
+    def charge_upstream(self, consumer: Optional[str] = None):
+        """
+        Carga una llamada al distribuidor al consumidor del contexto
+
+        Raises:
+            QuotaExceededError: Si el consumidor agotó su presupuesto de llamadas
+        """
+        consumer = consumer or current_consumer.get()
+        if consumer is None:
+            # Trabajo interno (precarga, refrescos) sin consumidor asociado
+            return
+        self._charge(consumer, "upstream_calls")
+
+    def usage(self) -> Dict[str, Any]:
+        """Uso actual de cada consumidor en la ventana deslizante"""
+        now = time()
+        return {
+            consumer: {
+                "requests": math.ceil(usage.requests.count(now)),
+                "requests_limit": usage.request_limit or None,
+                "upstream_calls": math.ceil(usage.upstream_calls.count(now)),
+                "upstream_calls_limit": usage.upstream_limit or None,
+                "rejected": usage.rejected,
+            }
+            for consumer, usage in sorted(self._usage.items())
+        }
+
+
+_managers: Dict[str, QuotaManager] = {}
+
+
+def get_quota_manager(settings: Settings) -> Optional[QuotaManager]:
+    """Obtiene la contabilidad de cuotas del proceso o None si está desactivada"""
+    if not settings.quota_enabled:
+        return None
+    manager = _managers.get("default")
+    if manager is None:
+        manager = _managers["default"] = QuotaManager(
+            window_seconds=settings.quota_window_seconds,
+            requests_per_window=settings.quota_requests_per_window,
+            upstream_calls_per_window=settings.quota_upstream_calls_per_window,
+            api_keys=settings.consumer_api_keys,
+            overrides=settings.consumer_quotas,
+            trust_consumer_header=settings.quota_trust_consumer_header
+        )
+    return manager
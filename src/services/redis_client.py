@@ -0,0 +1,162 @@
+import asyncio
+from time import monotonic
+from typing import Optional, Dict, Tuple, Any, List, Set
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - dependencia opcional
+    aioredis = None
+
+from config import Settings
+
+
+MEMORY_REDIS_URL = "memory://"
+
+
+class InMemoryPubSub:
+    """Suscripción de InMemoryRedis con la interfaz de redis.asyncio.client.PubSub"""
+
+    def __init__(self, server: "InMemoryRedis"):
+        self._server = server
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.channels: Set[str] = set()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.channels.add(channel)
+            self._server._subscribers.setdefault(channel, []).append(self)
+
+    async def unsubscribe(self, *channels: str):
+        for channel in channels or list(self.channels):
+            self.channels.discard(channel)
+            subscribers = self._server._subscribers.get(channel, [])
+            if self in subscribers:
+                subscribers.remove(self)
+
+    async def get_message(
+        self,
+        ignore_subscribe_messages: bool = True,
+        timeout: Optional[float] = 0.0
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            if not timeout:
+                return self._queue.get_nowait()
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except (asyncio.QueueEmpty, asyncio.TimeoutError):
+            return None
+
+    async def listen(self):
+        while True:
+            yield await self._queue.get()
+
+    async def reset(self):
+        await self.unsubscribe()
+
+    async def aclose(self):
+        await self.reset()
+
+
+class InMemoryRedis:
+    """
+    Sustituto en proceso de un servidor Redis.
+
+    Implementa el subconjunto de comandos que usa la aplicación con la misma
+    semántica que redis.asyncio (valores en bytes, SET con NX/PX), de forma
+    que los backends compartidos se puedan ejecutar y probar sin un servidor.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._subscribers: Dict[str, List[InMemoryPubSub]] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode("utf-8")
+
+    def _get_live(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._get_live(key)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        nx: bool = False,
+        px: Optional[int] = None,
+        ex: Optional[int] = None
+    ) -> Optional[bool]:
+        async with self._lock:
+            if nx and self._get_live(key) is not None:
+                return None
+            expires_at = None
+            if px is not None:
+                expires_at = monotonic() + px / 1000
+            elif ex is not None:
+                expires_at = monotonic() + ex
+            self._data[key] = (self._encode(value), expires_at)
+            return True
+
+    async def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+    async def publish(self, channel: str, message: Any) -> int:
+        subscribers = list(self._subscribers.get(channel, []))
+        payload = self._encode(message)
+        for subscriber in subscribers:
+            subscriber._queue.put_nowait({
+                "type": "message",
+                "channel": channel.encode("utf-8"),
+                "data": payload
+            })
+        return len(subscribers)
+
+    def pubsub(self) -> InMemoryPubSub:
+        return InMemoryPubSub(self)
+
+    async def aclose(self):
+        pass
+
+
+_clients: Dict[str, Any] = {}
+
+
+def get_redis_client(settings: Settings):
+    """
+    Obtiene el cliente Redis compartido por el proceso
+
+    Con redis_url = "memory://" se usa InMemoryRedis; cualquier otra URL
+    requiere el paquete opcional `redis`.
+    """
+    url = settings.redis_url
+    client = _clients.get(url)
+    if client is not None:
+        return client
+
+    if url.startswith(MEMORY_REDIS_URL):
+        client = InMemoryRedis()
+    else:
+        if aioredis is None:
+            raise RuntimeError(
+                "The 'redis' package is required for redis_url={url!r}; "
+                "install it with 'pip install \"redis>=4.2.0\"'".format(url=url)
+            )
+        client = aioredis.from_url(url)
+
+    _clients[url] = client
+    return client
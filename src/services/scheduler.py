@@ -0,0 +1,207 @@
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Deque, Dict, Optional, Tuple
+
+from services.metrics import get_metrics
+from config import Settings
+
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITY_BACKGROUND = "background"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK, PRIORITY_BACKGROUND)
+
+# Prioridad de las llamadas al distribuidor hechas desde el contexto actual
+upstream_priority: ContextVar[str] = ContextVar("upstream_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def priority_scope(priority: str):
+    """Ejecuta el bloque con la prioridad indicada para las llamadas al distribuidor"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority}")
+    token = upstream_priority.set(priority)
+    try:
+        yield
+    finally:
+        upstream_priority.reset(token)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def seconds_until_token(self) -> float:
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class UpstreamScheduler:
+    """
+    Planificador de las llamadas a un distribuidor con cuota compartida.
+
+    Cada llamada consume un token de un token bucket con el rate limit del
+    distribuidor. Las llamadas en espera se ordenan con weighted fair queuing
+    entre clases de prioridad (interactive, bulk, background), y las clases
+    no interactivas consumen además de un segundo bucket con el
+    (1 - interactive_reserve) del ritmo, de modo que una importación masiva
+    nunca deja sin cuota a las consultas de la interfaz.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int = 10,
+        interactive_reserve: float = 0.3,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.weights = weights or {
+            PRIORITY_INTERACTIVE: 8.0,
+            PRIORITY_BULK: 2.0,
+            PRIORITY_BACKGROUND: 1.0,
+        }
+        self._bucket = _TokenBucket(rate_per_second, burst)
+        shared_rate = rate_per_second * (1 - interactive_reserve)
+        self._shared_bucket = _TokenBucket(shared_rate, max(burst * (1 - interactive_reserve), 1.0))
+        self._queues: Dict[str, Deque[Tuple[float, asyncio.Future, float]]] = {
+            priority: deque() for priority in PRIORITIES
+        }
+        self._virtual_time = 0.0
+        self._last_tag: Dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def queue_depth(self, priority: str) -> int:
+        return sum(1 for _, waiter, _ in self._queues[priority] if not waiter.done())
+
+    def _eligible(self, priority: str) -> bool:
+        if self._bucket.tokens < 1:
+            return False
+        return priority == PRIORITY_INTERACTIVE or self._shared_bucket.tokens >= 1
+
+    def _consume(self, priority: str):
+        self._bucket.tokens -= 1
+        if priority != PRIORITY_INTERACTIVE:
+            self._shared_bucket.tokens -= 1
+
+    def _refund(self, priority: str):
+        self._bucket.tokens = min(self._bucket.capacity, self._bucket.tokens + 1)
+        if priority != PRIORITY_INTERACTIVE:
+            self._shared_bucket.tokens = min(self._shared_bucket.capacity, self._shared_bucket.tokens + 1)
+
+    async def acquire(self, priority: Optional[str] = None):
+        """
+        Espera turno para una llamada al distribuidor
+
+        Args:
+            priority: Clase de prioridad; por defecto la del contexto actual
+        """
+        priority = priority or upstream_priority.get()
+        metrics = get_metrics()
+        now = monotonic()
+        self._bucket.refill(now)
+        self._shared_bucket.refill(now)
+
+        if not any(self._queues.values()) and self._eligible(priority):
+            self._consume(priority)
+            metrics.increment("scheduler_dispatched_total", priority=priority)
+            metrics.observe("scheduler_wait_ms", 0.0, priority=priority)
+            return
+
+        # Etiqueta de fin virtual (WFQ): avanza 1/peso por llamada de la clase
+        tag = max(self._virtual_time, self._last_tag[priority]) + 1.0 / self.weights[priority]
+        self._last_tag[priority] = tag
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].append((tag, waiter, now))
+        self._report(priority)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Si ya se le había dado turno, el token se devuelve para el siguiente
+            if waiter.done() and not waiter.cancelled():
+                self._refund(priority)
+                self._dispatch()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            if waiter.cancelled():
+                # Un waiter abandonado en la cola bloquearía la vía rápida de acquire()
+                queue = self._queues[priority]
+                for index, (_, queued, _) in enumerate(queue):
+                    if queued is waiter:
+                        del queue[index]
+                        break
+                self._report(priority)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        metrics = get_metrics()
+        while True:
+            now = monotonic()
+            self._bucket.refill(now)
+            self._shared_bucket.refill(now)
+
+            heads = []
+            for priority, queue in self._queues.items():
+                while queue and queue[0][1].done():
+                    queue.popleft()
+                if queue:
+                    heads.append((queue[0][0], priority))
+            if not heads:
+                return
+
+            for _, priority in sorted(heads):
+                if self._eligible(priority):
+                    tag, waiter, enqueued_at = self._queues[priority].popleft()
+                    self._consume(priority)
+                    self._virtual_time = tag
+                    waiter.set_result(None)
+                    metrics.increment("scheduler_dispatched_total", priority=priority)
+                    metrics.observe("scheduler_wait_ms", (now - enqueued_at) * 1000, priority=priority)
+                    self._report(priority)
+                    break
+            else:
+                # Ninguna clase tiene cuota: se reintenta cuando llegue el siguiente token
+                delay = self._bucket.seconds_until_token()
+                if all(priority != PRIORITY_INTERACTIVE for _, priority in heads):
+                    delay = max(delay, self._shared_bucket.seconds_until_token())
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+
+    def _report(self, priority: str):
+        get_metrics().set_gauge("scheduler_queue_depth", self.queue_depth(priority), priority=priority)
+
+
+_schedulers: Dict[str, UpstreamScheduler] = {}
+
+
+def get_upstream_scheduler(settings: Settings) -> UpstreamScheduler:
+    """Obtiene el planificador de cuota de DigiKey compartido por el proceso"""
+    scheduler = _schedulers.get("digikey")
+    if scheduler is None:
+        scheduler = _schedulers["digikey"] = UpstreamScheduler(
+            rate_per_second=settings.digikey_rate_limit_per_minute / 60,
+            burst=settings.digikey_rate_burst,
+            interactive_reserve=settings.scheduler_interactive_reserve,
+            weights={
+                PRIORITY_INTERACTIVE: settings.scheduler_weight_interactive,
+                PRIORITY_BULK: settings.scheduler_weight_bulk,
+                PRIORITY_BACKGROUND: settings.scheduler_weight_background,
+            }
+        )
+    return scheduler
@@ -0,0 +1,406 @@
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from time import time
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Callable, Tuple
+
+import numpy as np
+
+from models.base import GenericComponent, PriceBreak, ComponentParameter
+from config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+# Cabecera: magic, versión y longitud del manifiesto JSON que la sigue
+_MAGIC = b"PSNP"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQ")
+# Alineación de cada columna (múltiplo del tamaño de cualquier dtype)
+_ALIGN = 64
+
+_STRING_FIELDS = (
+    "distributor",
+    "distributor_part_number",
+    "manufacturer",
+    "manufacturer_part_number",
+    "description",
+    "detailed_description",
+    "datasheet_url",
+    "product_url",
+    "image_url",
+    "packaging",
+    "series",
+    "product_status",
+    "rohs_status",
+    "lifecycle_status",
+)
+_INT_FIELDS = ("quantity_available", "minimum_order_quantity", "order_multiple")
+
+
+def _pack_strings(values: List[Optional[str]]) -> Dict[str, np.ndarray]:
+    """Columna de texto: offsets (n + 1), bytes UTF-8 y validez (None -> 0)"""
+    encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return {
+        "offsets": offsets,
+        "data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "valid": np.fromiter((value is not None for value in values), dtype=np.uint8, count=len(values)),
+    }
+
+
+def _pack_binary(values: List[bytes]) -> Dict[str, np.ndarray]:
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in values], out=offsets[1:])
+    return {"offsets": offsets, "data": np.frombuffer(b"".join(values), dtype=np.uint8)}
+
+
+def _build_columns(
+    components: List[GenericComponent],
+    tokenize: Optional[Callable[[GenericComponent], List[str]]]
+) -> Dict[str, np.ndarray]:
+    columns: Dict[str, np.ndarray] = {}
+
+    def add(prefix: str, parts: Dict[str, np.ndarray]):
+        for suffix, array in parts.items():
+            columns[f"{prefix}.{suffix}"] = array
+
+    for field in _STRING_FIELDS:
+        add(field, _pack_strings([getattr(c, field) for c in components]))
+    for field in _INT_FIELDS:
+        columns[field] = np.fromiter((getattr(c, field) for c in components), dtype=np.int64, count=len(components))
+    columns["unit_price"] = np.fromiter(
+        (np.nan if c.unit_price is None else c.unit_price for c in components),
+        dtype=np.float64,
+        count=len(components)
+    )
+
+    breaks = [pb for c in components for pb in c.price_breaks]
+    columns["breaks.offsets"] = np.zeros(len(components) + 1, dtype=np.int64)
+    np.cumsum([len(c.price_breaks) for c in components], out=columns["breaks.offsets"][1:])
+    columns["breaks.quantity"] = np.fromiter((pb.quantity for pb in breaks), dtype=np.int64, count=len(breaks))
+    columns["breaks.unit_price"] = np.fromiter((pb.unit_price for pb in breaks), dtype=np.float64, count=len(breaks))
+    columns["breaks.total_price"] = np.fromiter((pb.total_price for pb in breaks), dtype=np.float64, count=len(breaks))
+
+    parameters = [p for c in components for p in c.parameters]
+    columns["params.offsets"] = np.zeros(len(components) + 1, dtype=np.int64)
+    np.cumsum([len(c.parameters) for c in components], out=columns["params.offsets"][1:])
+    add("params.name", _pack_strings([p.name for p in parameters]))
+    add("params.value", _pack_strings([p.value for p in parameters]))
+    add("params.unit", _pack_strings([p.unit for p in parameters]))
+    columns["params.numeric"] = np.fromiter(
+        (np.nan if p.numeric_value is None else p.numeric_value for p in parameters),
+        dtype=np.float64,
+        count=len(parameters)
+    )
+
+    add("raw", _pack_binary([
+        zlib.compress(json.dumps(c.raw_data, separators=(",", ":")).encode("utf-8"), 6) if c.raw_data else b""
+        for c in components
+    ]))
+
+    # Filas ordenadas por (distribuidor, número de parte) para buscarlas por bisección
+    order = sorted(range(len(components)), key=lambda row: (
+        components[row].distributor.lower(),
+        components[row].distributor_part_number
+    ))
+    columns["key_order"] = np.asarray(order, dtype=np.int64)
+
+    if tokenize is not None:
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(len(components), dtype=np.int32)
+        for row, component in enumerate(components):
+            terms = Counter(tokenize(component))
+            lengths[row] = sum(terms.values())
+            for term, frequency in terms.items():
+                postings.setdefault(term, []).append((row, frequency))
+        terms = sorted(postings)
+        add("terms", _pack_strings(terms))
+        columns["postings.offsets"] = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=columns["postings.offsets"][1:])
+        flat = [item for term in terms for item in postings[term]]
+        columns["postings.docs"] = np.fromiter((row for row, _ in flat), dtype=np.int32, count=len(flat))
+        columns["postings.freqs"] = np.fromiter((freq for _, freq in flat), dtype=np.float64, count=len(flat))
+        columns["doc_lengths"] = lengths
+    return columns
+
+
+def write_snapshot(
+    path: str,
+    components: Iterable[GenericComponent],
+    tokenize: Optional[Callable[[GenericComponent], List[str]]] = None
+) -> int:
+    """
+    Escribe una instantánea columnar de los componentes
+
+    Cada campo es un array contiguo y alineado (los textos como offsets +
+    bytes UTF-8; tramos y parámetros en formato CSR), de modo que el lector
+    puede mapear el fichero y usar los arrays sin copiarlos. Con tokenize
+    se añaden las postings del índice de texto (BM25). La escritura es
+    atómica: los procesos que tengan mapeada la versión anterior siguen
+    leyéndola hasta que la reabran.
+
+    Args:
+        path: Fichero destino
+        components: Componentes a guardar (sin duplicados)
+        tokenize: Términos indexados de cada componente
+
+    Returns:
+        Número de componentes escritos
+    """
+    components = list(components)
+    columns = _build_columns(components, tokenize)
+
+    manifest: Dict[str, Any] = {
+        "version": _VERSION,
+        "rows": len(components),
+        "created_at": time(),
+        "columns": {},
+    }
+    position = 0
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array)
+        columns[name] = array
+        manifest["columns"][name] = {"dtype": array.dtype.str, "offset": position, "count": len(array)}
+        position += -(-array.nbytes // _ALIGN) * _ALIGN
+    manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+    data_start = -(-(_HEADER.size + len(manifest_bytes)) // _ALIGN) * _ALIGN
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(target.parent), prefix=target.name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(manifest_bytes)))
+            f.write(manifest_bytes)
+            f.write(b"\0" * (data_start - _HEADER.size - len(manifest_bytes)))
+            for name, array in columns.items():
+                data = array.tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % _ALIGN))
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(components)
+
+
+class _StringColumn:
+    """Vista de una columna de texto mapeada; decodifica solo las filas leídas"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, valid: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+        self.valid = valid
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        if not self.valid[row]:
+            return None
+        return self.data[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+
+class _SortedKeys:
+    """Secuencia (distribuidor, número de parte) en orden, para bisect"""
+
+    def __init__(self, snapshot: "CatalogSnapshot"):
+        self.snapshot = snapshot
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __getitem__(self, position: int) -> Tuple[str, str]:
+        return self.snapshot.key(int(self.snapshot.key_order[position]))
+
+
+class CatalogSnapshot:
+    """
+    Instantánea de componentes mapeada en memoria (solo lectura).
+
+    Abrirla solo lee la cabecera y el manifiesto: las páginas de cada
+    columna las carga el sistema operativo al acceder a ellas, y todos los
+    procesos que mapean el mismo fichero comparten esas páginas en la page
+    cache. Las filas se convierten a GenericComponent de una en una.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, manifest_length = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{path} is not a catalog snapshot")
+            manifest = json.loads(self._map[_HEADER.size:_HEADER.size + manifest_length])
+        except (struct.error, ValueError):
+            self._map.close()
+            raise
+        self.rows: int = manifest["rows"]
+        self.created_at: float = manifest["created_at"]
+        self._data_start = -(-(_HEADER.size + manifest_length) // _ALIGN) * _ALIGN
+        self._specs: Dict[str, Dict[str, Any]] = manifest["columns"]
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._strings: Dict[str, _StringColumn] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def has_postings(self) -> bool:
+        return "postings.docs" in self._specs
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._map)
+
+    def column(self, name: str) -> np.ndarray:
+        """Array de una columna sobre el fichero mapeado (sin copia)"""
+        array = self._arrays.get(name)
+        if array is None:
+            spec = self._specs[name]
+            array = np.frombuffer(
+                self._map,
+                dtype=np.dtype(spec["dtype"]),
+                count=spec["count"],
+                offset=self._data_start + spec["offset"]
+            )
+            self._arrays[name] = array
+        return array
+
+    def strings(self, name: str) -> _StringColumn:
+        column = self._strings.get(name)
+        if column is None:
+            column = self._strings[name] = _StringColumn(
+                self.column(f"{name}.offsets"),
+                self.column(f"{name}.data"),
+                self.column(f"{name}.valid")
+            )
+        return column
+
+    @property
+    def key_order(self) -> np.ndarray:
+        return self.column("key_order")
+
+    def key(self, row: int) -> Tuple[str, str]:
+        return (
+            self.strings("distributor")[row].lower(),
+            self.strings("distributor_part_number")[row]
+        )
+
+    def find(self, distributor: str, part_number: str) -> Optional[int]:
+        """Fila de un componente por distribuidor y número de parte, o None"""
+        key = (distributor.lower(), part_number)
+        position = bisect_left(_SortedKeys(self), key)
+        if position < self.rows:
+            row = int(self.key_order[position])
+            if self.key(row) == key:
+                return row
+        return None
+
+    def component(self, row: int) -> GenericComponent:
+        """Componente de una fila"""
+        values: Dict[str, Any] = {field: self.strings(field)[row] for field in _STRING_FIELDS}
+        for field in _INT_FIELDS:
+            values[field] = int(self.column(field)[row])
+        unit_price = float(self.column("unit_price")[row])
+        values["unit_price"] = None if math.isnan(unit_price) else unit_price
+
+        offsets = self.column("breaks.offsets")
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        values["price_breaks"] = [
+            PriceBreak(quantity=int(q), unit_price=float(u), total_price=float(t))
+            for q, u, t in zip(
+                self.column("breaks.quantity")[start:end],
+                self.column("breaks.unit_price")[start:end],
+                self.column("breaks.total_price")[start:end]
+            )
+        ]
+
+        offsets = self.column("params.offsets")
+        names, param_values, units = self.strings("params.name"), self.strings("params.value"), self.strings("params.unit")
+        numeric = self.column("params.numeric")
+        values["parameters"] = [
+            ComponentParameter(
+                name=names[i],
+                value=param_values[i],
+                unit=units[i],
+                numeric_value=None if math.isnan(numeric[i]) else float(numeric[i])
+            )
+            for i in range(int(offsets[row]), int(offsets[row + 1]))
+        ]
+
+        offsets = self.column("raw.offsets")
+        raw = self.column("raw.data")[offsets[row]:offsets[row + 1]].tobytes()
+        values["raw_data"] = json.loads(zlib.decompress(raw)) if raw else {}
+        return GenericComponent(**values)
+
+    def iter_components(self) -> Iterator[GenericComponent]:
+        for row in range(self.rows):
+            yield self.component(row)
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(filas, frecuencias) de un término del índice de texto, o None"""
+        if not self.has_postings:
+            return None
+        terms = self.strings("terms")
+        position = bisect_left(terms, term)
+        if position >= len(terms) or terms[position] != term:
+            return None
+        offsets = self.column("postings.offsets")
+        start, end = int(offsets[position]), int(offsets[position + 1])
+        return self.column("postings.docs")[start:end], self.column("postings.freqs")[start:end]
+
+    def close(self):
+        """
+        Libera el mapeo del fichero
+
+        Los arrays de column() son vistas sobre el mapeo: si el llamante
+        conserva alguna, el mapeo no se puede cerrar todavía (BufferError) y
+        se libera al recogerse la última vista. La instantánea no debe usarse
+        después de cerrarla.
+        """
+        self._arrays.clear()
+        self._strings.clear()
+        try:
+            self._map.close()
+        except BufferError:
+            logger.debug("Deferring close of catalog snapshot %s: column views still alive", self.path)
+
+
+_snapshots: Dict[str, Optional[CatalogSnapshot]] = {}
+
+
+def get_catalog_snapshot(settings: Settings) -> Optional[CatalogSnapshot]:
+    """
+    Instantánea del catálogo mapeada por el proceso, o None si no hay
+
+    Se abre una sola vez; un fichero ausente o inválido se ignora.
+    """
+    path = settings.snapshot_path
+    if not path:
+        return None
+    if path not in _snapshots:
+        snapshot = None
+        if Path(path).exists():
+            try:
+                snapshot = CatalogSnapshot(path)
+                logger.info(
+                    "Mapped catalog snapshot %s", path,
+                    extra={"rows": len(snapshot), "bytes": snapshot.size_bytes}
+                )
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring catalog snapshot %s: %s", path, e)
+        _snapshots[path] = snapshot
+    return _snapshots[path]
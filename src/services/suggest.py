@@ -0,0 +1,147 @@
+import heapq
+from bisect import bisect_left, insort
+from time import monotonic
+from typing import Optional, List, Dict, Tuple
+
+from models.base import GenericComponent, Suggestion
+from config import Settings
+
+
+SUGGESTION_KIND_MPN = "mpn"
+SUGGESTION_KIND_MANUFACTURER = "manufacturer"
+
+# Rangos de prefijo más grandes que esto se resuelven una vez y se cachean
+_SCAN_LIMIT = 2000
+_PREFIX_CACHE_TTL_SECONDS = 5.0
+_PREFIX_CACHE_MAX_ENTRIES = 4096
+# Espera antes de reintentar la carga del catálogo de fabricantes
+_CATALOG_RETRY_SECONDS = 60.0
+
+
+def normalize_prefix(text: str) -> str:
+    """Minúsculas y sin separadores: "LM358-D" -> "lm358d" """
+    return "".join(ch for ch in text.lower() if ch.isalnum())
+
+
+class PrefixSuggester:
+    """
+    Autocompletado de MPN y fabricantes sobre arrays ordenados con bisect.
+
+    Las claves normalizadas se mantienen ordenadas; un prefijo delimita un
+    rango contiguo del que se eligen los k términos más populares. Las
+    inserciones se acumulan y se fusionan en la siguiente consulta, y los
+    rangos muy grandes (prefijos de 1-2 caracteres) se cachean unos segundos
+    aunque lleguen términos nuevos entretanto.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, str]] = []  # (clave normalizada, tipo), ordenado
+        self._display: Dict[Tuple[str, str], str] = {}
+        self._weights: Dict[Tuple[str, str], float] = {}
+        self._pending: List[Tuple[str, str]] = []
+        self._prefix_cache: Dict[Tuple[str, Optional[str], int], Tuple[float, List[Suggestion]]] = {}
+        self.catalog_loaded = False
+        self._catalog_requested_at = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._display)
+
+    def add(self, text: str, kind: str, weight: float = 1.0):
+        """Registra un término o suma weight a su popularidad"""
+        key = normalize_prefix(text)
+        if not key:
+            return
+        entry = (key, kind)
+        if entry in self._display:
+            self._weights[entry] += weight
+            return
+        self._display[entry] = text
+        self._weights[entry] = weight
+        self._pending.append(entry)
+
+    def add_components(self, components: List[GenericComponent], weight: float = 1.0):
+        """Incorpora los MPN y fabricantes de componentes vistos en resultados"""
+        for component in components:
+            self.add(component.manufacturer_part_number, SUGGESTION_KIND_MPN, weight)
+            if component.manufacturer:
+                self.add(component.manufacturer, SUGGESTION_KIND_MANUFACTURER, weight)
+
+    def add_manufacturers(self, names: List[str]):
+        """Carga el catálogo de fabricantes del distribuidor con peso base"""
+        for name in names:
+            self.add(name, SUGGESTION_KIND_MANUFACTURER, 0.0)
+        self.catalog_loaded = True
+
+    def should_request_catalog(self) -> bool:
+        """True si hay que (re)intentar cargar el catálogo; limita los reintentos"""
+        if self.catalog_loaded:
+            return False
+        now = monotonic()
+        if now - self._catalog_requested_at < _CATALOG_RETRY_SECONDS:
+            return False
+        self._catalog_requested_at = now
+        return True
+
+    def _merge_pending(self):
+        if not self._pending:
+            return
+        if len(self._pending) < 64:
+            for entry in self._pending:
+                insort(self._keys, entry)
+        else:
+            self._keys.extend(self._pending)
+            self._keys.sort()
+        self._pending = []
+
+    def suggest(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[Suggestion]:
+        """
+        Devuelve las k terminaciones más populares de un prefijo
+
+        Args:
+            prefix: Texto tecleado por el usuario
+            limit: Número máximo de sugerencias
+            kind: "mpn", "manufacturer" o None para ambos
+
+        Returns:
+            Sugerencias ordenadas por popularidad descendente
+        """
+        key = normalize_prefix(prefix)
+        if not key:
+            return []
+        self._merge_pending()
+
+        start = bisect_left(self._keys, (key,))
+        end = bisect_left(self._keys, (key + "\uffff",))
+        if end - start > _SCAN_LIMIT:
+            cache_key = (key, kind, limit)
+            cached = self._prefix_cache.get(cache_key)
+            if cached is not None and monotonic() - cached[0] < _PREFIX_CACHE_TTL_SECONDS:
+                return cached[1]
+            suggestions = self._top(start, end, limit, kind)
+            if len(self._prefix_cache) >= _PREFIX_CACHE_MAX_ENTRIES:
+                self._prefix_cache.clear()
+            self._prefix_cache[cache_key] = (monotonic(), suggestions)
+            return suggestions
+        return self._top(start, end, limit, kind)
+
+    def _top(self, start: int, end: int, limit: int, kind: Optional[str]) -> List[Suggestion]:
+        candidates = (
+            entry for entry in self._keys[start:end]
+            if kind is None or entry[1] == kind
+        )
+        best = heapq.nlargest(limit, candidates, key=lambda entry: (self._weights[entry], -len(entry[0])))
+        return [
+            Suggestion(text=self._display[entry], kind=entry[1], weight=self._weights[entry])
+            for entry in best
+        ]
+
+
+_suggesters: Dict[str, PrefixSuggester] = {}
+
+
+def get_suggester(settings: Settings) -> PrefixSuggester:
+    """Obtiene el autocompletado compartido por el proceso"""
+    suggester = _suggesters.get("default")
+    if suggester is None:
+        suggester = _suggesters["default"] = PrefixSuggester()
+    return suggester
@@ -0,0 +1,352 @@
+import asyncio
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Iterator
+
+import numpy as np
+
+from models.base import GenericComponent
+from services.cache.serialization import dump_components, load_components
+from services.compact import CompactComponent
+from services.snapshot import CatalogSnapshot, get_catalog_snapshot
+from config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_FILE_MAGIC = b"FTI1"
+
+# Parámetros de BM25
+_K1 = 1.2
+_B = 0.75
+# Longitud mínima de los prefijos de MPN indexados ("stm3", "stm32", ...)
+_MIN_PREFIX = 4
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return _TOKEN.findall(text.lower())
+
+
+def _collapse(text: str) -> str:
+    """MPN sin separadores: "LM358-DR" -> "lm358dr" """
+    return "".join(tokenize(text))
+
+
+def component_tokens(component: GenericComponent) -> List[str]:
+    """
+    Términos indexados de un componente
+
+    El MPN aporta sus fragmentos y todos los prefijos de su forma compacta,
+    duplicados para pesar más que la descripción; el fabricante, la serie
+    y las descripciones aportan sus palabras.
+    """
+    mpn = _collapse(component.manufacturer_part_number)
+    mpn_terms = tokenize(component.manufacturer_part_number)
+    mpn_terms += [mpn[:i] for i in range(_MIN_PREFIX, len(mpn) + 1)]
+    mpn_terms += tokenize(component.distributor_part_number)
+
+    return (
+        mpn_terms * 2
+        + tokenize(component.manufacturer)
+        + tokenize(component.series)
+        + tokenize(component.description)
+        + tokenize(component.detailed_description)
+    )
+
+
+def query_tokens(keywords: str) -> List[str]:
+    tokens = tokenize(keywords)
+    collapsed = _collapse(keywords)
+    if len(tokens) > 1 and len(collapsed) >= _MIN_PREFIX:
+        tokens.append(collapsed)
+    return tokens
+
+
+class FullTextIndex:
+    """
+    Índice invertido incremental con ranking BM25 sobre todos los
+    componentes que han pasado por el servicio.
+
+    Los documentos se guardan en forma compacta (CompactComponent) y solo
+    la página de resultados se convierte a GenericComponent. Se persiste en
+    disco guardando solo los componentes en el formato binario compacto de
+    la cache; las listas de postings se reconstruyen al cargar porque la
+    tokenización es determinista.
+
+    Opcionalmente el índice se apoya en una instantánea del catálogo
+    mapeada en memoria (attach_snapshot): sus filas son los primeros
+    documentos, con postings leídas directamente del fichero, y los
+    componentes añadidos después las sustituyen. En ese caso save() solo
+    guarda lo añadido desde que se generó la instantánea.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.base: Optional[CatalogSnapshot] = None
+        # Filas de la instantánea sustituidas por documentos más recientes
+        self._shadowed: set = set()
+        self._shadowed_rows: Optional[np.ndarray] = None
+        self._components: List[CompactComponent] = []
+        self.memory_bytes = 0
+        self._doc_ids: Dict[Tuple[str, str], int] = {}
+        self._doc_terms: List[Counter] = []
+        self._doc_lengths: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # Copias NumPy de las postings y longitudes, regeneradas al cambiar
+        self._frozen_postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._frozen_lengths: Optional[np.ndarray] = None
+        self._total_length = 0
+        # Cambios hechos en memoria y cuántos de ellos están ya en disco
+        self._version = 0
+        self._saved_version = 0
+        self._write_lock = threading.Lock()
+
+    @property
+    def dirty(self) -> bool:
+        return self._version != self._saved_version
+
+    def __len__(self) -> int:
+        return self._base_count - len(self._shadowed) + len(self._components)
+
+    @property
+    def live_count(self) -> int:
+        """Documentos en memoria (los de la instantánea están mapeados del fichero)"""
+        return len(self._components)
+
+    @property
+    def _base_count(self) -> int:
+        return len(self.base) if self.base is not None else 0
+
+    def attach_snapshot(self, snapshot: CatalogSnapshot):
+        """Usa la instantánea como base del índice; debe llamarse con el índice vacío"""
+        if self._components or not snapshot.has_postings:
+            raise ValueError("A snapshot with postings can only be attached to an empty index")
+        self.base = snapshot
+        self._total_length = int(snapshot.column("doc_lengths").sum())
+        self._frozen_lengths = None
+
+    def _shadow(self, key: Tuple[str, str]):
+        """Retira de las búsquedas la fila de la instantánea con esa clave"""
+        row = self.base.find(*key)
+        if row is not None and row not in self._shadowed:
+            self._shadowed.add(row)
+            self._shadowed_rows = None
+            self._total_length -= int(self.base.column("doc_lengths")[row])
+
+    def add_components(self, components: List[GenericComponent]):
+        """Añade o reemplaza componentes en el índice"""
+        for component in components:
+            key = (component.distributor, component.distributor_part_number)
+            doc_id = self._doc_ids.get(key)
+            if doc_id is None and self.base is not None:
+                self._shadow(key)
+            terms = Counter(component_tokens(component))
+            compact = CompactComponent.from_component(component)
+            self.memory_bytes += compact.memory_bytes()
+
+            if doc_id is None:
+                doc_id = len(self._components)
+                self._doc_ids[key] = doc_id
+                self._components.append(compact)
+                self._doc_terms.append(Counter())
+                self._doc_lengths.append(0)
+            else:
+                self.memory_bytes -= self._components[doc_id].memory_bytes()
+                self._components[doc_id] = compact
+                for term in self._doc_terms[doc_id]:
+                    postings = self._postings[term]
+                    del postings[doc_id]
+                    self._frozen_postings.pop(term, None)
+                    if not postings:
+                        del self._postings[term]
+                self._total_length -= self._doc_lengths[doc_id]
+
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+                self._frozen_postings.pop(term, None)
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[doc_id]
+
+        if components:
+            self._frozen_lengths = None
+            self._version += 1
+
+    def _term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Postings de un término con identificadores globales (instantánea primero)"""
+        arrays = self._frozen_postings.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            base = self.base.postings(term) if self.base is not None else None
+            if not postings and base is None:
+                return None
+            live = (
+                np.fromiter(postings.keys(), dtype=np.int32, count=len(postings)) + self._base_count,
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            ) if postings else None
+            if base is None:
+                arrays = live
+            elif live is None:
+                arrays = base
+            else:
+                arrays = (np.concatenate((base[0], live[0])), np.concatenate((base[1], live[1])))
+            self._frozen_postings[term] = arrays
+        return arrays
+
+    def iter_components(self) -> Iterator[GenericComponent]:
+        """Documentos añadidos al índice (sin las filas de la instantánea base)"""
+        for compact in self._components:
+            yield compact.to_component()
+
+    def _document(self, doc_id: int) -> GenericComponent:
+        base_count = self._base_count
+        if doc_id < base_count:
+            return self.base.component(doc_id)
+        return self._components[doc_id - base_count].to_component()
+
+    def search(
+        self,
+        keywords: str,
+        max_results: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[GenericComponent], int]:
+        """
+        Busca componentes por palabras clave con ranking BM25
+
+        Returns:
+            (componentes de la página ordenados por relevancia, total de coincidencias)
+        """
+        terms = set(query_tokens(keywords))
+        doc_count = len(self)
+        if not terms or not doc_count:
+            return [], 0
+
+        if self._frozen_lengths is None:
+            live_lengths = np.asarray(self._doc_lengths, dtype=np.float64)
+            if self.base is not None:
+                live_lengths = np.concatenate((self.base.column("doc_lengths").astype(np.float64), live_lengths))
+            self._frozen_lengths = live_lengths
+        average_length = max(self._total_length / doc_count, 1.0)
+        length_norm = _K1 * (1 - _B + _B * self._frozen_lengths / average_length)
+        scores = np.zeros(len(self._frozen_lengths), dtype=np.float64)
+
+        for term in terms:
+            arrays = self._term_arrays(term)
+            if arrays is None:
+                continue
+            doc_ids, frequencies = arrays
+            idf = math.log(1 + (doc_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            # Cada documento aparece una vez por término, así que += es seguro
+            scores[doc_ids] += idf * frequencies * (_K1 + 1) / (frequencies + length_norm[doc_ids])
+
+        if self._shadowed:
+            if self._shadowed_rows is None:
+                self._shadowed_rows = np.fromiter(self._shadowed, dtype=np.int64, count=len(self._shadowed))
+            scores[self._shadowed_rows] = 0.0
+        matched = np.flatnonzero(scores)
+        wanted = offset + max_results
+        if len(matched) > wanted:
+            candidates = matched[np.argpartition(-scores[matched], wanted - 1)[:wanted]]
+        else:
+            candidates = matched
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [self._document(int(doc_id)) for doc_id in ranked[offset:]], int(len(matched))
+
+    def dump(self) -> Tuple[int, List[CompactComponent]]:
+        """
+        Documentos a guardar y versión a la que corresponden
+
+        Se llama desde el event loop. Los CompactComponent no se modifican
+        (un cambio sustituye el objeto), así que la copia de la lista basta
+        para serializar después en un hilo sin ver cambios a medias.
+        """
+        return self._version, list(self._components)
+
+    def write(self, version: int, components: List[CompactComponent], path: Optional[str] = None):
+        """
+        Serializa components y los escribe de forma atómica en path (o en el configurado)
+
+        En el fichero configurado no se escribe una versión anterior a la ya
+        guardada, y dirty solo se limpia cuando el fichero está reemplazado.
+        """
+        target = Path(path) if path else self.path
+        if target is None:
+            return
+        own_file = target == self.path
+        with self._write_lock:
+            if own_file and version < self._saved_version:
+                return
+            data = _FILE_MAGIC + dump_components([c.to_component() for c in components])
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(target.parent), prefix=target.name)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, target)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            if own_file:
+                self._saved_version = version
+
+    def save(self, path: Optional[str] = None):
+        """
+        Escribe el índice de forma atómica en path (o en el configurado)
+
+        Con una instantánea como base solo se guardan los documentos
+        añadidos encima de ella. Bloqueante: en el servicio se usa
+        save_async.
+        """
+        self.write(*self.dump(), path)
+
+    async def save_async(self):
+        """Guarda el índice sin bloquear el event loop: copia aquí y serializa y escribe en un hilo"""
+        version, components = self.dump()
+        await asyncio.to_thread(self.write, version, components)
+
+    def load(self, path: Optional[str] = None):
+        """Carga un índice guardado con save(); no hace nada si no existe"""
+        source = Path(path) if path else self.path
+        if source is None or not source.exists():
+            return
+        data = source.read_bytes()
+        if data[:len(_FILE_MAGIC)] != _FILE_MAGIC:
+            raise ValueError(f"{source} is not a full-text index file")
+        self.add_components(load_components(data[len(_FILE_MAGIC):]))
+        self._saved_version = self._version
+
+
+_indexes: Dict[str, FullTextIndex] = {}
+
+
+def get_text_index(settings: Settings) -> Optional[FullTextIndex]:
+    """
+    Obtiene el índice de texto del proceso, cargándolo de disco la primera vez
+
+    Returns:
+        El índice o None si text_index_enabled es False
+    """
+    if not settings.text_index_enabled:
+        return None
+    index = _indexes.get(settings.text_index_path)
+    if index is None:
+        index = FullTextIndex(settings.text_index_path or None)
+        snapshot = get_catalog_snapshot(settings)
+        if snapshot is not None and snapshot.has_postings:
+            index.attach_snapshot(snapshot)
+        try:
+            index.load()
+        except (ValueError, zlib.error) as e:
+            logger.warning("Ignoring full-text index file: %s", e)
+        _indexes[settings.text_index_path] = index
+    return index
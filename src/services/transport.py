@@ -0,0 +1,281 @@
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import zlib
+from pathlib import Path
+from time import perf_counter
+from typing import Optional, Dict, List, Any, Tuple
+
+import httpx
+
+from config import Settings
+
+
+TRANSPORT_MODE_LIVE = "live"
+TRANSPORT_MODE_RECORD = "record"
+TRANSPORT_MODE_REPLAY = "replay"
+
+# Cabeceras de la petición que forman parte de la clave de reproducción
+_KEY_HEADERS = (
+    "x-digikey-locale-language",
+    "x-digikey-locale-currency",
+    "x-digikey-locale-site",
+)
+
+# Cabeceras que no se pueden reutilizar porque el cuerpo se guarda ya decodificado
+_DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+
+class ReplayMissError(httpx.TransportError):
+    """No existe una respuesta grabada para la petición solicitada"""
+
+
+def _is_token_request(request: httpx.Request) -> bool:
+    return request.url.path.endswith("/oauth2/token")
+
+
+def _canonical_body(content: bytes) -> str:
+    """Normaliza el cuerpo JSON para que el orden de las claves no afecte a la clave"""
+    if not content:
+        return ""
+    try:
+        return json.dumps(json.loads(content), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
+
+
+def request_key(method: str, url: str, headers: Dict[str, str], body: str) -> str:
+    """
+    Calcula la clave con la que se graba y se busca una petición
+
+    Args:
+        method: Método HTTP
+        url: URL completa (incluye query string)
+        headers: Cabeceras de locale relevantes (en minúsculas)
+        body: Cuerpo canónico de la petición
+
+    Returns:
+        Hash estable de la petición
+    """
+    locale = "|".join(headers.get(name, "") for name in _KEY_HEADERS)
+    raw = f"{method.upper()} {url}\n{locale}\n{body}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _key_for_request(request: httpx.Request) -> str:
+    headers = {name: request.headers.get(name, "") for name in _KEY_HEADERS}
+    return request_key(request.method, str(request.url), headers, _canonical_body(request.content))
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte que reenvía las peticiones a la red y graba cada par
+    petición/respuesta en un fichero JSONL de solo anexado.
+
+    El token OAuth nunca se escribe: las peticiones al endpoint de token no se
+    graban y de las demás solo se guardan las cabeceras de locale.
+    """
+
+    def __init__(self, path: str, wrapped: Optional[httpx.AsyncBaseTransport] = None):
+        self.path = Path(path)
+        self._wrapped = wrapped or httpx.AsyncHTTPTransport()
+        self._write_lock = threading.Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = perf_counter()
+        response = await self._wrapped.handle_async_request(request)
+        body = await response.aread()
+        elapsed_ms = (perf_counter() - start) * 1000
+
+        headers = [
+            (name, value) for name, value in response.headers.items()
+            if name.lower() not in _DROPPED_RESPONSE_HEADERS
+        ]
+
+        if not _is_token_request(request):
+            entry = {
+                "key": _key_for_request(request),
+                "method": request.method,
+                "url": str(request.url),
+                "locale": {name: request.headers.get(name, "") for name in _KEY_HEADERS},
+                "status": response.status_code,
+                "headers": headers,
+                "elapsed_ms": round(elapsed_ms, 2),
+                "body_z": base64.b64encode(zlib.compress(body, 6)).decode("ascii"),
+            }
+            await asyncio.to_thread(self._append, entry)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=body,
+            request=request
+        )
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._write_lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+
+    async def aclose(self):
+        # El transporte se comparte entre clientes; se cierra con close()
+        pass
+
+    async def close(self):
+        await self._wrapped.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte que responde exclusivamente desde un fichero grabado por
+    RecordingTransport, sin ningún acceso a la red.
+
+    Si una misma petición se grabó varias veces, las respuestas se devuelven
+    en el orden de grabación de forma cíclica. Con latency_scale > 0 se
+    reproduce la latencia original multiplicada por ese factor.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 0.0):
+        self.path = Path(path)
+        self.latency_scale = latency_scale
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Una línea truncada al final del fichero no invalida el resto
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+
+    @property
+    def entry_count(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _next_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = (cursor + 1) % len(entries)
+        return entries[cursor]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if _is_token_request(request):
+            return httpx.Response(
+                status_code=200,
+                json={"access_token": "replay", "expires_in": 3600, "token_type": "Bearer"},
+                request=request
+            )
+
+        entry = self._next_entry(_key_for_request(request))
+        if entry is None:
+            raise ReplayMissError(
+                f"No recorded response for {request.method} {request.url}",
+                request=request
+            )
+
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry.get("elapsed_ms", 0) / 1000 * self.latency_scale)
+
+        return httpx.Response(
+            status_code=entry["status"],
+            headers=entry.get("headers", []),
+            content=zlib.decompress(base64.b64decode(entry["body_z"])),
+            request=request
+        )
+
+    async def aclose(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+_transports: Dict[Tuple[str, str], httpx.AsyncBaseTransport] = {}
+
+
+def get_digikey_transport(settings: Settings) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Obtiene el transporte HTTP compartido según digikey_transport_mode
+
+    Returns:
+        None en modo "live" (transporte por defecto de httpx), o el transporte
+        de grabación/reproducción compartido por todo el proceso
+    """
+    mode = settings.digikey_transport_mode.lower()
+    if mode == TRANSPORT_MODE_LIVE:
+        return None
+
+    key = (mode, settings.digikey_transport_file)
+    transport = _transports.get(key)
+    if transport is not None:
+        return transport
+
+    if mode == TRANSPORT_MODE_RECORD:
+        transport = RecordingTransport(settings.digikey_transport_file)
+    elif mode == TRANSPORT_MODE_REPLAY:
+        transport = ReplayTransport(
+            settings.digikey_transport_file,
+            latency_scale=settings.digikey_replay_latency_scale
+        )
+    else:
+        raise ValueError(f"Invalid digikey_transport_mode: {settings.digikey_transport_mode}")
+
+    _transports[key] = transport
+    return transport
+
+
+# Clientes HTTP compartidos (pool de conexiones keep-alive) por transporte y event loop
+_clients: Dict[Tuple[int, int], httpx.AsyncClient] = {}
+
+
+def get_http_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    max_connections: int = 20
+) -> httpx.AsyncClient:
+    """
+    Obtiene el cliente HTTP compartido para un transporte
+
+    Reutilizar el cliente mantiene abiertas las conexiones TLS con el
+    distribuidor entre peticiones, y las llamadas concurrentes se reparten
+    el pool en lugar de abrir una conexión cada una. Un cliente solo sirve
+    en el event loop donde se creó.
+    """
+    key = (id(transport), id(asyncio.get_running_loop()))
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _clients[key] = httpx.AsyncClient(
+            timeout=30.0,
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+    return client
+
+
+async def close_http_clients():
+    """Cierra los clientes compartidos (los transportes de grabación/reproducción siguen abiertos)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # Cliente de otro event loop ya cerrado
+            pass
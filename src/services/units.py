@@ -0,0 +1,123 @@
+import re
+from typing import Optional, Tuple
+
+
+# Unidades base reconocidas y su símbolo normalizado
+_UNITS = {
+    "ohm": "Ω",
+    "ohms": "Ω",
+    "ω": "Ω",
+    "f": "F",
+    "v": "V",
+    "vac": "V",
+    "vdc": "V",
+    "a": "A",
+    "w": "W",
+    "hz": "Hz",
+    "h": "H",
+    "%": "%",
+    "°c": "°C",
+    "°f": "°F",
+    "s": "s",
+    "m": "m",
+    "g": "g",
+    "b": "B",
+    "bit": "bit",
+    "bits": "bit",
+    "byte": "B",
+    "bytes": "B",
+}
+
+# Prefijos SI; distinguen mayúsculas (m = mili, M = mega)
+_PREFIXES = {
+    "p": 1e-12,
+    "n": 1e-9,
+    "u": 1e-6,
+    "µ": 1e-6,
+    "μ": 1e-6,
+    "m": 1e-3,
+    "k": 1e3,
+    "K": 1e3,
+    "M": 1e6,
+    "G": 1e9,
+    "T": 1e12,
+}
+
+_QUANTITY = re.compile(
+    r"^\s*(?P<sign>[±+-]?)\s*(?P<number>\d+(?:[.,]\d+)?(?:[eE][+-]?\d+)?)\s*"
+    r"(?P<unit>[A-Za-zΩµμ°%]+)?"
+)
+
+
+def _parse_unit(token: str) -> Optional[Tuple[float, str]]:
+    """Separa prefijo SI y unidad base; devuelve (multiplicador, unidad)"""
+    unit = _UNITS.get(token.lower()) if token not in _PREFIXES else None
+    if unit is not None:
+        return 1.0, unit
+    prefix, rest = token[:1], token[1:]
+    if prefix in _PREFIXES and rest:
+        unit = _UNITS.get(rest.lower())
+        if unit is not None:
+            return _PREFIXES[prefix], unit
+    return None
+
+
+def _parse_single(text: str) -> Optional[Tuple[float, Optional[str], str]]:
+    match = _QUANTITY.match(text)
+    if not match:
+        return None
+
+    number = float(match.group("number").replace(",", "."))
+    if match.group("sign") == "-":
+        number = -number
+
+    unit = None
+    token = match.group("unit")
+    if token:
+        parsed = _parse_unit(token)
+        if parsed is None:
+            return None
+        multiplier, unit = parsed
+        # Redondeo a 12 cifras para que 100nF sea exactamente 1e-07
+        number = float(f"{number * multiplier:.12g}")
+    elif match.group("number").startswith("0") and len(match.group("number")) > 1 \
+            and match.group("number")[1].isdigit():
+        # Códigos como "0603" o "0805" son nombres de encapsulado, no cantidades
+        return None
+
+    return number, unit, text[match.end():].strip()
+
+
+def parse_quantity(value: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Normaliza el valor de un parámetro a un número en unidades SI
+
+    Acepta prefijos SI ("10 kOhms", "100nF", "72MHz"), tolerancias ("±5%")
+    y rangos ("2V ~ 3.6V", de los que se toma el primer extremo), seguidos
+    opcionalmente de una anotación entre paréntesis ("-40°C ~ 85°C (TA)").
+
+    Args:
+        value: Texto del parámetro tal como lo devuelve el distribuidor
+
+    Returns:
+        (valor, unidad) o (None, None) si el texto no es una cantidad
+    """
+    if not value:
+        return None, None
+
+    parsed = _parse_single(value)
+    if parsed is None:
+        return None, None
+    number, unit, rest = parsed
+
+    if rest.startswith("~") or rest.startswith("to "):
+        upper = _parse_single(rest.lstrip("~").replace("to ", "", 1))
+        if upper is None:
+            return None, None
+        unit = unit or upper[1]
+        rest = upper[2]
+
+    if rest and not (unit and rest.startswith("(") and rest.endswith(")")):
+        return None, None
+
+    return number, unit
@@ -0,0 +1,106 @@
+from time import monotonic
+from typing import Optional, Dict, Tuple
+
+import httpx
+
+from services.transport import ReplayMissError
+from config import Settings
+
+
+class UpstreamUnavailableError(Exception):
+    """El distribuidor está fallando y no hay datos en cache que servir"""
+
+    def __init__(self, distributor: str, retry_after: float):
+        super().__init__(f"{distributor} is temporarily unavailable")
+        self.distributor = distributor
+        self.retry_after = retry_after
+
+
+def is_degradable_error(error: BaseException) -> bool:
+    """
+    Indica si un error del distribuidor justifica servir datos desactualizados
+
+    Son degradables los 5xx, el 429 (rate limit), los timeouts y los errores
+    de red; un 404 u otro 4xx es una respuesta válida y no lo es, ni una
+    petición sin respuesta grabada en modo replay (no dice nada del
+    distribuidor).
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    if isinstance(error, ReplayMissError):
+        return False
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Extrae la cabecera Retry-After (en segundos) de un error HTTP si existe"""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    value = error.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+class UpstreamBackoff:
+    """
+    Registro de distribuidores que están fallando.
+
+    Tras un 429 o un 5xx no se vuelve a llamar al distribuidor hasta que
+    pase el Retry-After indicado o, en su defecto, default_seconds. Un
+    timeout o error de red aislado solo afecta a su consulta (que sirve su
+    copia de la cache); el backoff se abre tras transport_failure_threshold
+    seguidos sin ninguna respuesta correcta entre medias. Mientras dura se
+    sirve la cache, evitando tormentas de reintentos.
+    """
+
+    def __init__(self, default_seconds: float = 30.0, transport_failure_threshold: int = 3):
+        self.default_seconds = default_seconds
+        self.transport_failure_threshold = transport_failure_threshold
+        self._until: Dict[str, float] = {}
+        self._transport_failures: Dict[str, int] = {}
+
+    def record_failure(self, distributor: str, error: BaseException):
+        if not isinstance(error, httpx.HTTPStatusError):
+            failures = self._transport_failures.get(distributor, 0) + 1
+            self._transport_failures[distributor] = failures
+            if failures < self.transport_failure_threshold:
+                return
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = self.default_seconds
+        self._until[distributor] = monotonic() + delay
+
+    def record_success(self, distributor: str):
+        self._until.pop(distributor, None)
+        self._transport_failures.pop(distributor, None)
+
+    def remaining_seconds(self, distributor: str) -> float:
+        until = self._until.get(distributor)
+        if until is None:
+            return 0.0
+        remaining = until - monotonic()
+        if remaining <= 0:
+            del self._until[distributor]
+            return 0.0
+        return remaining
+
+    def is_backing_off(self, distributor: str) -> bool:
+        return self.remaining_seconds(distributor) > 0
+
+
+_backoffs: Dict[Tuple[float, int], UpstreamBackoff] = {}
+
+
+def get_upstream_backoff(settings: Settings) -> UpstreamBackoff:
+    """Obtiene el registro de fallos compartido por el proceso"""
+    key = (float(settings.upstream_backoff_seconds), settings.upstream_backoff_transport_failures)
+    backoff = _backoffs.get(key)
+    if backoff is None:
+        backoff = UpstreamBackoff(default_seconds=key[0], transport_failure_threshold=key[1])
+        _backoffs[key] = backoff
+    return backoff
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from time import time
+from typing import Optional, List, Dict, Any
+
+from pydantic import BaseModel
+
+from services.aggregator_service import ComponentAggregatorService
+from services.quota import current_consumer
+from services.scheduler import priority_scope, PRIORITY_BACKGROUND
+from models.base import DistributorEnum
+from config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+WARMUP_KIND_SEARCH = "search"
+WARMUP_KIND_DETAILS = "details"
+WARMUP_KIND_COMPARE = "compare"
+
+# Consultas de precarga en curso a la vez (el ritmo lo marca warmup_rate_per_second)
+_CONCURRENCY = 4
+
+
+class WarmupQuery(BaseModel):
+    """Consulta a reproducir durante la precarga"""
+    kind: str = WARMUP_KIND_SEARCH
+    keywords: Optional[str] = None
+    part_number: Optional[str] = None
+    distributor: Optional[str] = None
+    locale_language: str = "en"
+    locale_currency: str = "USD"
+    locale_site: str = "US"
+
+    def dedup_key(self) -> tuple:
+        return (
+            self.kind,
+            (self.keywords or self.part_number or "").strip().lower(),
+            self.distributor,
+            self.locale_language,
+            self.locale_currency,
+            self.locale_site
+        )
+
+
+class WarmupState:
+    """Progreso de la precarga y bandera de disponibilidad para /ready"""
+
+    def __init__(self):
+        self.status = "pending"
+        self.ready = False
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _parse_line(line: str) -> Optional[WarmupQuery]:
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if not line.startswith("{"):
+        return WarmupQuery(keywords=line)
+
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        return None
+    if "kind" not in data:
+        if data.get("part_number"):
+            data["kind"] = WARMUP_KIND_DETAILS
+        elif data.get("keywords"):
+            data["kind"] = WARMUP_KIND_SEARCH
+        else:
+            return None
+    # Formato del registro de consultas: la clave normalizada va en "key"
+    if data.get("key") and not (data.get("keywords") or data.get("part_number")):
+        if data["kind"] == WARMUP_KIND_DETAILS:
+            data["part_number"] = data["key"]
+        else:
+            data["keywords"] = data["key"]
+    query = WarmupQuery(**{k: v for k, v in data.items() if k in WarmupQuery.model_fields})
+    if query.kind == WARMUP_KIND_DETAILS and not (query.part_number and query.distributor):
+        return None
+    if query.kind in (WARMUP_KIND_SEARCH, WARMUP_KIND_COMPARE) and not query.keywords:
+        return None
+    return query
+
+
+def load_warmup_queries(path: str, max_queries: int) -> List[WarmupQuery]:
+    """
+    Lee la lista de precarga
+
+    Acepta texto plano (una búsqueda por línea) o JSONL con objetos
+    {"kind": "search"|"details"|"compare", "keywords"/"part_number",
+    "distributor", "locale_*"}, incluido el formato del registro de
+    consultas. Se descartan duplicados y líneas no reconocidas, conservando
+    el orden (las más populares primero).
+    """
+    source = Path(path)
+    if not source.exists():
+        return []
+
+    queries: List[WarmupQuery] = []
+    seen = set()
+    with source.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                query = _parse_line(line)
+            except ValueError:
+                continue
+            if query is None or query.dedup_key() in seen:
+                continue
+            seen.add(query.dedup_key())
+            queries.append(query)
+            if len(queries) >= max_queries:
+                break
+    return queries
+
+
+async def _run_query(service: ComponentAggregatorService, query: WarmupQuery):
+    if query.kind == WARMUP_KIND_DETAILS:
+        await service.get_component_details(
+            distributor=DistributorEnum(query.distributor.lower()),
+            part_number=query.part_number,
+            locale_language=query.locale_language,
+            locale_currency=query.locale_currency,
+            locale_site=query.locale_site
+        )
+    elif query.kind == WARMUP_KIND_COMPARE:
+        await service.compare_component_across_distributors(
+            manufacturer_part_number=query.keywords,
+            locale_language=query.locale_language,
+            locale_currency=query.locale_currency,
+            locale_site=query.locale_site
+        )
+    else:
+        distributors = [DistributorEnum(query.distributor.lower())] if query.distributor else None
+        await service.search_components(
+            keywords=query.keywords,
+            distributors=distributors,
+            locale_language=query.locale_language,
+            locale_currency=query.locale_currency,
+            locale_site=query.locale_site
+        )
+
+
+async def run_warmup(settings: Settings, state: WarmupState):
+    """
+    Precarga catálogos y caches reproduciendo la lista configurada
+
+    Las llamadas al distribuidor usan la prioridad background y no se cargan
+    a ningún consumidor. Marca state.ready al terminar, haya o no errores.
+    """
+    current_consumer.set(None)
+    state.status = "running"
+    state.started_at = time()
+    tasks: List[asyncio.Task] = []
+    try:
+        with priority_scope(PRIORITY_BACKGROUND):
+            service = ComponentAggregatorService(settings)
+            if settings.warmup_load_catalogs and service.get_available_distributors():
+                try:
+                    await service.load_manufacturer_catalog()
+                    await service.load_category_catalog()
+                except Exception as e:
+                    logger.warning("Error loading catalogs during warm-up: %s", e)
+
+            queries = []
+            if settings.warmup_file:
+                queries = load_warmup_queries(settings.warmup_file, settings.warmup_max_queries)
+            state.total = len(queries)
+
+            semaphore = asyncio.Semaphore(_CONCURRENCY)
+            interval = 1.0 / settings.warmup_rate_per_second if settings.warmup_rate_per_second > 0 else 0.0
+
+            async def replay(query: WarmupQuery):
+                try:
+                    await _run_query(service, query)
+                    state.completed += 1
+                except Exception as e:
+                    state.failed += 1
+                    logger.warning(
+                        "Warm-up query failed: %s", e,
+                        extra={"kind": query.kind, "key": query.keywords or query.part_number}
+                    )
+                finally:
+                    semaphore.release()
+
+            for query in queries:
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(replay(query)))
+                if interval:
+                    await asyncio.sleep(interval)
+            await asyncio.gather(*tasks)
+        state.status = "done"
+    except asyncio.CancelledError:
+        state.status = "cancelled"
+        # Las consultas en curso no deben seguir llamando al distribuidor
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    except Exception as e:
+        state.status = "failed"
+        logger.exception("Warm-up failed: %s", e)
+    finally:
+        state.finished_at = time()
+        state.ready = True
+
+
+async def mark_ready_after(state: WarmupState, seconds: float):
+    """Declara el servicio listo tras seconds aunque la precarga siga en curso"""
+    await asyncio.sleep(seconds)
+    if not state.ready:
+        logger.info("Warm-up still running after %.0fs, reporting ready", seconds)
+        state.ready = True
+
+
+_states: Dict[str, WarmupState] = {}
+
+
+def get_warmup_state() -> WarmupState:
+    """Estado de la precarga del proceso"""
+    state = _states.get("default")
+    if state is None:
+        state = _states["default"] = WarmupState()
+    return state
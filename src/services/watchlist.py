@@ -0,0 +1,306 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from time import time, monotonic
+from typing import Optional, List, Dict, Tuple
+
+import httpx
+
+from services.aggregator_service import ComponentAggregatorService
+from services.cache import distributor_key
+from services.metrics import get_metrics
+from services.quota import current_consumer
+from services.scheduler import priority_scope, PRIORITY_BACKGROUND
+from services.upstream_health import UpstreamUnavailableError
+from models.base import WatchlistItem, WatchlistEntry, GenericComponent
+from config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada refresco en la volatilidad (media móvil exponencial)
+_VOLATILITY_ALPHA = 0.3
+# Tope del reintento tras fallos consecutivos
+_MAX_ERROR_BACKOFF_SECONDS = 3600
+
+
+def watchlist_key(item: WatchlistItem) -> Tuple[str, str, str, str, str]:
+    return (
+        distributor_key(item.distributor),
+        item.part_number.strip(),
+        item.locale_language,
+        item.locale_currency.upper(),
+        item.locale_site.upper()
+    )
+
+
+class WatchlistFullError(Exception):
+    """La lista de seguimiento alcanzó watchlist_max_entries"""
+
+    def __init__(self, max_entries: int):
+        super().__init__(f"Watchlist is limited to {max_entries} parts")
+        self.max_entries = max_entries
+
+
+class Watchlist:
+    """
+    Partes seguidas y el estado de sus refrescos, persistidas en un JSON.
+
+    La prioridad de refresco de una parte es su antigüedad dividida por su
+    intervalo objetivo, que se acorta con la volatilidad (cuántas veces
+    cambió el stock o el precio en los últimos refrescos) hasta
+    min_refresh_seconds. Tras fallos consecutivos se espera un intervalo que
+    se duplica con cada fallo.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 5000,
+        refresh_seconds: float = 600,
+        min_refresh_seconds: float = 120
+    ):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self._entries: Dict[Tuple[str, str, str, str, str], WatchlistEntry] = {}
+        # Cambios hechos en memoria y cuántos de ellos están ya en disco
+        self._version = 0
+        self._saved_version = 0
+        self._write_lock = threading.Lock()
+
+    @property
+    def dirty(self) -> bool:
+        return self._version != self._saved_version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entries(self) -> List[WatchlistEntry]:
+        return list(self._entries.values())
+
+    def add(self, items: List[WatchlistItem]) -> List[WatchlistEntry]:
+        """
+        Añade partes (las ya seguidas se conservan tal cual)
+
+        Raises:
+            WatchlistFullError: Si se superaría max_entries; no se añade ninguna
+        """
+        new_keys = {watchlist_key(item): item for item in items if watchlist_key(item) not in self._entries}
+        if len(self._entries) + len(new_keys) > self.max_entries:
+            raise WatchlistFullError(self.max_entries)
+        now = time()
+        for key, item in new_keys.items():
+            self._entries[key] = WatchlistEntry(
+                distributor=item.distributor,
+                part_number=key[1],
+                locale_language=key[2],
+                locale_currency=key[3],
+                locale_site=key[4],
+                added_at=now
+            )
+        if new_keys:
+            self._version += 1
+        return [self._entries[watchlist_key(item)] for item in items]
+
+    def remove(self, item: WatchlistItem) -> bool:
+        removed = self._entries.pop(watchlist_key(item), None) is not None
+        if removed:
+            self._version += 1
+        return removed
+
+    def refresh_interval(self, entry: WatchlistEntry) -> float:
+        """Intervalo objetivo: refresh_seconds para una parte estable, menos cuanto más volátil"""
+        interval = self.refresh_seconds / (1 + 3 * entry.volatility)
+        return max(interval, self.min_refresh_seconds)
+
+    def due_entries(self, now: float, limit: int) -> List[WatchlistEntry]:
+        """Partes a refrescar ya, las más urgentes primero"""
+        scored = []
+        for entry in self._entries.values():
+            if entry.error_count and entry.last_attempt_at is not None:
+                retry_after = min(
+                    self.min_refresh_seconds * 2 ** (entry.error_count - 1),
+                    _MAX_ERROR_BACKOFF_SECONDS
+                )
+                if now - entry.last_attempt_at < retry_after:
+                    continue
+            if entry.last_refreshed_at is None:
+                scored.append((float("inf"), entry.added_at, entry))
+                continue
+            urgency = (now - entry.last_refreshed_at) / self.refresh_interval(entry)
+            if urgency >= 1:
+                scored.append((urgency, entry.added_at, entry))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [entry for _, _, entry in scored[:limit]]
+
+    def record_success(self, entry: WatchlistEntry, component: Optional[GenericComponent], now: float):
+        entry.last_attempt_at = now
+        entry.error_count = 0
+        entry.last_error = None
+        if component is None:
+            return
+        changed = entry.refresh_count > 0 and (
+            component.quantity_available != entry.quantity_available
+            or component.unit_price != entry.unit_price
+        )
+        entry.volatility = round((1 - _VOLATILITY_ALPHA) * entry.volatility + _VOLATILITY_ALPHA * changed, 4)
+        if changed:
+            entry.last_changed_at = now
+        entry.quantity_available = component.quantity_available
+        entry.unit_price = component.unit_price
+        entry.last_refreshed_at = now
+        entry.refresh_count += 1
+        self._version += 1
+
+    def record_failure(self, entry: WatchlistEntry, error: str, now: float):
+        entry.last_attempt_at = now
+        entry.error_count += 1
+        entry.last_error = error
+        self._version += 1
+
+    def dump(self) -> Tuple[int, bytes]:
+        """
+        Contenido a guardar y versión a la que corresponde
+
+        Se llama desde el event loop, donde no cambia la lista mientras se
+        serializa; la escritura (write) puede ir después a un hilo.
+        """
+        data = json.dumps([entry.model_dump(mode="json") for entry in self._entries.values()], ensure_ascii=False)
+        return self._version, data.encode("utf-8")
+
+    def write(self, version: int, data: bytes):
+        """Escribe data de forma atómica en path, salvo que ya se guardara una versión posterior"""
+        with self._write_lock:
+            if version <= self._saved_version:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix=self.path.name)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                os.unlink(tmp_path)
+                raise
+            self._saved_version = version
+
+    def save(self):
+        """Guarda la lista en path (bloqueante: para la parada)"""
+        if self.path is None:
+            self._saved_version = self._version
+            return
+        self.write(*self.dump())
+
+    async def save_async(self):
+        """Guarda la lista sin bloquear el event loop: serializa aquí y escribe en un hilo"""
+        if self.path is None:
+            self._saved_version = self._version
+            return
+        version, data = self.dump()
+        await asyncio.to_thread(self.write, version, data)
+
+    def load(self):
+        """Carga la lista guardada; no hace nada si no existe"""
+        if self.path is None or not self.path.exists():
+            return
+        for data in json.loads(self.path.read_text(encoding="utf-8")):
+            entry = WatchlistEntry(**data)
+            self._entries[watchlist_key(entry)] = entry
+
+
+async def _refresh_entry(service: ComponentAggregatorService, watchlist: Watchlist, entry: WatchlistEntry):
+    metrics = get_metrics()
+    try:
+        component = await service.refresh_component_details(
+            distributor=entry.distributor,
+            part_number=entry.part_number,
+            locale_language=entry.locale_language,
+            locale_currency=entry.locale_currency,
+            locale_site=entry.locale_site
+        )
+    except UpstreamUnavailableError:
+        # Distribuidor en backoff: se reintenta en la siguiente vuelta sin contar fallo
+        metrics.increment("watchlist_refresh_total", outcome="deferred")
+        return
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        watchlist.record_failure(entry, "not_found" if status == 404 else f"HTTP {status}", time())
+        metrics.increment("watchlist_refresh_total", outcome="error")
+        return
+    except Exception as e:
+        watchlist.record_failure(entry, type(e).__name__, time())
+        metrics.increment("watchlist_refresh_total", outcome="error")
+        logger.warning(
+            "Watchlist refresh failed: %s", e,
+            extra={"distributor": distributor_key(entry.distributor), "key": entry.part_number}
+        )
+        return
+    watchlist.record_success(entry, component, time())
+    metrics.increment("watchlist_refresh_total", outcome="ok" if component is not None else "empty")
+
+
+async def run_watchlist_refresher(settings: Settings):
+    """
+    Refresca en segundo plano las partes de la lista de seguimiento
+
+    Cada watchlist_tick_seconds toma las partes vencidas más urgentes, como
+    mucho las que permite watchlist_rate_per_second, y las refresca con
+    watchlist_concurrency llamadas a la vez. Las llamadas usan la prioridad
+    background y no se cargan a ningún consumidor.
+    """
+    watchlist = get_watchlist(settings)
+    if watchlist is None:
+        return
+    current_consumer.set(None)
+    per_tick = max(int(settings.watchlist_rate_per_second * settings.watchlist_tick_seconds), 1)
+    semaphore = asyncio.Semaphore(settings.watchlist_concurrency)
+
+    async def refresh(service: ComponentAggregatorService, entry: WatchlistEntry):
+        async with semaphore:
+            await _refresh_entry(service, watchlist, entry)
+
+    with priority_scope(PRIORITY_BACKGROUND):
+        while True:
+            started = monotonic()
+            try:
+                due = watchlist.due_entries(time(), per_tick)
+                if due:
+                    service = ComponentAggregatorService(settings)
+                    await asyncio.gather(*[refresh(service, entry) for entry in due])
+                get_metrics().set_gauge("watchlist_parts", len(watchlist))
+                if watchlist.dirty:
+                    await watchlist.save_async()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Watchlist refresh cycle failed: %s", e)
+            await asyncio.sleep(max(settings.watchlist_tick_seconds - (monotonic() - started), 0.0))
+
+
+_watchlists: Dict[str, Watchlist] = {}
+
+
+def get_watchlist(settings: Settings) -> Optional[Watchlist]:
+    """Obtiene la lista de seguimiento del proceso o None si está desactivada"""
+    if not settings.watchlist_enabled:
+        return None
+    watchlist = _watchlists.get(settings.watchlist_path)
+    if watchlist is None:
+        watchlist = Watchlist(
+            settings.watchlist_path or None,
+            max_entries=settings.watchlist_max_entries,
+            refresh_seconds=settings.watchlist_refresh_seconds,
+            min_refresh_seconds=settings.watchlist_min_refresh_seconds
+        )
+        try:
+            watchlist.load()
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring watchlist file: %s", e)
+        _watchlists[settings.watchlist_path] = watchlist
+    return watchlist
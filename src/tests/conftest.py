@@ -0,0 +1,18 @@
+import os
+import sys
+
+# Los módulos de la aplicación se importan desde src/ (como al ejecutar main.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin ficheros persistentes ni tareas de arranque durante los tests
+for name, value in {
+    "TEXT_INDEX_PATH": "",
+    "SNAPSHOT_PATH": "",
+    "WATCHLIST_PATH": "",
+    "HISTORY_PATH": "",
+    "WARMUP_ENABLED": "false",
+    "QUERY_LOG_ENABLED": "false",
+    "DIGIKEY_CLIENT_ID": "test",
+    "DIGIKEY_CLIENT_SECRET": "test",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,57 @@
+import asyncio
+
+from services.admission import AdmissionController
+
+
+def test_queued_request_is_admitted_on_release():
+    async def run():
+        controller = AdmissionController(initial_limit=1, min_limit=1, queue_timeout=1.0)
+        assert await controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+        controller.release()
+        assert await waiting
+        assert controller.in_flight == 1
+        controller.release()
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.in_flight == 0
+    assert controller.queue_depth == 0
+
+
+def test_queue_timeout_rejects_without_leaking_slots():
+    async def run():
+        controller = AdmissionController(initial_limit=1, min_limit=1, queue_timeout=0.01)
+        assert await controller.acquire()
+        assert not await controller.acquire()
+        # El waiter vencido no queda en la cola ni bloquea la vía rápida
+        assert not controller._waiters
+        controller.release()
+        assert controller.in_flight == 0
+        assert await controller.acquire()
+        controller.release()
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.in_flight == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        controller = AdmissionController(initial_limit=1, min_limit=1, queue_timeout=1.0)
+        assert await controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        try:
+            await waiting
+        except asyncio.CancelledError:
+            pass
+        assert not controller._waiters
+        controller.release()
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.in_flight == 0
@@ -0,0 +1,82 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from config import get_settings
+from main import app
+from models.base import DistributorEnum
+from routers.components import get_aggregator_service
+from services.aggregator_service import ComponentAggregatorService
+from services.cache import compare_cache_key, get_negative_cache
+
+
+MPN = "ROUTE-LM358"
+SITE_STOCK = {"US": 100, "DE": 40}
+
+
+def _product(site: str) -> dict:
+    return {
+        "DigiKeyPartNumber": f"{MPN}-ND",
+        "ManufacturerPartNumber": MPN,
+        "Manufacturer": "TI",
+        "Description": "Op amp",
+        "QuantityAvailable": SITE_STOCK[site],
+        "StandardPricing": {"PriceBreaks": [{"BreakQuantity": 1, "UnitPrice": 0.5, "TotalPrice": 0.5}]},
+    }
+
+
+def _client(handler) -> TestClient:
+    def aggregator() -> ComponentAggregatorService:
+        service = ComponentAggregatorService(get_settings())
+        digikey = service._services[DistributorEnum.DIGIKEY]
+        digikey.transport = httpx.MockTransport(handler)
+
+        async def token():
+            return "token"
+
+        digikey.auth_service.get_access_token = token
+        return service
+
+    app.dependency_overrides[get_aggregator_service] = aggregator
+    return TestClient(app)
+
+
+def test_compare_with_locale_sites_reaches_compare_route():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith("/search/keyword")
+        site = request.headers["X-DIGIKEY-Locale-Site"]
+        return httpx.Response(200, json={"Products": [_product(site)], "ProductsCount": 1})
+
+    client = _client(handler)
+    try:
+        plain = client.get(f"/components/compare/{MPN}")
+        assert plain.status_code == 200
+        assert [c["manufacturer_part_number"] for c in plain.json()] == [MPN]
+
+        matrix = client.get(f"/components/compare/{MPN}", params={"locale_sites": "US,DE"})
+        assert matrix.status_code == 200
+        body = matrix.json()
+        assert body["sites"] == ["US", "DE"]
+        assert {site: cell["quantity_available"] for site, cell in body["rows"][0]["sites"].items()} == SITE_STOCK
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_compare_miss_is_negatively_cached():
+    missing = "ROUTE-NOPE"
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        # Solo una parte parecida: la comparación exige el MPN exacto
+        return httpx.Response(200, json={"Products": [_product("US")], "ProductsCount": 1})
+
+    client = _client(handler)
+    try:
+        assert client.get(f"/components/compare/{missing}").status_code == 404
+        key = compare_cache_key(None, missing, "en", "USD", "US")
+        assert get_negative_cache(get_settings()).contains(key)
+
+        assert client.get(f"/components/compare/{missing}").status_code == 404
+        assert len(calls) == 1
+    finally:
+        app.dependency_overrides.clear()
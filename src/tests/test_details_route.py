@@ -0,0 +1,22 @@
+from fastapi.testclient import TestClient
+
+from main import app
+from routers.components import get_aggregator_service
+from services.upstream_health import UpstreamUnavailableError
+
+
+class _UnavailableAggregator:
+    async def get_component_details(self, **kwargs):
+        raise UpstreamUnavailableError("digikey", retry_after=12.5)
+
+
+def test_unavailable_detail_names_the_distributor():
+    app.dependency_overrides[get_aggregator_service] = _UnavailableAggregator
+    try:
+        response = TestClient(app).get("/components/digikey/296-6501-1-ND")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "digikey is temporarily unavailable and no cached data exists"
+    assert response.headers["Retry-After"] == "12"
@@ -0,0 +1,25 @@
+import pytest
+
+from services.history import PriceHistoryStore, history_key
+
+
+def test_failed_save_keeps_pending_changes(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    store = PriceHistoryStore(str(blocker / "history.log"))
+    key = history_key("digikey", "A-ND", "USD")
+    store._record(key, 1_760_000_000, 5, 1_000_000)
+
+    with pytest.raises(OSError):
+        store.save()
+    assert store.dirty
+
+    store.path = tmp_path / "history.log"
+    store._record(key, 1_760_000_060, 7, 1_000_000)
+    store.save()
+    assert not store.dirty
+
+    reloaded = PriceHistoryStore(str(store.path))
+    reloaded.load()
+    assert reloaded.last_seq == 2
+    assert [change.quantity_available for change in reloaded.changes(0).changes] == [5, 7]
@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+
+from config import get_settings
+from models.base import DistributorEnum
+from services.aggregator_service import ComponentAggregatorService
+
+
+PART = "OVERLAY-1-ND"
+
+
+def _details(description: str, quantity: int, price: float) -> dict:
+    return {
+        "DigiKeyPartNumber": PART,
+        "ManufacturerPartNumber": "OVERLAY-1",
+        "Manufacturer": "ST",
+        "Description": description,
+        "QuantityAvailable": quantity,
+        "StandardPricing": {"PriceBreaks": [{"BreakQuantity": 1, "UnitPrice": price, "TotalPrice": price}]},
+    }
+
+
+def _pricing(description: str, quantity: int, price: float, part_number: str = PART) -> dict:
+    return {"ProductPricings": [{
+        "ManufacturerProductNumber": "OVERLAY-1",
+        "Description": {"ProductDescription": description},
+        "QuantityAvailable": quantity,
+        "ProductVariations": [{
+            "DigiKeyProductNumber": part_number,
+            "MinimumOrderQuantity": 1,
+            "StandardPricing": [{"BreakQuantity": 1, "UnitPrice": price, "TotalPrice": price}],
+        }],
+    }]}
+
+
+def _aggregator(handler) -> ComponentAggregatorService:
+    aggregator = ComponentAggregatorService(get_settings())
+    digikey = aggregator._services[DistributorEnum.DIGIKEY]
+    digikey.transport = httpx.MockTransport(handler)
+
+    async def token():
+        return "token"
+
+    digikey.auth_service.get_access_token = token
+    return aggregator
+
+
+def test_second_locale_does_not_carry_first_locale_raw_data():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        site = request.headers["X-DIGIKEY-Locale-Site"]
+        if request.url.path.endswith("/pricing"):
+            assert site == "DE"
+            return httpx.Response(200, json=_pricing("Spannungsregler", 7, 0.9))
+        assert site == "US"
+        return httpx.Response(200, json=_details("Voltage regulator", 5, 1.0))
+
+    aggregator = _aggregator(handler)
+
+    async def run():
+        us = await aggregator.get_component_details(DistributorEnum.DIGIKEY, PART)
+        de = await aggregator.get_component_details(
+            DistributorEnum.DIGIKEY, PART, locale_language="de", locale_currency="EUR", locale_site="DE"
+        )
+        return us, de
+
+    us, de = asyncio.run(run())
+    assert us.raw_data["Description"] == "Voltage regulator"
+    assert de.description == "Spannungsregler"
+    assert de.quantity_available == 7
+    assert "Voltage regulator" not in str(de.raw_data)
+    assert de.raw_data.get("QuantityAvailable") == 7
+
+
+def test_overlay_without_the_exact_variation_fetches_full_details():
+    part = "OVERLAY-2-ND"
+    paths = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        site = request.headers["X-DIGIKEY-Locale-Site"]
+        paths.append((request.url.path.rsplit("/", 1)[1], site))
+        if request.url.path.endswith("/pricing"):
+            # Solo la variante en bobina (otro número de parte)
+            return httpx.Response(200, json=_pricing("Spannungsregler", 9000, 0.2, part_number="OVERLAY-2-TR-ND"))
+        details = _details("Voltage regulator", 5 if site == "US" else 7, 1.0)
+        details["DigiKeyPartNumber"] = part
+        return httpx.Response(200, json=details)
+
+    aggregator = _aggregator(handler)
+
+    async def run():
+        await aggregator.get_component_details(DistributorEnum.DIGIKEY, part)
+        return await aggregator.get_component_details(
+            DistributorEnum.DIGIKEY, part, locale_language="de", locale_currency="EUR", locale_site="DE"
+        )
+
+    de = asyncio.run(run())
+    assert ("pricing", "DE") in paths and ("productdetails", "DE") in paths
+    assert de.quantity_available == 7
+    assert de.unit_price == 1.0
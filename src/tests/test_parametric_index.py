@@ -0,0 +1,44 @@
+from models.base import GenericComponent, ComponentParameter, ParametricFilter
+from services.parametric_index import ParametricIndex
+
+
+def _component(part_number: str, **parameters: float) -> GenericComponent:
+    return GenericComponent(
+        distributor="DigiKey",
+        distributor_part_number=part_number,
+        manufacturer="Yageo",
+        manufacturer_part_number=part_number,
+        description="resistor",
+        quantity_available=1,
+        parameters=[
+            ComponentParameter(name=name, value=str(value), numeric_value=value)
+            for name, value in parameters.items()
+        ],
+    )
+
+
+def _parts(index: ParametricIndex, **bounds) -> list:
+    components, _ = index.search([ParametricFilter(**bounds)])
+    return sorted(c.distributor_part_number for c in components)
+
+
+def test_readded_row_drops_parameters_it_no_longer_has():
+    index = ParametricIndex()
+    index.add_components([_component("R1", resistance=1000.0, power=0.25), _component("R2", resistance=2000.0)])
+    index.add_components([_component("R1", resistance=4700.0)])
+
+    assert _parts(index, name="power", min=0.1) == []
+    assert _parts(index, name="power", value="0.25") == []
+    assert _parts(index, name="resistance", max=1500.0) == []
+    assert _parts(index, name="resistance", min=0.0) == ["R1", "R2"]
+
+
+def test_max_parts_evicts_least_recently_updated():
+    index = ParametricIndex(max_parts=2)
+    index.add_components([_component("R1", resistance=1.0), _component("R2", resistance=2.0)])
+    index.add_components([_component("R1", resistance=1.5)])
+    index.add_components([_component("R3", resistance=3.0)])
+
+    assert len(index) == 2
+    assert _parts(index, name="resistance", min=0.0) == ["R1", "R3"]
+    assert _parts(index, name="resistance", min=1.9, max=2.1) == []
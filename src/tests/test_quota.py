@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import quota
+from services.quota import QuotaManager, QuotaExceededError, SlidingWindowCounter
+
+
+def test_unknown_keys_share_one_budget():
+    manager = QuotaManager(requests_per_window=2, api_keys={"k3y": "compras"})
+    assert manager.identify({"x-api-key": "k3y"}) == "compras"
+    assert manager.identify({"x-api-key": "rotated-1"}) == manager.identify({"x-api-key": "rotated-2"}) == "unknown"
+    # Sin proxy de confianza la cabecera no elige la cuenta
+    assert manager.identify({"x-consumer-id": "fresh"}) == "anonymous"
+
+    manager.charge_request(manager.identify({"x-api-key": "rotated-1"}))
+    manager.charge_request(manager.identify({"x-api-key": "rotated-2"}))
+    with pytest.raises(QuotaExceededError):
+        manager.charge_request(manager.identify({"x-api-key": "rotated-3"}))
+
+
+def test_trusted_consumer_header():
+    manager = QuotaManager(trust_consumer_header=True)
+    assert manager.identify({"x-consumer-id": "etl"}) == "etl"
+
+
+def test_window_reset():
+    counter = SlidingWindowCounter(60)
+    counter.add(0, 10)
+    assert counter.count(30) == 10
+    # La ventana anterior pesa cada vez menos y desaparece tras dos ventanas
+    assert counter.count(90) == pytest.approx(5)
+    assert counter.count(130) == 0
+
+
+def test_idle_consumers_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(quota, "time", lambda: now[0])
+    manager = QuotaManager(window_seconds=60, trust_consumer_header=True)
+    manager.charge_request("a")
+    manager.charge_request("b")
+
+    now[0] += 125
+    manager.charge_request("c")
+    assert set(manager.usage()) == {"c"}
+
+
+def test_usage_requires_a_configured_key(monkeypatch):
+    manager = QuotaManager(api_keys={"k3y": "compras"})
+    monkeypatch.setattr(main, "quota_manager", manager)
+    client = TestClient(main.app)
+    assert client.get("/usage").status_code == 401
+    assert client.get("/usage", headers={"X-API-Key": "other"}).status_code == 401
+    assert client.get("/usage", headers={"X-API-Key": "k3y"}).status_code == 200
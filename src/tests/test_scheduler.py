@@ -0,0 +1,79 @@
+import asyncio
+
+from services.scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    UpstreamScheduler,
+)
+
+# Ritmo despreciable: durante la prueba solo hay los tokens que se conceden a mano
+SLOW_RATE = 0.0001
+
+
+def test_interactive_reserve_is_not_consumed_by_bulk():
+    async def run():
+        scheduler = UpstreamScheduler(SLOW_RATE, burst=10, interactive_reserve=0.3)
+        for _ in range(7):
+            await scheduler.acquire(PRIORITY_BULK)
+        bulk = asyncio.ensure_future(scheduler.acquire(PRIORITY_BULK))
+        await asyncio.sleep(0)
+        assert not bulk.done()
+        # Queda la reserva interactiva aunque haya bulk en cola
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), 1.0)
+        bulk.cancel()
+
+    asyncio.run(run())
+
+
+def test_weighted_fair_queuing_order():
+    async def run():
+        scheduler = UpstreamScheduler(
+            SLOW_RATE, burst=8, interactive_reserve=0.0,
+            weights={PRIORITY_INTERACTIVE: 8.0, PRIORITY_BULK: 2.0, "background": 1.0}
+        )
+        for _ in range(8):
+            await scheduler.acquire(PRIORITY_INTERACTIVE)
+        order = []
+
+        async def call(priority):
+            await scheduler.acquire(priority)
+            order.append(priority)
+
+        tasks = [asyncio.ensure_future(call(PRIORITY_BULK)) for _ in range(4)]
+        tasks += [asyncio.ensure_future(call(PRIORITY_INTERACTIVE)) for _ in range(4)]
+        await asyncio.sleep(0)
+        scheduler._bucket.tokens = scheduler._shared_bucket.tokens = 8
+        scheduler._dispatch()
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(run())
+    # Etiquetas de fin: interactive 1/8, 2/8, 3/8, 4/8; bulk 1/2, 2/2, 3/2, 4/2
+    assert order[:3] == [PRIORITY_INTERACTIVE] * 3
+    assert order[-3:] == [PRIORITY_BULK] * 3
+
+
+def test_cancelled_waiters_free_the_queue_and_refund_tokens():
+    async def run():
+        scheduler = UpstreamScheduler(SLOW_RATE, burst=1, interactive_reserve=0.0)
+        await scheduler.acquire(PRIORITY_INTERACTIVE)
+
+        # Cancelado en cola: no bloquea la vía rápida
+        queued = asyncio.ensure_future(scheduler.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert not any(scheduler._queues.values())
+
+        # Cancelado después de recibir turno: el token se devuelve
+        granted = asyncio.ensure_future(scheduler.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        scheduler._bucket.tokens = 1
+        scheduler._dispatch()
+        granted.cancel()
+        await asyncio.gather(granted, return_exceptions=True)
+        assert granted.cancelled()
+        assert scheduler._bucket.tokens >= 1
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), 1.0)
+
+    asyncio.run(run())
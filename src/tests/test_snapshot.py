@@ -0,0 +1,44 @@
+from models.base import GenericComponent
+from services.snapshot import CatalogSnapshot, write_snapshot
+from tools.snapshot import collect_components
+
+
+def _component(part_number: str, unit_price: float) -> GenericComponent:
+    return GenericComponent(
+        distributor="DigiKey",
+        distributor_part_number=part_number,
+        manufacturer="ST",
+        manufacturer_part_number=part_number,
+        description="voltage regulator",
+        quantity_available=1,
+        unit_price=unit_price,
+    )
+
+
+def test_close_with_live_column_view_is_deferred(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    write_snapshot(path, [_component("A-ND", 1.5), _component("B-ND", 2.5)])
+
+    snapshot = CatalogSnapshot(path)
+    prices = snapshot.column("unit_price")
+    snapshot.close()
+    # La vista sigue siendo válida; el mapeo se libera al soltarla
+    assert sorted(prices.tolist()) == [1.5, 2.5]
+    del prices
+    snapshot.close()
+
+
+def test_collect_components_closes_the_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "catalog.snapshot")
+    write_snapshot(path, [_component("A-ND", 1.5)])
+    closed = []
+    original = CatalogSnapshot.close
+
+    def close(self):
+        closed.append(self.path)
+        original(self)
+
+    monkeypatch.setattr(CatalogSnapshot, "close", close)
+    components = collect_components(path, "")
+    assert [c.distributor_part_number for c in components] == ["A-ND"]
+    assert len(closed) == 1
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+import pytest
+
+from models.base import GenericComponent
+from services.text_index import FullTextIndex
+
+
+def _component(part_number: str, description: str = "voltage regulator") -> GenericComponent:
+    return GenericComponent(
+        distributor="DigiKey",
+        distributor_part_number=part_number,
+        manufacturer="ST",
+        manufacturer_part_number=part_number,
+        description=description,
+        quantity_available=1,
+    )
+
+
+def test_failed_save_stays_dirty_and_leaves_no_temp_file(tmp_path, monkeypatch):
+    index = FullTextIndex(str(tmp_path / "index.bin"))
+    index.add_components([_component("A-ND")])
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        asyncio.run(index.save_async())
+    assert index.dirty
+    assert list(tmp_path.iterdir()) == []
+
+    monkeypatch.undo()
+    asyncio.run(index.save_async())
+    assert not index.dirty
+
+
+def test_stale_write_does_not_replace_newer_file(tmp_path):
+    path = tmp_path / "index.bin"
+    index = FullTextIndex(str(path))
+    index.add_components([_component("A-ND")])
+    old_version, old_components = index.dump()
+
+    # Cambio mientras un guardado anterior sigue en su hilo
+    index.add_components([_component("B-ND")])
+    index.save()
+    index.write(old_version, old_components)
+    assert not index.dirty
+
+    reloaded = FullTextIndex(str(path))
+    reloaded.load()
+    assert len(reloaded) == 2
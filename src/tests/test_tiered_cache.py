@@ -0,0 +1,73 @@
+import asyncio
+
+from services.cache.backends import MemoryCacheBackend, RedisCacheBackend, TieredCacheBackend
+from services.redis_client import InMemoryRedis, InMemoryPubSub
+
+
+class FlakyPubSub(InMemoryPubSub):
+    """Suscripción cuya primera escucha cae con un error de conexión"""
+
+    failures = 1
+
+    async def listen(self):
+        if FlakyPubSub.failures:
+            FlakyPubSub.failures -= 1
+            raise ConnectionError("connection reset")
+        async for message in super().listen():
+            yield message
+
+
+class FlakyRedis(InMemoryRedis):
+    def pubsub(self) -> InMemoryPubSub:
+        return FlakyPubSub(self)
+
+
+def _tiered(client) -> TieredCacheBackend:
+    return TieredCacheBackend(
+        l1=MemoryCacheBackend(name="l1"),
+        l2=RedisCacheBackend(client),
+        client=client,
+        retry_seconds=0.01
+    )
+
+
+def test_invalidation_reaches_other_replica():
+    async def run():
+        client = InMemoryRedis()
+        a, b = _tiered(client), _tiered(client)
+        await a.set("details:x", b"v1", 60)
+        assert await b.get("details:x") == b"v1"
+        await asyncio.sleep(0)
+        await a.set("details:x", b"v2", 60)
+        await asyncio.sleep(0.01)
+        value = await b.get("details:x")
+        await a.close()
+        await b.close()
+        return value
+
+    assert asyncio.run(run()) == b"v2"
+
+
+def test_listener_resubscribes_and_clears_l1_after_failure(caplog):
+    FlakyPubSub.failures = 1
+
+    async def run():
+        client = FlakyRedis()
+        a, b = _tiered(client), _tiered(client)
+        await b.l1.set("details:x", b"stale", 60)
+        # La primera escucha (la de b) falla una vez y vuelve a suscribirse
+        await b.get("details:y")
+        await asyncio.sleep(0.05)
+        assert len(b.l1) == 0
+        await a.set("details:z", b"v1", 60)
+        assert await b.get("details:z") == b"v1"
+        await a.set("details:z", b"v2", 60)
+        await asyncio.sleep(0.01)
+        value = await b.get("details:z")
+        await a.close()
+        await b.close()
+        return value
+
+    with caplog.at_level("WARNING"):
+        assert asyncio.run(run()) == b"v2"
+    assert "Cache invalidation listener failed" in caplog.text
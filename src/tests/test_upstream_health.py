@@ -0,0 +1,37 @@
+import httpx
+
+from services.transport import ReplayMissError
+from services.upstream_health import UpstreamBackoff, is_degradable_error
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://api.example.com/parts")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+def test_replay_miss_is_not_degradable():
+    assert not is_degradable_error(ReplayMissError("no recording"))
+    assert is_degradable_error(httpx.ReadTimeout("timeout"))
+    assert is_degradable_error(_status_error(503))
+    assert not is_degradable_error(_status_error(404))
+
+
+def test_lone_timeout_does_not_open_backoff():
+    backoff = UpstreamBackoff(default_seconds=30, transport_failure_threshold=3)
+    backoff.record_failure("digikey", httpx.ReadTimeout("timeout"))
+    backoff.record_failure("digikey", httpx.ConnectError("refused"))
+    assert not backoff.is_backing_off("digikey")
+
+    backoff.record_success("digikey")
+    backoff.record_failure("digikey", httpx.ReadTimeout("timeout"))
+    backoff.record_failure("digikey", httpx.ReadTimeout("timeout"))
+    assert not backoff.is_backing_off("digikey")
+    backoff.record_failure("digikey", httpx.ReadTimeout("timeout"))
+    assert backoff.is_backing_off("digikey")
+
+
+def test_server_error_opens_backoff_at_once():
+    backoff = UpstreamBackoff(default_seconds=30, transport_failure_threshold=3)
+    backoff.record_failure("digikey", _status_error(503))
+    assert backoff.is_backing_off("digikey")
+    assert not backoff.is_backing_off("mouser")
@@ -0,0 +1,40 @@
+import asyncio
+
+from config import get_settings
+from services import warmup
+from services.warmup import WarmupState, run_warmup
+
+
+def test_cancelling_warmup_cancels_running_queries(tmp_path, monkeypatch):
+    queries = tmp_path / "warmup.txt"
+    queries.write_text("lm317\nne555\n", encoding="utf-8")
+    settings = get_settings().model_copy(update={
+        "warmup_file": str(queries),
+        "warmup_load_catalogs": False,
+        # La cancelación llega mientras se espera para lanzar la siguiente consulta
+        "warmup_rate_per_second": 0.5,
+    })
+    started, cancelled = [], []
+
+    async def hang(service, query):
+        started.append(query.keywords)
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(query.keywords)
+            raise
+
+    monkeypatch.setattr(warmup, "_run_query", hang)
+    state = WarmupState()
+
+    async def run():
+        task = asyncio.create_task(run_warmup(settings, state))
+        while not started:
+            await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # Canceladas antes de que run_warmup termine, no al cerrar el bucle
+        assert cancelled == ["lm317"]
+
+    asyncio.run(run())
+    assert state.status == "cancelled"
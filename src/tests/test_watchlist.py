@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from models.base import WatchlistItem
+from services.watchlist import Watchlist
+
+
+def _item(part_number: str) -> WatchlistItem:
+    return WatchlistItem(distributor="digikey", part_number=part_number)
+
+
+def test_edit_during_write_stays_dirty(tmp_path):
+    path = tmp_path / "watchlist.json"
+    watchlist = Watchlist(str(path))
+    watchlist.add([_item("A-ND")])
+    version, data = watchlist.dump()
+
+    # Cambio en el event loop mientras el hilo escribe la versión anterior
+    watchlist.add([_item("B-ND")])
+    watchlist.write(version, data)
+    assert watchlist.dirty
+
+    asyncio.run(watchlist.save_async())
+    assert not watchlist.dirty
+    # Una escritura atrasada no pisa la versión más reciente
+    watchlist.write(version, data)
+
+    reloaded = Watchlist(str(path))
+    reloaded.load()
+    assert sorted(entry.part_number for entry in reloaded.entries()) == ["A-ND", "B-ND"]
+
+
+def test_failed_write_keeps_changes_dirty(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    watchlist = Watchlist(str(blocker / "watchlist.json"))
+    watchlist.add([_item("A-ND")])
+
+    with pytest.raises(OSError):
+        asyncio.run(watchlist.save_async())
+    assert watchlist.dirty
@@ -0,0 +1,199 @@
+"""
+Analizador offline del registro de consultas
+
+Uso (desde src/):
+    python -m tools.analyze_query_log data/query_log.jsonl*
+    python -m tools.analyze_query_log data/query_log.jsonl* --sizes 500,5000 --ttls 300,3600 \\
+        --warmup-out data/warmup.jsonl --warmup-size 200
+"""
+import argparse
+import json
+import sys
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Iterable, Tuple
+
+
+# Consultas que corresponden a una entrada de la cache de componentes
+_CACHED_KINDS = ("search", "details")
+_COVERAGE_LEVELS = (0.5, 0.8, 0.9, 0.95, 0.99)
+
+
+def load_entries(paths: Iterable[str], include_background: bool = False) -> List[Dict[str, Any]]:
+    """Lee uno o varios ficheros JSONL (incluidos los rotados) ordenados por tiempo"""
+    entries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not include_background and entry.get("priority") == "background":
+                    continue
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry.get("ts", 0))
+    return entries
+
+
+def cache_key(entry: Dict[str, Any]) -> Tuple:
+    """Clave equivalente a la de ComponentCache para una entrada del registro"""
+    return (
+        entry.get("kind"),
+        entry.get("distributor"),
+        entry.get("key"),
+        entry.get("locale_language"),
+        entry.get("locale_currency"),
+        entry.get("locale_site"),
+        entry.get("max_results"),
+        entry.get("offset"),
+    )
+
+
+def frequency_report(entries: List[Dict[str, Any]], top: int = 20) -> Dict[str, Any]:
+    """Distribución de frecuencias de las claves y resultado de cache observado"""
+    keys = Counter((entry.get("kind"), entry.get("key")) for entry in entries)
+    total = sum(keys.values())
+    counts = sorted(keys.values(), reverse=True)
+
+    coverage = {}
+    accumulated = 0
+    levels = list(_COVERAGE_LEVELS)
+    for rank, count in enumerate(counts, start=1):
+        accumulated += count
+        while levels and accumulated >= levels[0] * total:
+            coverage[f"{int(levels.pop(0) * 100)}%"] = rank
+
+    latencies = Counter()
+    for entry in entries:
+        latencies[entry.get("cache")] += entry.get("latency_ms", 0.0)
+    outcomes = Counter(entry.get("cache") for entry in entries)
+
+    return {
+        "requests": total,
+        "unique_keys": len(keys),
+        "singleton_keys": sum(1 for count in counts if count == 1),
+        "by_kind": dict(Counter(entry.get("kind") for entry in entries)),
+        "keys_for_coverage": coverage,
+        "observed_cache": {
+            outcome: {
+                "requests": count,
+                "ratio": round(count / total, 4) if total else 0.0,
+                "avg_latency_ms": round(latencies[outcome] / count, 2)
+            }
+            for outcome, count in outcomes.most_common()
+        },
+        "top_keys": [
+            {"kind": kind, "key": key, "requests": count}
+            for (kind, key), count in keys.most_common(top)
+        ],
+    }
+
+
+def simulate_cache(entries: List[Dict[str, Any]], size: int, ttl: float) -> float:
+    """
+    Tasa de aciertos de una cache LRU de size entradas con TTL ttl
+
+    Se reproducen las búsquedas y detalles en orden: un acierto es una clave
+    presente y no expirada; cada fallo la (re)inserta como haría el servicio.
+    """
+    cache: "OrderedDict[Tuple, float]" = OrderedDict()
+    hits = 0
+    requests = 0
+    for entry in entries:
+        if entry.get("kind") not in _CACHED_KINDS:
+            continue
+        requests += 1
+        key = cache_key(entry)
+        ts = entry.get("ts", 0)
+        stored_at = cache.get(key)
+        if stored_at is not None and ts - stored_at < ttl:
+            hits += 1
+            cache.move_to_end(key)
+            continue
+        cache[key] = ts
+        cache.move_to_end(key)
+        if len(cache) > size:
+            cache.popitem(last=False)
+    return hits / requests if requests else 0.0
+
+
+def recommend_warmup(entries: List[Dict[str, Any]], size: int, min_requests: int = 2) -> List[Dict[str, Any]]:
+    """Consultas más frecuentes en el formato de WARMUP_FILE"""
+    counts = Counter(cache_key(entry) for entry in entries if entry.get("kind") in _CACHED_KINDS)
+    recommended = []
+    for key, count in counts.most_common(size):
+        if count < min_requests:
+            break
+        kind, distributor, text, language, currency, site, _, _ = key
+        query = {"kind": kind, "distributor": distributor}
+        query["part_number" if kind == "details" else "keywords"] = text
+        query.update(locale_language=language, locale_currency=currency, locale_site=site)
+        recommended.append(query)
+    return recommended
+
+
+def _parse_list(value: str, cast) -> List:
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analiza el registro de consultas (JSONL)")
+    parser.add_argument("paths", nargs="+", help="Ficheros del registro, incluidos los rotados")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Tamaños de cache a simular")
+    parser.add_argument("--ttls", default="60,300,900,3600", help="TTLs (segundos) a simular")
+    parser.add_argument("--top", type=int, default=20, help="Número de claves más frecuentes a mostrar")
+    parser.add_argument("--warmup-out", help="Fichero JSONL donde escribir la lista de precarga")
+    parser.add_argument("--warmup-size", type=int, default=200, help="Máximo de consultas de precarga")
+    parser.add_argument("--include-background", action="store_true",
+                        help="Incluir el tráfico de precarga y refrescos")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    entries = load_entries(args.paths, include_background=args.include_background)
+    if not entries:
+        print("No entries found", file=sys.stderr)
+        return 1
+
+    report = frequency_report(entries, top=args.top)
+    sizes = _parse_list(args.sizes, int)
+    ttls = _parse_list(args.ttls, float)
+    report["simulated_hit_ratio"] = {
+        f"size={size}": {f"ttl={ttl:g}": round(simulate_cache(entries, size, ttl), 4) for ttl in ttls}
+        for size in sizes
+    }
+
+    warmup = recommend_warmup(entries, args.warmup_size)
+    report["recommended_warmup"] = len(warmup)
+    if args.warmup_out:
+        with open(args.warmup_out, "w", encoding="utf-8") as f:
+            for query in warmup:
+                f.write(json.dumps(query, ensure_ascii=False) + "\n")
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"Requests: {report['requests']}  unique keys: {report['unique_keys']}  "
+          f"singletons: {report['singleton_keys']}")
+    print("By kind: " + ", ".join(f"{kind}={count}" for kind, count in report["by_kind"].items()))
+    print("Keys needed to cover traffic: " + ", ".join(
+        f"{level} -> {keys}" for level, keys in report["keys_for_coverage"].items()
+    ))
+    print("\nObserved cache outcomes:")
+    for outcome, data in report["observed_cache"].items():
+        print(f"  {outcome:<9} {data['requests']:>8}  {data['ratio']:>7.2%}  avg {data['avg_latency_ms']} ms")
+    print("\nSimulated hit ratio (LRU + TTL):")
+    print("  " + " " * 12 + "".join(f"{'ttl=' + format(ttl, 'g'):>12}" for ttl in ttls))
+    for size in sizes:
+        row = report["simulated_hit_ratio"][f"size={size}"]
+        print(f"  {'size=' + str(size):<12}" + "".join(f"{ratio:>12.2%}" for ratio in row.values()))
+    print(f"\nTop {args.top} keys:")
+    for item in report["top_keys"]:
+        print(f"  {item['requests']:>8}  {item['kind']:<8} {item['key']}")
+    print(f"\nRecommended warm-up queries: {len(warmup)}"
+          + (f" (written to {args.warmup_out})" if args.warmup_out else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Instantánea columnar del catálogo local de componentes
+
+Uso (desde src/):
+    python -m tools.snapshot export
+    python -m tools.snapshot export --index data/text_index.bin --out data/catalog.snapshot --reset-index
+    python -m tools.snapshot info data/catalog.snapshot
+
+export combina la instantánea actual (si existe) con los componentes del
+índice de texto persistido, que tienen prioridad por ser más recientes, y
+escribe la nueva instantánea de forma atómica. Con --reset-index vacía
+después el fichero del índice: hacerlo con el servicio parado, o el
+servicio volverá a escribir lo que tenga en memoria (solo duplicaría filas
+ya presentes en la instantánea).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from time import monotonic
+from typing import List, Dict, Tuple
+
+from models.base import GenericComponent
+from services.snapshot import CatalogSnapshot, write_snapshot
+from services.text_index import FullTextIndex, component_tokens
+from config import get_settings
+
+
+def collect_components(snapshot_path: str, index_path: str) -> List[GenericComponent]:
+    """Componentes de la instantánea y del índice, sin duplicados (gana el índice)"""
+    components: Dict[Tuple[str, str], GenericComponent] = {}
+    if snapshot_path and Path(snapshot_path).exists():
+        snapshot = CatalogSnapshot(snapshot_path)
+        try:
+            for component in snapshot.iter_components():
+                components[(component.distributor.lower(), component.distributor_part_number)] = component
+        finally:
+            snapshot.close()
+    if index_path and Path(index_path).exists():
+        index = FullTextIndex()
+        index.load(index_path)
+        for component in index.iter_components():
+            components[(component.distributor.lower(), component.distributor_part_number)] = component
+    return list(components.values())
+
+
+def export(args) -> int:
+    started = monotonic()
+    components = collect_components(args.snapshot, args.index)
+    if not components:
+        print("No components found", file=sys.stderr)
+        return 1
+    rows = write_snapshot(args.out, components, tokenize=component_tokens)
+    size = Path(args.out).stat().st_size
+    print(f"Wrote {rows} components to {args.out} ({size / 1e6:.1f} MB) in {monotonic() - started:.1f}s")
+    if args.reset_index and args.index and Path(args.index).exists():
+        FullTextIndex().save(args.index)
+        print(f"Reset {args.index}")
+    return 0
+
+
+def info(args) -> int:
+    snapshot = CatalogSnapshot(args.path)
+    try:
+        report = {
+            "path": args.path,
+            "rows": len(snapshot),
+            "bytes": snapshot.size_bytes,
+            "bytes_per_row": round(snapshot.size_bytes / len(snapshot)) if len(snapshot) else 0,
+            "created_at": snapshot.created_at,
+            "text_postings": snapshot.has_postings,
+        }
+    finally:
+        snapshot.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Instantánea columnar del catálogo de componentes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Genera la instantánea")
+    export_parser.add_argument("--index", default=settings.text_index_path,
+                               help="Índice de texto persistido a incluir")
+    export_parser.add_argument("--snapshot", default=settings.snapshot_path,
+                               help="Instantánea anterior a incluir")
+    export_parser.add_argument("--out", default=settings.snapshot_path, help="Fichero destino")
+    export_parser.add_argument("--reset-index", action="store_true",
+                               help="Vaciar el índice de texto tras exportarlo")
+    export_parser.set_defaults(handler=export)
+
+    info_parser = commands.add_parser("info", help="Resumen de una instantánea")
+    info_parser.add_argument("path", nargs="?", default=settings.snapshot_path)
+    info_parser.set_defaults(handler=info)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())